@@ -0,0 +1,234 @@
+"""
+Online backups of the bot database.
+
+SQLite ke backup API se chhote steps mein copy hota hai, bot chalte hue. Source
+connection par ek read transaction khula rehta hai: WAL mode mein ye ek fixed
+snapshot hai, isliye beech mein hue writes backup ko restart nahi karte (iske
+bina lagataar downloads/uploads par backup kabhi khatam hi nahi hota) aur writer
+thread kabhi block nahi hota. Snapshot ke baad quick_check, phir rename - adhoori
+file kabhi backup jaisi nahi dikhti.
+
+Sharded storage (DB_SHARDS > 1) mein files ki rows shard DBs mein hain, isliye har
+backup home DB ke saath har shard ka snapshot bhi leta hai (<name>.shard{i}.db).
+
+Usage: python backup.py [--export] [--dir backups] [--db storage.db] [--shards N]
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+import datetime
+from collections import namedtuple
+from config import (
+    DATABASE_NAME, DB_SHARDS, BACKUP_DIR, BACKUP_INTERVAL, BACKUP_KEEP,
+    BACKUP_PAGES, BACKUP_STEP_SLEEP, BACKUP_EXPORT_JSONL
+)
+
+logger = logging.getLogger(__name__)
+
+BackupResult = namedtuple('BackupResult', 'path export_path size pages steps max_step_ms seconds export_seconds '
+                                          'shard_paths', defaults=[()])
+
+def snapshot(source_path, target_path, pages=BACKUP_PAGES, step_sleep=BACKUP_STEP_SLEEP):
+    """Copy source_path into target_path; returns (pages, steps, slowest step in ms)"""
+    src = sqlite3.connect(source_path, isolation_level=None, timeout=30)
+    dst = sqlite3.connect(target_path, isolation_level=None)
+    steps = []
+    try:
+        src.execute('BEGIN')
+        src.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+
+        last = time.perf_counter()
+
+        def progress(status, remaining, total):
+            nonlocal last
+            steps.append(time.perf_counter() - last)
+            # backup() ka apna sleep sirf BUSY par lagta hai; pacing yahan
+            if step_sleep and remaining:
+                time.sleep(step_sleep)
+            last = time.perf_counter()
+
+        src.backup(dst, pages=pages, progress=progress)
+        src.execute('COMMIT')
+
+        # WAL flag header ke saath copy hota hai; snapshot ek akeli file rahe
+        dst.execute('PRAGMA journal_mode=DELETE')
+        check = dst.execute('PRAGMA quick_check').fetchone()[0]
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"snapshot failed quick_check: {check}")
+        page_count = dst.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    return page_count, len(steps), max(steps, default=0) * 1000
+
+def export_jsonl(snapshot_path, export_path, shard_paths=()):
+    """Write the files table of a snapshot (and its shard snapshots) as gzipped JSON lines; returns row count"""
+    import gzip  # sirf export mein chahiye - bot start par load nahi hota
+    rows = 0
+    with gzip.open(export_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        for path in (snapshot_path, *shard_paths):
+            conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            try:
+                columns = [row[1] for row in conn.execute('PRAGMA table_info(files)')]
+                # JSON SQLite hi banata hai (C mein, GIL ke bina) - Python json.dumps se
+                # kai guna tez, aur export ke dauraan bot ka event loop nahi atakta
+                fields = ', '.join(f"'{column}', {column}" for column in columns)
+                cursor = conn.execute(f'SELECT json_object({fields}) FROM files ORDER BY id')
+                while True:
+                    batch = cursor.fetchmany(5000)
+                    if not batch:
+                        break
+                    f.write('\n'.join(row[0] for row in batch) + '\n')
+                    rows += len(batch)
+            finally:
+                conn.close()
+    return rows
+
+class BackupManager:
+    """Takes rotating snapshots of the database (and its shards) on a schedule or on demand"""
+
+    def __init__(self, db_path=DATABASE_NAME, directory=BACKUP_DIR, keep=BACKUP_KEEP,
+                 interval=BACKUP_INTERVAL, export=BACKUP_EXPORT_JSONL, shard_paths=()):
+        self.db_path = db_path
+        self.shard_paths = list(shard_paths)
+        self.directory = directory
+        self.keep = keep
+        self.interval = interval
+        self.export = export
+        self.prefix = os.path.splitext(os.path.basename(db_path))[0] + '-'
+        self._task = None
+        self._running = None  # chal raha backup (thread), stop() iska wait karta hai
+
+        self.last = None
+        self.last_at = None
+        self.failures = 0
+
+    def start(self):
+        if self.interval and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._running and not self._running.done():
+            # Thread cancel nahi ho sakta; adhoora snapshot mat chhodo
+            await asyncio.wait([self._running])
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.backup()
+            except Exception as e:
+                logger.error(f"Backup failed: {e}")
+
+    async def backup(self, export=None):
+        """Take one snapshot now (waits for a running one first); returns BackupResult"""
+        while self._running and not self._running.done():
+            await asyncio.wait([self._running])
+        export = self.export if export is None else export
+        self._running = asyncio.ensure_future(asyncio.to_thread(self._backup, export))
+        try:
+            # Caller cancel ho jaaye tab bhi thread apna kaam poora karta hai
+            result = await asyncio.shield(self._running)
+        except Exception:
+            self.failures += 1
+            raise
+        self.last, self.last_at = result, time.time()
+        logger.info(f"Backup {result.path}: {result.size / 2 ** 20:.1f} MB in {result.seconds:.1f}s "
+                    f"({result.steps} steps, slowest {result.max_step_ms:.1f} ms)")
+        return result
+
+    def _backup(self, export):
+        os.makedirs(self.directory, exist_ok=True)
+        name = self.prefix + datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.directory, name + '.db')
+        shard_targets = [os.path.join(self.directory, f'{name}.shard{i}.db') for i in range(len(self.shard_paths))]
+
+        # Shards pehle, home DB sabse aakhir mein rename - jab tak <name>.db nahi dikhta
+        # backup adhoora hai (rotation bhi sirf <name>.db dekhta hai). Har file apna
+        # consistent snapshot hai; files ke beech ek hi pal ka nahi
+        start = time.perf_counter()
+        pages, steps, max_step_ms = 0, 0, 0.0
+        done = []
+        try:
+            for source, target in zip([*self.shard_paths, self.db_path], [*shard_targets, path]):
+                partial = target + '.partial'
+                try:
+                    result = snapshot(source, partial)
+                    os.replace(partial, target)
+                finally:
+                    if os.path.exists(partial):
+                        os.remove(partial)
+                done.append(target)
+                pages += result[0]
+                steps += result[1]
+                max_step_ms = max(max_step_ms, result[2])
+        except Exception:
+            # Aadhe backup ke shard files mat chhodo
+            for target in done:
+                os.remove(target)
+            raise
+        seconds = time.perf_counter() - start
+
+        export_path, export_seconds = None, 0.0
+        if export:
+            # Live DB nahi, snapshot se - consistent bhi aur bot par load bhi nahi
+            export_path = os.path.join(self.directory, name + '.files.jsonl.gz')
+            start = time.perf_counter()
+            export_jsonl(path, export_path + '.partial', shard_targets)
+            os.replace(export_path + '.partial', export_path)
+            export_seconds = time.perf_counter() - start
+
+        self._rotate()
+        size = sum(os.path.getsize(target) for target in [path, *shard_targets])
+        return BackupResult(path, export_path, size, pages, steps,
+                            max_step_ms, seconds, export_seconds, shard_targets)
+
+    def _rotate(self):
+        """Delete all but the newest `keep` snapshots (and their exports)"""
+        names = os.listdir(self.directory)
+        snapshots = sorted(name for name in names
+                           if name.startswith(self.prefix) and name.endswith('.db') and '.shard' not in name)
+        for name in snapshots[:-self.keep] if self.keep else []:
+            base = name[:-len('.db')]
+            shards = [other for other in names if other.startswith(base + '.shard') and other.endswith('.db')]
+            for path in [base + '.db', base + '.files.jsonl.gz', *shards]:
+                path = os.path.join(self.directory, path)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def stats(self):
+        return {
+            'last_path': self.last.path if self.last else None,
+            'last_at': self.last_at,
+            'last_seconds': self.last.seconds if self.last else None,
+            'failures': self.failures
+        }
+
+async def main(args):
+    shard_paths = []
+    if args.shards > 1:
+        from sharding import shard_path
+        shard_paths = [shard_path(args.db, i) for i in range(args.shards)]
+    manager = BackupManager(args.db, args.dir, args.keep, interval=0, shard_paths=shard_paths)
+    result = await manager.backup(export=args.export)
+    if result.shard_paths:
+        print(f"Shards: {', '.join(result.shard_paths)}")
+    print(f"Snapshot: {result.path} ({result.size / 2 ** 20:.1f} MB, {result.pages} pages) "
+          f"in {result.seconds:.2f}s, {result.steps} steps, slowest step {result.max_step_ms:.1f} ms")
+    if result.export_path:
+        print(f"Export: {result.export_path} in {result.export_seconds:.2f}s")
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Take an online backup of the bot database')
+    parser.add_argument('--db', default=DATABASE_NAME)
+    parser.add_argument('--dir', default=BACKUP_DIR)
+    parser.add_argument('--keep', type=int, default=BACKUP_KEEP)
+    parser.add_argument('--shards', type=int, default=DB_SHARDS, help='also back up this many shard DBs')
+    parser.add_argument('--export', action='store_true', help='also write files as .jsonl.gz')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,77 @@
+"""
+Online backup benchmark: snapshot + JSONL export of a big database while writes continue.
+
+Backup ke dauraan bot jaisa write load chalta hai (har 10 ms ek upload aur
+download counter flush) aur unka latency backup ke bina wale latency se compare
+hota hai - backup writer ko rokna nahi chahiye.
+
+Usage: python benchmarks/bench_backup.py [rows]   (default: 1000000)
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from backup import BackupManager
+from bench_search import seed
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def write_load(db, rows, stop, latencies):
+    """Steady uploads + download flushes until stop is set"""
+    n = 0
+    while not stop.is_set():
+        n += 1
+        start = time.perf_counter()
+        await db.add_files([{
+            'file_id': f'live_{n}_{start}', 'file_name': f'live_{n}.pdf', 'file_size': 1024,
+            'mime_type': 'application/pdf', 'caption': '', 'uploaded_by': 1, 'file_unique_id': None,
+            'message_id': n, 'file_type': 'document'
+        }])
+        db.increment_download_count(1 + n * 7919 % rows)
+        await db.flush_download_counts()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run(rows):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'backup.db')
+    db = Database(path)
+    seed(path, rows)
+    print(f"{rows} rows, {os.path.getsize(path) / 2 ** 20:.0f} MB")
+
+    # Backup ke bina write latency
+    stop, idle = asyncio.Event(), []
+    task = asyncio.create_task(write_load(db, rows, stop, idle))
+    await asyncio.sleep(3)
+    stop.set()
+    await task
+
+    stop, during = asyncio.Event(), []
+    task = asyncio.create_task(write_load(db, rows, stop, during))
+    manager = BackupManager(path, os.path.join(directory, 'backups'), keep=2, interval=0)
+    result = await manager.backup(export=True)
+    stop.set()
+    await task
+
+    print(f"snapshot: {result.size / 2 ** 20:.0f} MB in {result.seconds:.2f}s, {result.steps} steps "
+          f"of {result.pages // max(result.steps, 1)} pages, slowest step {result.max_step_ms:.1f} ms")
+    print(f"export:   {os.path.getsize(result.export_path) / 2 ** 20:.0f} MB jsonl.gz in {result.export_seconds:.2f}s")
+    print(f"writes without backup: {len(idle)} p50 {percentile(idle, 0.5):.2f} ms p99 {percentile(idle, 0.99):.2f} ms")
+    print(f"writes during backup:  {len(during)} p50 {percentile(during, 0.5):.2f} ms "
+          f"p99 {percentile(during, 0.99):.2f} ms max {max(during):.2f} ms")
+    await db.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000))
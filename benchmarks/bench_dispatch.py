@@ -0,0 +1,80 @@
+"""
+Link-resolution latency during a group upload burst.
+
+Sequential (PTB default, ek update ek time) vs ChatOrderedUpdateProcessor.
+Updates Application ki tarah arrival order mein tasks banakar process hote hain.
+
+Usage: python benchmarks/bench_dispatch.py [group_updates] [link_requests]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import SimpleUpdateProcessor
+from dispatcher import ChatOrderedUpdateProcessor
+
+GROUP_ID = -100123
+
+
+def update(chat_id, chat_type, callback=False):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id, type=chat_type),
+                           callback_query=object() if callback else None)
+
+
+async def run(processor, group_updates, link_requests):
+    rng = random.Random(1)
+    latencies = []
+    group_order = []
+
+    async def group_handler(n):
+        await asyncio.sleep(0.02)  # process_file + reply
+        group_order.append(n)
+
+    async def link_handler(arrived):
+        await asyncio.sleep(0.005)  # cache lookup + send
+        latencies.append(time.perf_counter() - arrived)
+
+    # Burst: pehle group uploads aate hain, beech mein users links kholte hain
+    arrivals = [('group', n) for n in range(group_updates)]
+    for i in range(link_requests):
+        arrivals.insert(rng.randrange(len(arrivals)), ('link', i))
+
+    tasks = []
+    start = time.perf_counter()
+    for kind, n in arrivals:
+        if kind == 'group':
+            upd, coro = update(GROUP_ID, 'supergroup'), group_handler(n)
+        else:
+            upd, coro = update(1000 + n, 'private'), link_handler(time.perf_counter())
+        tasks.append(asyncio.create_task(processor.process_update(upd, coro)))
+        await asyncio.sleep(0.0005)  # updates ~2000/s ki speed se aate hain
+    await asyncio.gather(*tasks)
+    total = time.perf_counter() - start
+
+    assert group_order == sorted(group_order), 'group updates out of order!'
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    return total, p50, p99
+
+
+async def main(group_updates, link_requests):
+    for name, processor in (('sequential', SimpleUpdateProcessor(1)),
+                            ('chat-ordered', ChatOrderedUpdateProcessor())):
+        total, p50, p99 = await run(processor, group_updates, link_requests)
+        line = (f"{name:13} total {total:6.2f}s   link latency p50 {p50:8.1f} ms  p99 {p99:8.1f} ms")
+        if isinstance(processor, ChatOrderedUpdateProcessor):
+            stats = processor.stats()
+            line += f"   max pending {stats['max_pending']}, max wait {stats['max_wait'] * 1000:.1f} ms"
+        print(line)
+
+
+if __name__ == '__main__':
+    group_updates = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    link_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(group_updates, link_requests))
@@ -0,0 +1,336 @@
+"""
+End-to-end load test: StorageBot against a local fake Bot API (no Telegram).
+
+Asli Application, handlers, update processor, sender aur Database chalte hain;
+sirf Bot API benchmarks/fake_bot_api.py se aata hai. Har workload updates inject
+karta hai (getUpdates se), aur bot ke jawab tak ka latency naapta hai.
+
+Workloads:
+  uploads  group mein files (kuch albums) - reply tak ka time
+  links    /start <link>, kuch links viral (zipf jaisa)
+  bundles  /start <bundle link> - 10 files wale bundles, sendMediaGroup se
+  search   /search <word>
+  stats    /stats spam
+  inline   @bot queries, har keystroke ek update
+
+Usage:
+  python benchmarks/bench_e2e.py [--workloads uploads,links,bundles,search,stats,inline] [--count 1000]
+      [--files 20000] [--rate 0] [--api-latency 0.0] [--rate-limits]
+      [--json results.json] [--baseline results.json --max-regression 0.2]
+
+--baseline ke saath: throughput ya p99 max-regression se zyada bigde to exit code 1.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('PORT', '0')  # /health server kisi free port par
+os.chdir(tempfile.mkdtemp())  # main.py apni storage.db yahin banayega
+
+from telegram import Update
+from telegram.ext import Application
+
+import main
+import sender
+import database
+import throttle
+from database import Database
+from fake_bot_api import FakeBotAPI
+
+TOKEN = '123456:FAKE'
+GROUP_ID = -1001234567890
+WORDS = ['report', 'invoice', 'lecture', 'notes', 'physics', 'chemistry', 'holiday', 'photos',
+         'movie', 'trailer', 'song', 'album', 'backup', 'resume', 'budget', 'project', 'slides',
+         'manual', 'ebook', 'novel', 'exam', 'syllabus', 'recipe', 'podcast', 'episode']
+
+# Har thread (reader/writer) sirf apni key badhata hai
+statement_counts = defaultdict(int)
+_connect = database.sqlite3.connect
+
+
+def counting_connect(*args, **kwargs):
+    conn = _connect(*args, **kwargs)
+
+    def trace(sql):
+        statement_counts[threading.get_ident()] += 1
+
+    conn.set_trace_callback(trace)
+    return conn
+
+
+database.sqlite3.connect = counting_connect
+# Har Bot API call ka "HTTP Request" log nahi chahiye
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+
+def command(chat_id, message_id, text):
+    name = text.split(' ', 1)[0]
+    return {'message': {
+        'message_id': message_id,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private', 'first_name': 'User'},
+        'from': {'id': chat_id, 'is_bot': False, 'first_name': 'User'},
+        'text': text,
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(name)}]
+    }}
+
+
+def upload(message_id, user_id, n, media_group_id=None):
+    message = {
+        'message_id': message_id,
+        'date': int(time.time()),
+        'chat': {'id': GROUP_ID, 'type': 'supergroup', 'title': 'Storage'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'Uploader'},
+        'document': {
+            'file_id': f'BQACAgUAAxkBAAE{n:010d}',
+            'file_unique_id': f'AgADbench{n:010d}',
+            'file_name': f'{WORDS[n % len(WORDS)]}_{n}.pdf',
+            'mime_type': 'application/pdf',
+            'file_size': 1024 * (n % 5000 + 1)
+        },
+        'caption': f'{WORDS[n * 7 % len(WORDS)]} upload {n}'
+    }
+    if media_group_id:
+        message['media_group_id'] = media_group_id
+    return {'message': message}
+
+
+def workload_uploads(count, rng, links, offset):
+    """Group upload burst: har 4th uploader 5 files ka album bhejta hai"""
+    items, n = [], 0
+    while n < count:
+        message_id = offset + n
+        user_id = 10 ** 6 + n
+        if n % 20 == 15:
+            size = min(5, count - n)
+            group = f'album{offset + n}'
+            for i in range(size):
+                # Album ka ek hi reply aata hai, pehle message par
+                expect = (GROUP_ID, message_id) if i == 0 else None
+                items.append((upload(message_id + i, user_id, offset + n + i, group), expect))
+            n += size
+        else:
+            items.append((upload(message_id, user_id, offset + n), (GROUP_ID, message_id)))
+            n += 1
+    return items
+
+
+def workload_links(count, rng, links, offset):
+    """Viral links: kuch links baaki se kahin zyada khulte hain"""
+    weights = [1 / (rank + 1) for rank in range(len(links))]
+    chosen = rng.choices(links, weights=weights, k=count)
+    return [(command(offset + i, 1, f'/start {link}'), (offset + i, None)) for i, link in enumerate(chosen)]
+
+
+def workload_bundles(count, rng, bundles, offset):
+    """Bundle links (har bundle 10 files ka), links jaisa hi zipf"""
+    return workload_links(count, rng, bundles, offset)
+
+
+def workload_search(count, rng, links, offset):
+    """Search storm: ek-do words ki queries"""
+    items = []
+    for i in range(count):
+        words = rng.sample(WORDS, rng.choice((1, 1, 2)))
+        items.append((command(offset + i, 1, '/search ' + ' '.join(words)), (offset + i, None)))
+    return items
+
+
+def workload_stats(count, rng, links, offset):
+    """/stats spam"""
+    return [(command(offset + i, 1, '/stats'), (offset + i, None)) for i in range(count)]
+
+
+def workload_inline(count, rng, links, offset):
+    """Inline mode: users file ka naam type karte hain, har akshar ek query"""
+    items = []
+    while len(items) < count:
+        user = offset + len(items)
+        text = ' '.join(rng.sample(WORDS, 2))
+        for i in range(1, len(text) + 1):
+            query_id = str(offset + len(items))
+            items.append(({'inline_query': {
+                'id': query_id,
+                'from': {'id': user, 'is_bot': False, 'first_name': 'User'},
+                'query': text[:i],
+                'offset': ''
+            }}, ('inline', query_id)))
+    return items[:count]
+
+
+WORKLOADS = {
+    'uploads': workload_uploads,
+    'links': workload_links,
+    'bundles': workload_bundles,
+    'search': workload_search,
+    'stats': workload_stats,
+    'inline': workload_inline
+}
+
+
+async def preload(db, files):
+    """Database mein pehle se files daalo (links/search ke liye)"""
+    links = []
+    for start in range(0, files, 1000):
+        results = await db.add_files([{
+            'file_id': f'preload_{n}', 'file_name': f'{WORDS[n % len(WORDS)]}_{WORDS[n // 7 % len(WORDS)]}_{n}.pdf',
+            'file_size': 4096, 'mime_type': 'application/pdf', 'caption': '', 'uploaded_by': 1 + n % 300,
+            'file_unique_id': f'preload_u_{n}', 'message_id': n, 'file_type': 'document'
+        } for n in range(start, min(files, start + 1000))])
+        links.extend(result.custom_link for result in results)
+    # Series jaise bundles: har 10 lagaataar files ek link
+    bundles = [await db.create_bundle(links[start:start + 10], 1) for start in range(0, min(files, 2000), 10)]
+    return links, bundles
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run_workload(name, api, db, items, rate, timeout):
+    api.reset_stats()
+    queries_before = db.query_count
+    statements_before = sum(statement_counts.values())
+    expected = sum(1 for _, expect in items if expect is not None)
+
+    start = time.perf_counter()
+    for i, (update, expect) in enumerate(items):
+        api.inject(update, expect)
+        if rate:
+            delay = start + (i + 1) / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+    deadline = time.monotonic() + timeout
+    while api.outstanding and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    latencies = api.latencies
+    return {
+        'workload': name,
+        'updates': len(items),
+        'answered': len(latencies),
+        'expected': expected,
+        'elapsed': elapsed,
+        'throughput': len(items) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'db_calls': db.query_count - queries_before,
+        'db_statements': sum(statement_counts.values()) - statements_before,
+        'api_calls': dict(api.calls)
+    }
+
+
+def check_regressions(results, baseline, max_regression):
+    """Baseline se compare karo; bigde hue workloads ki list"""
+    failures = []
+    previous = {result['workload']: result for result in baseline}
+    for result in results:
+        old = previous.get(result['workload'])
+        if not old:
+            continue
+        if result['throughput'] < old['throughput'] * (1 - max_regression):
+            failures.append(f"{result['workload']}: throughput {old['throughput']:.0f} -> {result['throughput']:.0f}/s")
+        if result['p99_ms'] > old['p99_ms'] * (1 + max_regression):
+            failures.append(f"{result['workload']}: p99 {old['p99_ms']:.1f} -> {result['p99_ms']:.1f} ms")
+    return failures
+
+
+async def run(args):
+    if not args.rate_limits:
+        # Fake API kuch limit nahi karta; bot ki apni capacity naapo
+        sender.GLOBAL_SEND_RATE = sender.PRIVATE_CHAT_SEND_RATE = sender.PRIVATE_CHAT_BURST = 1e6
+        sender.GROUP_CHAT_SEND_RATE = sender.GROUP_CHAT_BURST = 1e6
+        # Viral links par per-link download limit bhi lagti
+        throttle.DOWNLOAD_USER_RATE = throttle.DOWNLOAD_USER_BURST = 1e6
+        throttle.DOWNLOAD_LINK_RATE = throttle.DOWNLOAD_LINK_BURST = 1e6
+
+    api = FakeBotAPI(api_latency=args.api_latency)
+    await api.start()
+
+    db = Database(os.path.join(tempfile.mkdtemp(), 'e2e.db'))
+    main.db = db
+    links, bundles = await preload(db, args.files)
+
+    bot = main.StorageBot()
+    bot.group_id = GROUP_ID
+    if not args.rate_limits:
+        bot.sender.global_bucket = sender.TokenBucket(1e6, 1e6)
+    builder = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(api.base_url)
+        .base_file_url(api.base_url)
+    )
+    application = bot.build_application(builder)
+
+    await application.initialize()
+    await bot.post_init(application)
+    await application.updater.start_polling(poll_interval=0, timeout=10, allowed_updates=Update.ALL_TYPES)
+    await application.start()
+
+    rng = random.Random(1)
+    results = []
+    offset = 10 ** 7
+    try:
+        for name in args.workloads.split(','):
+            items = WORKLOADS[name](args.count, rng, bundles if name == 'bundles' else links, offset)
+            offset += 10 ** 6
+            results.append(await run_workload(name, api, db, items, args.rate, args.timeout))
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await bot.post_stop(application)
+        await application.shutdown()
+        await bot.post_shutdown(application)
+        await api.stop()
+
+    print(f"{'workload':9} {'updates':>7} {'answered':>9} {'upd/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'db calls':>9} {'stmts':>7}  api calls")
+    for r in results:
+        api_calls = ', '.join(f'{method} {count}' for method, count in sorted(r['api_calls'].items())
+                              if method != 'getUpdates')
+        print(f"{r['workload']:9} {r['updates']:7} {r['answered']:4}/{r['expected']:<4} {r['throughput']:8.0f} "
+              f"{r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['db_calls']:9} "
+              f"{r['db_statements']:7}  {api_calls}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(results, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline end-to-end load test')
+    parser.add_argument('--workloads', default='uploads,links,bundles,search,stats,inline')
+    parser.add_argument('--count', type=int, default=1000, help='updates per workload')
+    parser.add_argument('--files', type=int, default=20000, help='files preloaded into the database')
+    parser.add_argument('--rate', type=float, default=0, help='updates/sec (0 = sab ek saath)')
+    parser.add_argument('--api-latency', type=float, default=0.0, help='fake Bot API delay per call (s)')
+    parser.add_argument('--rate-limits', action='store_true', help='keep Telegram send limits')
+    parser.add_argument('--timeout', type=float, default=60, help='max wait per workload (s)')
+    parser.add_argument('--json', help='write results here')
+    parser.add_argument('--baseline', help='fail if worse than these results')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    sys.exit(asyncio.run(run(parser.parse_args())))
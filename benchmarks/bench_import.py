@@ -0,0 +1,90 @@
+"""
+Bulk import benchmark: synthetic Telegram Desktop export -> importer.py.
+
+N messages ka result.json banata hai (photos, documents, videos, audio, stickers
+aur text messages mix), use import karta hai, aur rows/sec aur peak Python memory
+dikhata hai - memory export ke size ke saath nahi badhni chahiye. Phir dobara
+chalata hai: checkpoint ki wajah se sab messages skip hone chahiye.
+
+Usage: python benchmarks/bench_import.py [--messages 200000] [--batch 2000]
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from importer import import_export
+
+WORDS = ['lecture', 'notes', 'physics', 'chemistry', 'movie', 'song', 'ebook', 'exam', 'slides']
+
+
+def message(n):
+    message = {
+        'id': n,
+        'type': 'message',
+        'date': '2023-01-01T00:00:00',
+        'date_unixtime': str(1672531200 + n),
+        'from': 'Archive',
+        'from_id': 'channel1234567890',
+        'text': [f'{WORDS[n % len(WORDS)]} part {n} ', {'type': 'hashtag', 'text': '#archive'}]
+    }
+    kind = n % 10
+    name = f'{WORDS[n % len(WORDS)]}_{WORDS[n // 3 % len(WORDS)]}_{n}'
+    if kind < 3:
+        message.update(photo='(File not included. Change data exporting settings to download.)',
+                       photo_file_size=200000 + n % 1000, width=1280, height=720)
+    elif kind < 6:
+        message.update(file=f'files/{name}.pdf', file_name=f'{name}.pdf', file_size=1024 * (n % 5000 + 1),
+                       mime_type='application/pdf')
+    elif kind == 6:
+        message.update(file=f'video_files/{name}.mp4', file_size=10 ** 7, media_type='video_file',
+                       mime_type='video/mp4', duration_seconds=60)
+    elif kind == 7:
+        message.update(file=f'files/{name}.mp3', file_name=f'{name}.mp3', file_size=5 * 10 ** 6,
+                       media_type='audio_file', mime_type='audio/mpeg')
+    elif kind == 8:
+        message.update(file='stickers/sticker.webp', media_type='sticker', sticker_emoji='👍')
+    return message
+
+
+def write_export(path, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n "name": "Archive",\n "type": "public_channel",\n "id": 1234567890,\n "messages": [\n')
+        for n in range(1, count + 1):
+            f.write('  ' + json.dumps(message(n), ensure_ascii=False, indent=1).replace('\n', '\n  '))
+            f.write(',\n' if n < count else '\n')
+        f.write(' ]\n}\n')
+
+
+async def run(args):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'result.json')
+    write_export(path, args.messages)
+    print(f"export: {args.messages} messages, {os.path.getsize(path) / 1e6:.1f} MB")
+
+    db = Database(os.path.join(directory, 'import.db'))
+    try:
+        tracemalloc.start()
+        first = await import_export(path, db, batch_size=args.batch)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"first run: {first['added'] / first['elapsed']:,.0f} rows/s, "
+              f"peak Python memory {peak / 1e6:.1f} MB")
+
+        second = await import_export(path, db, batch_size=args.batch)
+        print(f"second run (checkpoint): {second['added']} added in {second['elapsed']:.2f}s")
+    finally:
+        await db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import benchmark')
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,68 @@
+"""
+Inline query benchmark: har keystroke par in-memory PrefixIndex vs FTS5 /search.
+
+User "title123 season" type karta hai to har akshar par ek inline query aati hai.
+Startup par index banane ka time bhi naapta hai.
+
+Usage: python benchmarks/bench_inline.py [rows ...]   (default: 100000 1000000)
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from bench_search import seed
+
+TYPED = ['title123 season', 'hindi title500', 'title4242 episode', 'movie', 'fi']
+
+
+def keystrokes(text):
+    return [text[:i] for i in range(1, len(text) + 1) if text[:i].strip()]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(rows):
+    path = os.path.join(tempfile.mkdtemp(), 'inline.db')
+    db = Database(path)
+    seed(path, rows)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    await db.load_inline_index()
+    load = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    index_ms, fts_ms = [], []
+    for text in TYPED:
+        for query in keystrokes(text):
+            db.inline_index.search(query)  # pehli baar vocab sort (upload ke baad hota hai)
+            start = time.perf_counter()
+            db.inline_index.search(query, 20)
+            index_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            await db.search_files(query, 20)
+            fts_ms.append((time.perf_counter() - start) * 1000)
+
+    print(f"{rows:>9} rows: index load {load:6.2f}s, ~{memory / 2 ** 20:5.0f} MB   "
+          f"keystrokes {len(index_ms)}: index p50 {percentile(index_ms, 0.5):6.3f} ms "
+          f"p99 {percentile(index_ms, 0.99):6.3f} ms   "
+          f"FTS5 p50 {percentile(fts_ms, 0.5):6.2f} ms p99 {percentile(fts_ms, 0.99):6.2f} ms")
+    await db.close()
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+    for rows in sizes:
+        asyncio.run(run(rows))
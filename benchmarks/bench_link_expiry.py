@@ -0,0 +1,106 @@
+"""
+Expiring links benchmark: lookup aur expiry sweep ka cost, links table ke size ke saath.
+
+N active temporary links (agle 30 din mein expire hone wale) ke upar K links agle
+~2 seconds mein expire hote hain. Sweeper kitni baar jaaga, har sweep kitna
+chala, aur expired/valid link lookups kitne tez hain - sab N badhne par flat
+rehne chahiye. Tulna ke liye bina index ka full scan bhi naapa hai.
+
+Usage: python benchmarks/bench_link_expiry.py [N ...]   (default: 100000 1000000)
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import asyncio
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+EXPIRING = 1000
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def seed_links(path, count):
+    conn = sqlite3.connect(path)
+    now = datetime.datetime.now()
+    rng = random.Random(7)
+    conn.executemany('''
+        INSERT INTO links (link_id, file_id, created_at, expires_at, created_by, is_active)
+        VALUES (?, 'bench_file', ?, ?, 1, 1)
+    ''', ((f't-seed{i:010d}', now, now + datetime.timedelta(seconds=rng.uniform(3600, 30 * 86400)))
+          for i in range(count)))
+    conn.commit()
+    conn.close()
+
+
+async def run(count):
+    path = os.path.join(tempfile.mkdtemp(), 'links.db')
+    db = Database(path)
+    results = await db.add_files([{
+        'file_id': 'bench_file', 'file_name': 'bench.pdf', 'file_size': 1, 'mime_type': 'application/pdf',
+        'caption': '', 'uploaded_by': 1, 'file_unique_id': None, 'message_id': 1, 'file_type': 'document'
+    }])
+    seed_links(path, count)
+
+    sweeps = []
+    expire_links = db.expire_links
+
+    async def timed_expire():
+        start = time.perf_counter()
+        expired = await expire_links()
+        sweeps.append((time.perf_counter() - start, expired))
+        return expired
+
+    db.expire_links = timed_expire
+    start = time.perf_counter()
+    await db.start()
+    await db._load_expiries()
+    load = time.perf_counter() - start
+
+    # K links agle 2 seconds mein expire
+    expiring = []
+    for i in range(EXPIRING):
+        link, _ = await db.create_temp_link(results[0].custom_link, 1, 0.5 + 1.5 * i / EXPIRING)
+        expiring.append(link)
+    valid, _ = await db.create_temp_link(results[0].custom_link, 1, 3600)
+    await asyncio.sleep(2.5)
+    expired = sum(n for _, n in sweeps)
+
+    lookups = {'valid': [], 'expired': []}
+    for _ in range(200):
+        for name, link in (('valid', valid), ('expired', random.choice(expiring))):
+            db.temp_link_cache.invalidate(link)  # har baar SQLite tak
+            start = time.perf_counter()
+            await db.get_file_by_custom_link(link)
+            lookups[name].append((time.perf_counter() - start) * 1000)
+
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    conn.execute('''
+        SELECT link_id FROM links NOT INDEXED WHERE is_active = 1 AND expires_at <= ?
+    ''', (datetime.datetime.now(),)).fetchall()
+    scan = (time.perf_counter() - start) * 1000
+    conn.close()
+
+    times = [seconds * 1000 for seconds, _ in sweeps]
+    print(f"{count:>8} links: heap {len(db._expiries)} (load {load * 1000:.0f} ms), "
+          f"{expired}/{EXPIRING} expired in {len(sweeps)} sweeps, "
+          f"sweep p50 {percentile(times, 0.5):.2f} ms max {max(times):.2f} ms, "
+          f"lookup valid p99 {percentile(lookups['valid'], 0.99):.2f} ms "
+          f"expired p99 {percentile(lookups['expired'], 0.99):.2f} ms, full scan {scan:.0f} ms")
+    await db.close()
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+    for count in sizes:
+        asyncio.run(run(count))
@@ -0,0 +1,92 @@
+"""
+Concurrent /start <link> resolution benchmark.
+
+Before: purane tarike se sync sqlite3 calls (shared cursor) seedha event loop par.
+After:  async Database (reader pool + single writer, WAL).
+
+Usage: python benchmarks/bench_link_resolution.py [rows] [requests]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import sqlite3
+import tempfile
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+def seed(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    now = datetime.datetime.now()
+    conn.executemany('''
+        INSERT INTO files (file_id, file_name, file_size, mime_type, caption,
+                           uploaded_by, uploaded_at, file_type, file_unique_id,
+                           message_id, custom_link)
+        VALUES (?, ?, ?, 'application/pdf', '', ?, ?, 'document', ?, ?, ?)
+    ''', ((f'fid{i}', f'file_{i}.pdf', 1024 * i, i % 500, now, f'u{i}', i, f'link{i}')
+          for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+async def measure(resolve, links):
+    """Run all resolutions at once; return (total seconds, worst loop stall)"""
+    worst_stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst_stall
+        while not done:
+            t = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst_stall = max(worst_stall, time.perf_counter() - t - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(resolve(link) for link in links))
+    total = time.perf_counter() - start
+    done = True
+    await tick
+    return total, worst_stall
+
+
+async def main(rows, requests):
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'bench.db')
+    db = Database(path)
+    seed(path, rows)
+    links = [f'link{random.randrange(rows)}' for _ in range(requests)]
+
+    # Before: shared connection + cursor, sync calls inside the handler
+    conn = sqlite3.connect(path, check_same_thread=False)
+    cursor = conn.cursor()
+
+    async def resolve_before(link):
+        cursor.execute('SELECT * FROM files WHERE custom_link = ?', (link,))
+        row = cursor.fetchone()
+        cursor.execute('UPDATE files SET download_count = download_count + 1 WHERE file_id = ?', (row[1],))
+        conn.commit()
+
+    async def resolve_after(link):
+        row = await db.get_file_by_custom_link(link)
+        db.increment_download_count(row[0])
+
+    for name, resolve in (('before (sync)', resolve_before), ('after (async)', resolve_after)):
+        total, stall = await measure(resolve, links)
+        print(f"{name:15} {requests} links: {total * 1000:8.1f} ms total, "
+              f"{requests / total:8.0f} req/s, worst loop stall {stall * 1000:6.1f} ms")
+
+    conn.close()
+    await db.close()
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    asyncio.run(main(rows, requests))
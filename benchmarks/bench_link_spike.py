@@ -0,0 +1,90 @@
+"""
+Viral link load test: N simultaneous /start <link> requests for one fresh link.
+
+Counts SQLite queries and outbound Bot API calls with and without
+single-flight lookups + per-chat chat-action dedup.
+
+Usage: python benchmarks/bench_link_spike.py [requests] [distinct_chats]
+"""
+import os
+import sys
+import random
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())  # main.py apni storage.db yahin banayega
+
+import main
+import sender
+from database import Database
+
+# Yahan sirf calls gin rahe hain, rate limits se fark nahi padna chahiye
+sender.GLOBAL_SEND_RATE = sender.PRIVATE_CHAT_SEND_RATE = sender.PRIVATE_CHAT_BURST = 1e6
+
+
+class FakeBot:
+    def __init__(self):
+        self.api_calls = 0
+        self.username = 'bench_bot'
+
+    async def call(self, *args, **kwargs):
+        self.api_calls += 1
+        await asyncio.sleep(0.002)  # network round trip
+
+    send_chat_action = call
+
+
+def fake_update(bot, chat_id):
+    message = SimpleNamespace(chat_id=chat_id, reply_text=bot.call, reply_photo=bot.call, reply_video=bot.call,
+                              reply_audio=bot.call, reply_document=bot.call)
+    return SimpleNamespace(effective_message=message, message=message,
+                           effective_chat=SimpleNamespace(id=chat_id), effective_user=SimpleNamespace(id=chat_id),
+                           callback_query=None)
+
+
+async def baseline(db, bot, link, chats):
+    """Purana flow: har request apni query + apna chat action"""
+    async def one(chat_id):
+        row = await db._read(db._get_file_by_custom_link, link)
+        db.increment_download_count(row.id)
+        await bot.send_chat_action(chat_id=chat_id, action='upload_document')
+        await bot.call(document=row.file_id)
+    await asyncio.gather(*(one(chat_id) for chat_id in chats))
+
+
+async def coalesced(db, bot, link, chats):
+    storage_bot = main.StorageBot()
+    storage_bot.sender.start()
+    context = SimpleNamespace(bot=bot)
+    await asyncio.gather(*(storage_bot.send_file_by_link(fake_update(bot, chat_id), context, link)
+                           for chat_id in chats))
+    await storage_bot.sender.stop()
+
+
+async def run(requests, distinct_chats):
+    db = Database(os.path.join(tempfile.mkdtemp(), 'spike.db'))
+    main.db = db
+    await db.add_file('viral_fid', 'viral.mp4', 1024, 'video/mp4', '', 1, 'viral_u', 1, 'video')
+    link = await db.generate_custom_link('viral_fid')
+
+    # Ek user link par kai baar click karta hai
+    chats = [1 + random.randrange(distinct_chats) for _ in range(requests)]
+
+    for name, scenario in (('baseline', baseline), ('coalesced', coalesced)):
+        db.link_cache = type(db.link_cache)()  # naya link = cold cache
+        bot = FakeBot()
+        queries_before = db.query_count
+        await scenario(db, bot, link, chats)
+        print(f"{name:10} {requests} requests: {db.query_count - queries_before:5} DB queries, "
+              f"{bot.api_calls:5} Bot API calls")
+
+    await db.close()
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    distinct_chats = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    asyncio.run(run(requests, distinct_chats))
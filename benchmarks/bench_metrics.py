@@ -0,0 +1,143 @@
+"""
+Metrics overhead: hot paths with instrumentation on vs off.
+
+"off" = handler ka undecorated function + DB/sender metrics no-op. Fake Bot API
+bina network delay ke jawab deta hai, taaki overhead sabse bura dikhe (asli
+network ke saath ye aur bhi chhota hoga).
+
+Usage: python benchmarks/bench_metrics.py [requests] [links]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())  # main.py apni storage.db yahin banayega
+
+import main
+import sender
+import database
+import metrics
+from database import Database
+
+# Rate limits se fark nahi padna chahiye
+sender.GLOBAL_SEND_RATE = sender.PRIVATE_CHAT_SEND_RATE = sender.PRIVATE_CHAT_BURST = 1e6
+TRIALS = 21
+
+
+class NullMetric:
+    def labels(self, *labelvalues):
+        return self
+
+    def observe(self, *args):
+        pass
+
+    def inc(self, *args, **kwargs):
+        pass
+
+
+class FakeBot:
+    async def call(self, *args, **kwargs):
+        pass
+
+    send_chat_action = call
+
+
+def fake_update(bot, chat_id):
+    message = SimpleNamespace(chat_id=chat_id, reply_text=bot.call, reply_photo=bot.call, reply_video=bot.call,
+                              reply_audio=bot.call, reply_document=bot.call)
+    return SimpleNamespace(effective_message=message, message=message,
+                           effective_chat=SimpleNamespace(id=chat_id), effective_user=SimpleNamespace(id=chat_id),
+                           callback_query=None)
+
+
+def set_instrumented(db, enabled):
+    real = (metrics.DB_QUERY_SECONDS, metrics.API_CALLS)
+    database.DB_QUERY_SECONDS, sender.API_CALLS = real if enabled else (NullMetric(), NullMetric())
+    db._query_timers = {}
+
+
+async def run_links(storage_bot, handler, requests):
+    bot = FakeBot()
+    context = SimpleNamespace(bot=bot)
+    start = time.perf_counter()
+    for i in range(0, len(requests), 100):
+        await asyncio.gather(*(handler(storage_bot, fake_update(bot, chat_id), context, link)
+                               for chat_id, link in requests[i:i + 100]))
+    return time.perf_counter() - start
+
+
+async def run_reads(db, file_ids):
+    start = time.perf_counter()
+    for i in range(0, len(file_ids), 50):
+        await asyncio.gather(*(db.get_file_by_file_id(fid) for fid in file_ids[i:i + 50]))
+    return time.perf_counter() - start
+
+
+async def main_(count, link_count):
+    db = Database(os.path.join(tempfile.mkdtemp(), 'metrics.db'))
+    main.db = db
+    await db.start()
+    results = await db.add_files([{
+        'file_id': f'fid_{n}', 'file_name': f'file_{n}.pdf', 'file_size': 1024,
+        'mime_type': 'application/pdf', 'caption': '', 'uploaded_by': 1,
+        'file_unique_id': f'u_{n}', 'message_id': n, 'file_type': 'document'
+    } for n in range(link_count)])
+    links = [result.custom_link for result in results]
+
+    rng = random.Random(1)
+    requests = [(1 + i, rng.choice(links)) for i in range(count)]
+    file_ids = [f'fid_{rng.randrange(link_count)}' for _ in range(count)]
+
+    storage_bot = main.StorageBot()
+    storage_bot.sender.start()
+    instrumented = type(storage_bot).send_file_by_link
+    plain = instrumented.__wrapped__
+
+    results = {('links', True): [], ('links', False): [], ('reads', True): [], ('reads', False): []}
+    for trial in range(TRIALS):
+        # Order badalte raho taaki warm-up / thread scheduling ek mode ko favour na kare
+        for enabled in ((True, False) if trial % 2 else (False, True)):
+            set_instrumented(db, enabled)
+            db.link_cache = type(db.link_cache)()  # har trial same hits/misses
+            storage_bot.chat_actions = type(storage_bot.chat_actions)(main.CHAT_ACTION_WINDOW)
+            results['links', enabled].append(
+                await run_links(storage_bot, instrumented if enabled else plain, requests))
+            results['reads', enabled].append(await run_reads(db, file_ids))
+    set_instrumented(db, True)
+
+    for name, label in (('links', 'send_file_by_link'), ('reads', 'get_file_by_file_id')):
+        on, off = results[name, True], results[name, False]
+        # Ek hi trial ke on/off ka ratio - machine ka noise dono par padta hai
+        ratios = sorted(a / b for a, b in zip(on, off))
+        print(f"{label:20} {count} calls: off {min(off) * 1e6 / count:6.1f} us/call, "
+              f"on {min(on) * 1e6 / count:6.1f} us/call, median overhead {ratios[len(ratios) // 2] - 1:+.1%}")
+
+    # End-to-end numbers thread scheduling se noisy hote hain; har DB call par jo
+    # extra kaam hota hai (_run ka timing) use alag se bhi naapo
+    func = db._get_file_by_file_id
+    timers = {func.__name__: metrics.DB_QUERY_SECONDS.labels('get_file_by_file_id')}
+    start = time.perf_counter()
+    for _ in range(100000):
+        began = time.perf_counter()
+        timers.get(func.__name__).observe(time.perf_counter() - began)
+    per_call = (time.perf_counter() - start) / 100000
+    off = min(results['reads', False]) / count
+    print(f"timing cost per DB call: {per_call * 1e9:.0f} ns = {per_call / off:.2%} of a cheap read")
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render(): {(time.perf_counter() - start) * 1000:.2f} ms for {len(text.splitlines())} lines")
+
+    await storage_bot.sender.stop()
+    await db.close()
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    link_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    asyncio.run(main_(count, link_count))
@@ -0,0 +1,80 @@
+"""
+/search benchmark: purana LIKE '%query%' scan vs FTS5 index.
+
+Usage: python benchmarks/bench_search.py [rows ...]   (default: 10000 100000 1000000)
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import sqlite3
+import tempfile
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+# Chhota common vocabulary + bada "rare" vocabulary (titles, names, codes)
+COMMON = 'season episode movie hindi english dubbed part final official'.split()
+RARE = [f'title{i}' for i in range(20000)]
+QUERIES = ['title123', 'season title77', 'title1999', 'title4242 epi', 'hindi title500']
+
+def seed(path, rows):
+    conn = sqlite3.connect(path)
+    now = datetime.datetime.now()
+    rng = random.Random(42)
+
+    def gen():
+        for i in range(rows):
+            name = '_'.join(rng.choices(RARE, k=2) + rng.choices(COMMON, k=1)) + f'_{i}.mp4'
+            caption = ' '.join(rng.choices(RARE, k=2) + rng.choices(COMMON, k=3))
+            yield (f'fid{i}', name, 1024, caption, i % 500, now, f'u{i}', i, f'link{i}')
+
+    conn.executemany('''
+        INSERT INTO files (file_id, file_name, file_size, caption, uploaded_by,
+                           uploaded_at, file_unique_id, message_id, custom_link)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', gen())
+    conn.commit()
+    conn.close()
+
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def run(rows):
+    path = os.path.join(tempfile.mkdtemp(), 'search.db')
+    db = Database(path)
+    seed(path, rows)
+    conn = sqlite3.connect(path)
+
+    like_ms = fts_ms = 0.0
+    for query in QUERIES:
+        like_ms += timed(lambda: conn.execute('''
+            SELECT file_id, file_name, file_size, file_type FROM files
+            WHERE file_name LIKE ? ORDER BY uploaded_at DESC LIMIT 20
+        ''', (f'%{query}%',)).fetchall())
+
+        start = time.perf_counter()
+        for _ in range(5):
+            await db.search_files(query)
+        fts_ms += (time.perf_counter() - start) * 1000 / 5
+
+    n = len(QUERIES)
+    print(f"{rows:>9} rows: LIKE {like_ms / n:8.2f} ms/query   FTS5 {fts_ms / n:8.2f} ms/query")
+    conn.close()
+    await db.close()
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+    for rows in sizes:
+        asyncio.run(run(rows))
@@ -0,0 +1,72 @@
+"""
+Sharded storage benchmark: write throughput vs shard count.
+
+N files C concurrent uploaders se add_files() mein - batches (import jaisa) aur
+ek-ek file (bot uploads jaisa). Har shard ka apna writer thread hai, to zyada
+shards = zyada writes ek saath. Saath mein link lookup (ek shard) aur search
+(saare shards, merge) ka latency.
+
+Usage: python benchmarks/bench_shards.py [files] [concurrency]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+SHARD_COUNTS = (1, 2, 4, 8)
+
+
+def entry(i):
+    return {
+        'file_id': f'fid{i}', 'file_name': f'lecture notes part {i}.pdf', 'file_size': 1024,
+        'mime_type': 'application/pdf', 'caption': 'physics', 'uploaded_by': 1 + i % 100,
+        'file_unique_id': f'u{i}', 'message_id': i, 'file_type': 'document'
+    }
+
+
+async def ingest(db, files, concurrency, batch):
+    queue = list(range(0, files, batch))
+    links = []
+
+    async def uploader():
+        while queue:
+            start = queue.pop()
+            results = await db.add_files([entry(i) for i in range(start, min(files, start + batch))])
+            links.extend(result.custom_link for result in results)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(uploader() for _ in range(concurrency)))
+    return files / (time.perf_counter() - start), links
+
+
+async def run(files, concurrency):
+    for shards in SHARD_COUNTS:
+        row = []
+        for batch in (50, 1):
+            db = Database(os.path.join(tempfile.mkdtemp(), 'storage.db'), shards=shards)
+            rate, links = await ingest(db, files if batch > 1 else files // 10, concurrency, batch)
+            row.append(f"batch {batch:2}: {rate:8.0f} files/s")
+            if batch > 1:
+                sample = random.Random(7).sample(links, 1000)
+                start = time.perf_counter()
+                for link in sample:
+                    await db._load_link(link)  # cache ke bina, seedha shard tak
+                lookup = (time.perf_counter() - start) / len(sample) * 1e6
+                start = time.perf_counter()
+                for _ in range(100):
+                    await db.search_files('notes part 4')
+                search = (time.perf_counter() - start) / 100 * 1000
+            await db.close()
+        print(f"{shards} shard(s): {', '.join(row)}, lookup {lookup:.0f} us, search {search:.2f} ms")
+
+
+if __name__ == '__main__':
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    asyncio.run(run(files, concurrency))
@@ -0,0 +1,136 @@
+"""
+Startup benchmark: bot restart se pehle update ke jawab tak kitna time.
+
+1. Cache warm-up (sirf database.py): N files wale DB par inline index + link
+   cache - cold (files table se banana) vs warm (close() par likhi snapshot se).
+2. Time to first update: bot ek alag process mein start hota hai (asli imports,
+   migrations, post_init) aur fake Bot API par pehle se rakhe /start <link> ka
+   jawab deta hai. Cold run ke baad SIGTERM (graceful stop snapshot likhta hai),
+   phir warm run.
+
+Usage: python benchmarks/bench_startup.py [files]
+"""
+import os
+import sys
+import time
+import signal
+import asyncio
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+
+TOKEN = '123456:FAKE'
+CHAT_ID = 5000
+FIRST_REPLY_TIMEOUT = 60
+
+
+async def seed(path, files):
+    db = Database(path)
+    links = []
+    for offset in range(0, files, 500):
+        results = await db.add_files([{
+            'file_id': f'fid{i}', 'file_name': f'lecture notes part {i}.pdf', 'file_size': 1024,
+            'mime_type': 'application/pdf', 'caption': '', 'uploaded_by': 1 + i % 100,
+            'file_unique_id': f'u{i}', 'message_id': i, 'file_type': 'document'
+        } for i in range(offset, min(files, offset + 500))])
+        links += [result.custom_link for result in results]
+    await db.close()
+    return links
+
+
+async def cache_warmup(path, links):
+    warm_cache = path + '.warm'
+    for name in ('cold', 'warm'):
+        start = time.perf_counter()
+        db = Database(path, lazy=True, warm_cache=warm_cache)
+        await db.start()
+        await asyncio.gather(*db._background)
+        loaded = time.perf_counter() - start
+        for link in links[:2000]:
+            await db.get_file_by_custom_link(link)
+        print(f"{name}: caches ready in {loaded * 1000:.0f} ms ({len(db.inline_index)} files indexed, "
+              f"warm cache used: {db.warm_start}), link cache hit rate {db.link_cache.stats()['hit_rate']:.0%}")
+        await db.close()
+    os.remove(warm_cache)
+
+
+async def first_update(directory, link):
+    """Spawn the bot twice (cold, then warm) and time its first reply"""
+    from fake_bot_api import FakeBotAPI
+
+    env = dict(os.environ, PORT='0', WARM_CACHE_FILE='warm_cache.pickle', WEBHOOK_URL='')
+    for name in ('cold', 'warm'):
+        api = FakeBotAPI()
+        await api.start()
+        api.inject({'message': {
+            'message_id': 1, 'date': int(time.time()), 'text': f'/start {link}',
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+            'chat': {'id': CHAT_ID, 'type': 'private', 'first_name': 'User'},
+            'from': {'id': CHAT_ID, 'is_bot': False, 'first_name': 'User'}
+        }}, expect=(CHAT_ID, None))  # private chat mein reply_to_message_id set nahi hota
+
+        start = time.perf_counter()
+        child = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), '--child', api.base_url,
+            cwd=directory, env=env
+        )
+        while api.outstanding and time.perf_counter() - start < FIRST_REPLY_TIMEOUT:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        child.send_signal(signal.SIGTERM)
+        await child.wait()
+        await api.stop()
+        if api.outstanding:
+            raise SystemExit(f"{name}: no reply within {FIRST_REPLY_TIMEOUT}s")
+        print(f"{name}: first reply {elapsed * 1000:.0f} ms after process spawn")
+
+
+async def child(base_url):
+    import main
+    from telegram.ext import Application
+
+    imported = time.monotonic()
+    bot = main.StorageBot()
+    application = bot.build_application(
+        Application.builder().token(TOKEN).base_url(base_url).base_file_url(base_url)
+    )
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+
+    await application.initialize()
+    await bot.post_init(application)
+    await application.updater.start_polling(poll_interval=0, timeout=1)
+    await application.start()
+    print(f"  import main {(imported - main.STARTED_AT) * 1000:.0f} ms, "
+          f"ready {(bot.ready_at - main.STARTED_AT) * 1000:.0f} ms", flush=True)
+    await stop.wait()
+    await application.updater.stop()
+    await application.stop()
+    await bot.post_stop(application)
+    await application.shutdown()
+    await bot.post_shutdown(application)
+
+
+async def run(files):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'storage.db')  # main.py isi naam ki DB kholta hai
+    links = await seed(path, files)
+    print(f"{files} files")
+    await cache_warmup(path, links)
+    try:
+        import telegram  # noqa: F401
+    except ImportError:
+        print("python-telegram-bot installed nahi - time-to-first-update skip")
+        return
+    await first_update(directory, links[0])
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        asyncio.run(child(sys.argv[2]))
+    else:
+        asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
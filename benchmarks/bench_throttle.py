@@ -0,0 +1,54 @@
+"""
+Download throttle benchmark: check() ka cost, memory, aur ek script ka hammering.
+
+1. N alag users ek-ek download (normal traffic): check() latency aur kitni keys
+   memory mein bachi (idle buckets evict hote hain).
+2. Ek script 1000 baar /start maarta hai: kitne allowed, kitne rejected.
+3. Wahi script 100-file bundle link se: har file ek download gini jaati hai.
+
+Usage: python benchmarks/bench_throttle.py [users]
+"""
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from throttle import DownloadThrottle
+
+
+def run(users):
+    rng = random.Random(7)
+    links = [f'link{i}' for i in range(5000)]
+
+    tracemalloc.start()
+    throttle = DownloadThrottle(state_file='')
+    start = time.perf_counter()
+    for user in range(users):
+        throttle.check(user, rng.choice(links))
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    stats = throttle.stats()
+    print(f"{users} users: {elapsed / users * 1e6:.2f} us/check, {stats['tracked_users']} users + "
+          f"{stats['tracked_links']} links tracked, {memory / max(1, len(throttle.users) + len(throttle.links)):.0f} "
+          f"bytes/key, {stats['rejected']} rejected")
+
+    script = DownloadThrottle(state_file='')
+    for _ in range(1000):
+        script.check(42, 'link0')
+    stats = script.stats()
+    print(f"script 1000 x /start: {stats['allowed']} allowed, {stats['rejected_user']} rejected (user limit)")
+
+    bundles = DownloadThrottle(state_file='')
+    for _ in range(1000):
+        bundles.check(42, 'b-link0', cost=100)
+    stats = bundles.stats()
+    print(f"script 1000 x 100-file bundle: {stats['allowed']} allowed ({stats['allowed'] * 100} files), "
+          f"{stats['rejected_user']} rejected (user limit)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
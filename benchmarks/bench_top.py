@@ -0,0 +1,60 @@
+"""
+Download analytics benchmark: event log + rollups + /top.
+
+N downloads (zipf, F files) record_download() se: per-download cost, flush ka
+cost (events + daily rollup ek transaction mein), aur /top ka latency -
+cold (ring / rollup query) aur cached.
+
+Usage: python benchmarks/bench_top.py [downloads] [files]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+async def run(downloads, files):
+    db = Database(os.path.join(tempfile.mkdtemp(), 'top.db'))
+    results = await db.add_files([{
+        'file_id': f'fid{i}', 'file_name': f'file_{i}.pdf', 'file_size': 1, 'mime_type': 'application/pdf',
+        'caption': '', 'uploaded_by': 1, 'file_unique_id': f'u{i}', 'message_id': i, 'file_type': 'document'
+    } for i in range(files)])
+    records = [await db.get_file_by_custom_link(result.custom_link) for result in results]
+
+    rng = random.Random(7)
+    chosen = rng.choices(records, weights=[1 / (rank + 1) for rank in range(files)], k=downloads)
+    start = time.perf_counter()
+    for n, record in enumerate(chosen):
+        db.record_download(record, n % 5000)
+    record_us = (time.perf_counter() - start) / downloads * 1e6
+
+    start = time.perf_counter()
+    await db.flush_download_counts()
+    await asyncio.gather(*db._background)
+    flush_ms = (time.perf_counter() - start) * 1000
+
+    for period in ('now', 'today', 'week'):
+        start = time.perf_counter()
+        await db.top_files(period)
+        cold = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(1000):
+            await db.top_files(period)
+        cached = (time.perf_counter() - start) / 1000 * 1e6
+        print(f"/top {period:5}: cold {cold:.2f} ms, cached {cached:.2f} us")
+
+    print(f"{downloads} downloads over {files} files: record {record_us:.2f} us each, "
+          f"flush {flush_ms:.0f} ms, {len(db.trending)} files trending")
+    await db.close()
+
+
+if __name__ == '__main__':
+    downloads = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    asyncio.run(run(downloads, files))
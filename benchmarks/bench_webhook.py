@@ -0,0 +1,121 @@
+"""
+Webhook ingest throughput: synthetic updates POSTed to KeepAliveServer.
+
+Server bot ke event loop mein chalta hai; har update JSON parse -> Update.de_json
+-> application.update_queue. Yahan queue ko ek consumer khaali karta hai, taaki
+sirf HTTP + parsing ka cost naapa jaaye (handlers ka nahi).
+
+Usage: python benchmarks/bench_webhook.py [updates] [connections]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import Application
+from keep_alive import KeepAliveServer
+
+SECRET = 'bench-secret'
+GROUP_ID = -100123
+
+
+def make_update(n):
+    return {
+        'update_id': n,
+        'message': {
+            'message_id': n,
+            'date': int(time.time()),
+            'chat': {'id': GROUP_ID, 'type': 'supergroup', 'title': 'Storage'},
+            'from': {'id': 1000 + n % 50, 'is_bot': False, 'first_name': 'User'},
+            'document': {
+                'file_id': f'BQACAgUAAxkBAAI{n:08d}',
+                'file_unique_id': f'AgAD{n:08d}',
+                'file_name': f'report_{n}.pdf',
+                'mime_type': 'application/pdf',
+                'file_size': 1024 * n
+            },
+            'caption': f'monthly report {n}'
+        }
+    }
+
+
+def request(path, body, secret=SECRET):
+    return (f"POST {path} HTTP/1.1\r\n"
+            f"Host: localhost\r\n"
+            f"Content-Type: application/json\r\n"
+            f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, path, numbers, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for n in numbers:
+        body = json.dumps(make_update(n)).encode()
+        sent = time.perf_counter()
+        writer.write(request(path, body))
+        status = await read_response(reader)
+        latencies.append(time.perf_counter() - sent)
+        assert status == 200, status
+    writer.close()
+
+
+async def main(total, connections):
+    application = Application.builder().token('1:bench').updater(None).build()
+    server = KeepAliveServer(application, host='127.0.0.1', port=0, secret=SECRET)
+    await server.start()
+
+    received = 0
+
+    async def consume():
+        nonlocal received
+        while True:
+            await application.update_queue.get()
+            received += 1
+
+    consumer = asyncio.create_task(consume())
+
+    # Galat secret reject hona chahiye
+    reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+    writer.write(request(server.path, json.dumps(make_update(0)).encode(), secret='wrong'))
+    assert await read_response(reader) == 403
+    writer.close()
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(server.port, server.path, range(i, total, connections), latencies)
+        for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    while received < total:
+        await asyncio.sleep(0.01)
+
+    consumer.cancel()
+    await server.stop()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{total} updates over {connections} connections: {total / elapsed:,.0f} updates/s, "
+          f"p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+    print(f"server stats: {server.stats()}")
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    asyncio.run(main(total, connections))
@@ -0,0 +1,133 @@
+"""
+EXPLAIN QUERY PLAN regression check.
+
+Har public Database method ko chalata hai, jo bhi SQL SQLite tak pahunchta hai use
+capture karta hai, aur fail (exit 1) karta hai agar koi query poori table scan kare.
+
+Usage: python benchmarks/check_query_plans.py
+"""
+import os
+import re
+import sys
+import asyncio
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import Database
+
+# Ye tables itni chhoti hain ki scan se fark nahi padta
+SMALL_TABLES = {'sqlite_sequence', 'sqlite_master', 'sqlite_schema', 'CONSTANT'}
+
+# Jaan-boojh kar full scan karne wali queries (sirf reason ke saath add karein)
+KNOWN_SCANS = {
+    # Startup par inline index ke liye saari files ek baar padhni hi hain
+    'SELECT id, file_id, file_type, file_name, file_size, custom_link FROM files WHERE source_chat_id IS NULL ORDER BY id',
+}
+
+SCAN = re.compile(r'\bSCAN (?:main\.)?(\w+)(.*)')
+
+statements = []
+_connect = sqlite3.connect
+
+
+def connect(*args, **kwargs):
+    conn = _connect(*args, **kwargs)
+    conn.set_trace_callback(statements.append)
+    return conn
+
+
+async def exercise(db):
+    entries = [{
+        'file_id': f'fid{i}', 'file_name': f'lecture notes part {i}.pdf', 'file_size': 1024 * i,
+        'mime_type': 'application/pdf', 'caption': 'physics', 'uploaded_by': 7,
+        'file_unique_id': f'u{i}', 'message_id': i, 'file_type': 'document'
+    } for i in range(20)]
+    await db.start()
+    results = await db.add_files(entries)
+    await db.add_file('single', 'single.mp4', 1, 'video/mp4', '', 8, 'us', 99, 'video')
+    # Imported files (file_unique_id nahi hota)
+    await db.add_files([dict(entries[0], file_id='import:-1001:5', file_unique_id=None, source_chat_id=-1001)])
+    await db.get_file_by_custom_link(results[0].custom_link)
+    await db.get_file_by_custom_link('legacy_link')
+    await db.get_file_by_file_id('fid1')
+    await db.find_duplicate('u3')
+    await db.get_all_files(limit=10)
+    page = await db.get_user_files(7, limit=5)
+    await db.get_user_files(7, limit=5, cursor=(page[-1][4], page[-1][0]))
+    await db.get_user_files(7, limit=5, cursor=(page[-1][4], page[-1][0]), newer=True)
+    record = await db.get_file_by_custom_link(results[1].custom_link)
+    db.increment_download_count(record.id)
+    await db.flush_download_counts()
+    db.record_download(record, 7)
+    await db.flush_download_counts()
+    await db.load_trending()
+    await db.top_files('now')
+    await db.top_files('today')
+    await db.top_files('week')
+    await db.generate_custom_link('fid2', 'my_vanity')
+    await db.generate_custom_link('fid2')
+    await db.search_files('notes par')
+    bundle = await db.create_bundle([result.custom_link for result in results[:5]] + ['my_vanity'], 7, 'notes')
+    await db.get_bundle(bundle)
+    temp, _ = await db.create_temp_link(results[2].custom_link, 7, 3600)
+    await db.get_file_by_custom_link(temp)
+    await db.revoke_link(temp, 7)
+    await db.expire_links()
+    await db._load_expiries()
+    await db.save_import_checkpoint('-1001', 42, 10)
+    await db.get_import_checkpoint('-1001')
+    await db.get_stats()
+
+
+def plan_problems(conn, sql):
+    # Index ke order mein LIMIT tak padhna theek hai; bina LIMIT poora index padhna bhi scan hai
+    bounded = re.search(r'\bLIMIT\b', sql, re.I)
+    problems = []
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'):
+        detail = row[-1]
+        match = SCAN.search(detail)
+        if not match:
+            continue
+        table, rest = match.groups()
+        # files_fts_* FTS5 ki apni internal tables hain
+        if table in SMALL_TABLES or table.startswith('files_fts_') or ('INDEX' in rest and bounded):
+            continue
+        problems.append(detail)
+    return problems
+
+
+async def main():
+    database.sqlite3.connect = connect
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'plans.db')
+    # Single file aur sharded (sharding.py ki apni queries) dono; schema sab files ka ek hi hai
+    databases = [Database(path), Database(os.path.join(directory, 'sharded.db'), shards=3)]
+    # Migrations ke one-time backfill queries check nahi karne
+    statements.clear()
+    for db in databases:
+        await exercise(db)
+        await db.close()
+    database.sqlite3.connect = _connect
+
+    conn = _connect(path)
+    failures = 0
+    seen = set()
+    for sql in statements:
+        sql = ' '.join(sql.split())
+        if sql in seen or not re.match(r'(SELECT|UPDATE|DELETE|INSERT)\b', sql, re.I):
+            continue
+        seen.add(sql)
+        problems = plan_problems(conn, sql)
+        if problems and sql not in KNOWN_SCANS:
+            failures += 1
+            print(f"FULL SCAN: {sql}\n    {'; '.join(problems)}")
+
+    print(f"{len(seen)} distinct queries checked, {failures} full scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
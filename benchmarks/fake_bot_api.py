@@ -0,0 +1,185 @@
+"""
+Local stand-in for the Telegram Bot API, for offline load tests.
+
+Bot ko Application.builder().base_url(api.base_url) se is server par point karo.
+Ye getUpdates par inject() kiye gaye updates deta hai, baaki methods (sendMessage,
+sendDocument, ...) ko record karke ek valid jawab deta hai, aur har injected
+update se bot ke pehle jawab tak ka latency naapta hai.
+"""
+import json
+import time
+import asyncio
+from collections import Counter, defaultdict, deque
+from urllib.parse import parse_qsl
+
+BOT_USER = {'id': 42, 'is_bot': True, 'first_name': 'Storage', 'username': 'fake_storage_bot',
+            'can_join_groups': True, 'can_read_all_group_messages': True, 'supports_inline_queries': True}
+
+# Ye methods user ko dikhne wala jawab hain (latency inhi par rukti hai)
+REPLY_METHODS = {'sendMessage', 'sendDocument', 'sendPhoto', 'sendVideo', 'sendAudio',
+                 'editMessageText', 'copyMessage', 'sendMediaGroup', 'answerInlineQuery'}
+
+
+def chat_type(chat_id):
+    return 'private' if chat_id > 0 else 'supergroup'
+
+
+class FakeBotAPI:
+    """Answers Bot API calls from a local asyncio HTTP server"""
+
+    def __init__(self, host='127.0.0.1', port=0, api_latency=0.0):
+        self.host = host
+        self.port = port
+        self.api_latency = api_latency  # har call par simulated network delay
+        self._server = None
+
+        self._updates = deque()  # (update_id, update dict)
+        self._next_update_id = 1
+        self._new_updates = asyncio.Event()
+        self._next_message_id = 10 ** 6
+
+        self.calls = Counter()  # method -> count
+        self._expected = defaultdict(deque)  # (chat_id, reply_to) -> injected_at
+        self.latencies = []
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.port}/bot'
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def inject(self, update, expect=None):
+        """Make update available to getUpdates.
+
+        expect=(chat_id, reply_to_message_id or None) ya ('inline', query_id): bot
+        ka jo pehla jawab is key se match kare, wahan tak ka latency record hota hai.
+        """
+        update = dict(update, update_id=self._next_update_id)
+        self._next_update_id += 1
+        self._updates.append((update['update_id'], update))
+        if expect is not None:
+            self._expected[expect].append(time.perf_counter())
+        self._new_updates.set()
+
+    @property
+    def outstanding(self):
+        """Injected updates still waiting for a reply"""
+        return sum(len(queue) for queue in self._expected.values())
+
+    def reset_stats(self):
+        self.calls.clear()
+        self.latencies = []
+        self._expected.clear()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                method_line, headers = lines[0], {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                body = await reader.readexactly(length) if length else b''
+
+                api_method = method_line.split(' ')[1].rsplit('/', 1)[-1]
+                params = self._parse_params(headers.get('content-type', ''), body)
+                result = await self._call(api_method, params)
+
+                payload = json.dumps({'ok': True, 'result': result}).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: %d\r\n\r\n' % len(payload) + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # stop() par khula long-poll cancel hota hai
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_params(content_type, body):
+        if not body:
+            return {}
+        if content_type.startswith('application/json'):
+            return json.loads(body)
+        if content_type.startswith('multipart/form-data'):
+            # Sirf file uploads multipart mein aate hain; benchmark mein file_id bhejte hain
+            return {}
+        params = {}
+        for name, value in parse_qsl(body.decode(), keep_blank_values=True):
+            try:
+                params[name] = json.loads(value)
+            except ValueError:
+                params[name] = value
+        return params
+
+    async def _call(self, method, params):
+        self.calls[method] += 1
+
+        if method == 'getUpdates':
+            return await self._get_updates(params)
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        if method == 'getMe':
+            return BOT_USER
+
+        if method == 'answerInlineQuery':
+            self._record_reply([('inline', str(params.get('inline_query_id')))])
+            return True
+        if method in REPLY_METHODS:
+            chat_id = params.get('chat_id')
+            if chat_id is not None:
+                chat_id = int(chat_id)
+                self._record_reply([(chat_id, params.get('reply_to_message_id')), (chat_id, None)])
+            if method == 'sendMediaGroup':
+                return [self._message(chat_id, params) for _ in params.get('media') or [None]]
+            return self._message(chat_id, params)
+        # sendChatAction, answerCallbackQuery, setWebhook, deleteWebhook, ...
+        return True
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        while self._updates and self._updates[0][0] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return [update for _, update in list(self._updates)[:limit]]
+
+    def _record_reply(self, keys):
+        for key in keys:
+            queue = self._expected.get(key)
+            if queue:
+                self.latencies.append(time.perf_counter() - queue.popleft())
+                if not queue:
+                    del self._expected[key]
+                return
+
+    def _message(self, chat_id, params):
+        self._next_message_id += 1
+        chat_id = int(chat_id or 0)
+        message = {
+            'message_id': self._next_message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': chat_type(chat_id)},
+            'from': BOT_USER
+        }
+        if 'text' in params:
+            message['text'] = params['text']
+        return message
@@ -0,0 +1,121 @@
+import time
+import asyncio
+from collections import OrderedDict, namedtuple
+from config import LINK_CACHE_SIZE, LINK_CACHE_TTL
+
+# Link se file bhejne ke liye bas itna chahiye (poora SELECT * nahi).
+# source_chat_id sirf imported files ka hota hai (unhe message copy karke bhejte hain)
+FileRecord = namedtuple('FileRecord', 'id file_id file_type file_name download_count source_chat_id message_id')
+# Bundle link: files (FileRecord) usi order mein jisme bhejni hain
+BundleRecord = namedtuple('BundleRecord', 'id title files')
+
+class LinkCache:
+    """Bounded LRU + TTL cache of custom_link -> FileRecord"""
+
+    def __init__(self, max_size=LINK_CACHE_SIZE, ttl=LINK_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # link -> (expires_at, record)
+        self._links_by_file = {}  # files.id -> link
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, link):
+        """Cached record for link, or None"""
+        entry = self._entries.get(link)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self.invalidate(link)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(link)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, link, record, ttl=None):
+        """Cache record for link, evicting the least recently used entry"""
+        self.invalidate(link)
+        # Expire hone wale links cache mein apni expiry se zyada nahi rehte
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[link] = (time.monotonic() + ttl, record)
+        self._links_by_file[record.id] = link
+        while len(self._entries) > self.max_size:
+            old_link, (_, old_record) = self._entries.popitem(last=False)
+            self._links_by_file.pop(old_record.id, None)
+
+    def dump(self):
+        """[(link, seconds left, record)] oldest first (warm-cache snapshot ke liye)"""
+        now = time.monotonic()
+        return [(link, expires_at - now, record)
+                for link, (expires_at, record) in self._entries.items() if expires_at > now]
+
+    def load(self, items):
+        """Re-add dumped entries; links cached since start are kept as they are"""
+        for link, ttl, record in items:
+            if ttl > 0 and link not in self._entries:
+                self.put(link, record, ttl)
+
+    def add_downloads(self, file_pk, count):
+        """Apply flushed download increments to a cached record"""
+        link = self._links_by_file.get(file_pk)
+        if link is None:
+            return
+        expires_at, record = self._entries[link]
+        self._entries[link] = (expires_at, record._replace(download_count=record.download_count + count))
+
+    def invalidate(self, link):
+        entry = self._entries.pop(link, None)
+        if entry is not None:
+            self._links_by_file.pop(entry[1].id, None)
+
+    def invalidate_file(self, file_pk):
+        """Drop the cached link of a file (e.g. when its link changes)"""
+        link = self._links_by_file.get(file_pk)
+        if link is not None:
+            self.invalidate(link)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class SingleFlight:
+    """Concurrent calls for the same key share one in-flight result"""
+
+    def __init__(self):
+        self._calls = {}  # key -> future
+
+    async def do(self, key, func):
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Ek caller cancel ho to baaki callers ka result na bigde
+        return await asyncio.shield(future)
+
+class RecentlySeen:
+    """Remembers keys for `window` seconds (per-chat dedup of chat actions etc.)"""
+
+    def __init__(self, window, max_size=LINK_CACHE_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._seen = OrderedDict()  # key -> last seen (oldest first)
+
+    def check(self, key):
+        """True if key was not seen in the last window (and mark it seen)"""
+        now = time.monotonic()
+        last = self._seen.get(key)
+        if last is not None and now - last < self.window:
+            return False
+        self._seen[key] = now
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_size or (
+                self._seen and now - next(iter(self._seen.values())) >= self.window):
+            self._seen.popitem(last=False)
+        return True
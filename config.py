@@ -1,11 +1,95 @@
 import os
+import secrets
 
 # Bot Configuration
 BOT_TOKEN = os.environ.get('BOT_TOKEN', '8034509631:AAGVRCEUdZ5JkTjX_XITf8PbSfxc4BWncY8')
 GROUP_ID = os.environ.get('GROUP_ID', '-1002867274735')  # Your group ID
 
+# Webhook mode: WEBHOOK_URL set ho to polling ki jagah webhook use hota hai
+WEBHOOK_URL = os.environ.get('WEBHOOK_URL', '')  # public https URL, e.g. https://bot.example.com
+WEBHOOK_PATH = '/telegram'
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET') or secrets.token_urlsafe(32)  # har start par naya agar set nahi
+PORT = int(os.environ.get('PORT', 8080))  # / aur /health bhi isi port par
+
 # Database
 DATABASE_NAME = 'storage.db'
+DB_READ_POOL_SIZE = 4  # Read connections (writer hamesha ek hi hota hai)
+# files table kitni SQLite files mein baante (har shard ka apna writer). 1 = sirf storage.db.
+# Naye deployment par hi set karein - maujooda storage.db ki files shards mein move nahi hoti
+DB_SHARDS = int(os.environ.get('DB_SHARDS', 1))
+DB_SHARD_READ_POOL_SIZE = 2  # per shard
+# Shutdown par hot caches (inline index, link cache) ki snapshot - agle start par
+# DB se dobara banane ki jagah yahin se load. '' = band
+WARM_CACHE_FILE = os.environ.get('WARM_CACHE_FILE', 'warm_cache.pickle')
+SHUTDOWN_DRAIN_TIMEOUT = 10  # seconds - stop par chal rahe updates ka itna wait
+
+# Online backups (bot chalte hue, SQLite backup API se)
+BACKUP_DIR = os.environ.get('BACKUP_DIR', 'backups')
+BACKUP_INTERVAL = 6 * 60 * 60  # seconds (0 = sirf /backup se)
+BACKUP_KEEP = 7  # itne purane snapshots rakho
+BACKUP_PAGES = 256  # pages per step (~1 MB)
+BACKUP_STEP_SLEEP = 0.005  # seconds - har step ke baad disk ko saans lene do
+BACKUP_EXPORT_JSONL = False  # files table ka .jsonl.gz bhi banao
+
+# Download counters memory mein jama hote hain, phir batch mein likhe jaate hain
+DOWNLOAD_FLUSH_INTERVAL = 5  # seconds (displayed counts itne purane ho sakte hain)
+DOWNLOAD_FLUSH_THRESHOLD = 500  # itni files pending hon to turant flush
+DOWNLOAD_EVENT_FLUSH_THRESHOLD = 5000  # itne download events pending hon to bhi turant flush
+
+# /top - trending (pichle ghante ke downloads, per-minute ring) aur daily (UTC) rollup
+TRENDING_SLOTS = 60
+TRENDING_SLOT_SECONDS = 60
+TOP_SIZE = 10
+TOP_CACHE_TTL = 30  # seconds - /top ka jawab itni der cache se
+
+# Hot links ka in-memory cache
+LINK_CACHE_SIZE = 10000  # max links
+LINK_CACHE_TTL = 300  # seconds
+CHAT_ACTION_WINDOW = 5  # seconds - ek chat mein "uploading..." dobara nahi bhejte
+
+# Outbound Bot API rate limits (Telegram: ~30 msg/s total, 1 msg/s per chat, 20 msg/min per group)
+GLOBAL_SEND_RATE = 30  # messages/sec
+PRIVATE_CHAT_SEND_RATE = 1  # messages/sec
+PRIVATE_CHAT_BURST = 3
+GROUP_CHAT_SEND_RATE = 20 / 60  # messages/sec
+GROUP_CHAT_BURST = 5
+SEND_WORKERS = 8  # ek saath kitni API requests chal sakti hain
+
+# Group uploads: album ya jaldi-jaldi bheji files ek batch mein save hoti hain
+INGEST_WINDOW = 1.0  # seconds
+INGEST_MAX_BATCH = 50
+
+# Updates processing: alag chats parallel, ek chat ke updates order mein
+UPDATE_CONCURRENCY = 32  # ek saath kitne handlers chal sakte hain
+UPDATE_MAX_PENDING = 1024  # isse zyada updates hon to naye wait karte hain
+
+# Bundle links (ek link, kai files) - /bundle se ya album upload se
+BUNDLE_MAX_FILES = 100
+
+# Temporary links (/tlink) - links table mein, expire ya revoke ho sakte hain
+TEMP_LINK_TTL = 24 * 60 * 60  # default validity (seconds)
+TEMP_LINK_MAX_TTL = 30 * 24 * 60 * 60
+LINK_SWEEP_WINDOW = 1000  # itni aane wali expiries memory (heap) mein, baaki index se baad mein
+
+# Download throttling (/start <link> aur Download button) - token buckets
+DOWNLOAD_USER_RATE = 10 / 60  # downloads/sec per user
+DOWNLOAD_USER_BURST = 10
+DOWNLOAD_LINK_RATE = 5  # downloads/sec per link (saare users milakar)
+DOWNLOAD_LINK_BURST = 100
+THROTTLE_MAX_KEYS = 100000  # itne users/links se zyada track nahi karte
+THROTTLE_NOTICE_WINDOW = 30  # seconds - throttled user ko itni der mein ek hi reply
+THROTTLE_STATE_FILE = os.environ.get('THROTTLE_STATE_FILE', '')  # set ho to restart ke baad bhi limits yaad rehti hain
+THROTTLE_SAVE_INTERVAL = 60  # seconds
+
+# Search results per page
+SEARCH_PAGE_SIZE = 10
+
+# /myfiles files per page
+MYFILES_PAGE_SIZE = 10
+
+# Inline mode (@bot query) - results per page (Telegram max 50) aur client cache
+INLINE_PAGE_SIZE = 20
+INLINE_CACHE_TIME = 10  # seconds
 
 # Admin IDs (jo bot ko control kar sakte hain)
 ADMIN_IDS = [123456789, 987654321]  # Apne Telegram IDs daalein
@@ -1,178 +1,1040 @@
+import os
+import pickle
 import sqlite3
+import asyncio
 import datetime
 import json
-from config import DATABASE_NAME
+import re
+import heapq
+import secrets
+import string
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from cache import LinkCache, FileRecord, BundleRecord, SingleFlight
+from prefix_index import PrefixIndex, InlineEntry
+from trending import TrendingRing
+from migrations import migrate, schema_version
+from metrics import DB_QUERY_SECONDS
+from config import (
+    DATABASE_NAME, DB_READ_POOL_SIZE, DB_SHARDS, BUNDLE_MAX_FILES, TEMP_LINK_TTL, LINK_SWEEP_WINDOW,
+    DOWNLOAD_FLUSH_INTERVAL, DOWNLOAD_FLUSH_THRESHOLD, DOWNLOAD_EVENT_FLUSH_THRESHOLD,
+    TOP_SIZE, TOP_CACHE_TTL
+)
+
+# status: 'added', 'exists' (same file_id), 'duplicate' (same content) ya 'error'
+IngestResult = namedtuple('IngestResult', 'status custom_link')
+
+# Warm-cache snapshot ka format (FileRecord, PrefixIndex, LinkCache.dump() ka layout).
+# Inme se kuch bhi badle to badhao - purani snapshot reject ho jaayegi
+WARM_CACHE_VERSION = 1
+
+# Link = files.id ko scramble karke base36. Reversible hai, isliye kabhi collide
+# nahi karta aur lookup seedha primary key par hota hai. 7 chars rakhe hain taaki
+# purane random links (8/10 chars) se kabhi takraav na ho.
+LINK_ALPHABET = string.digits + string.ascii_lowercase
+LINK_CHARS = frozenset(LINK_ALPHABET)
+LINK_LENGTH = 7
+LINK_BITS = 36  # 2**36 < 36**7, ~68 billion files
+LINK_HALF_BITS = LINK_BITS // 2
+LINK_HALF_MASK = (1 << LINK_HALF_BITS) - 1
+LINK_ROUND_KEYS = (0x2f1a7, 0x13c55, 0x3b90e, 0x0d6e3)
+
+def _link_round(half, key):
+    return (((half ^ key) * 0x9E3779B1) >> 11) & LINK_HALF_MASK
+
+def encode_link(file_pk):
+    """files.id -> short link (4-round Feistel permutation + base36)"""
+    left, right = file_pk >> LINK_HALF_BITS, file_pk & LINK_HALF_MASK
+    for key in LINK_ROUND_KEYS:
+        left, right = right, left ^ _link_round(right, key)
+    n = (left << LINK_HALF_BITS) | right
+
+    chars = []
+    for _ in range(LINK_LENGTH):
+        n, r = divmod(n, 36)
+        chars.append(LINK_ALPHABET[r])
+    return ''.join(reversed(chars))
+
+def decode_link(link):
+    """Short link -> files.id (None if it is not an encoded link)"""
+    if len(link) != LINK_LENGTH or not LINK_CHARS.issuperset(link):
+        return None
+    n = int(link, 36)
+    if n >> LINK_BITS:
+        return None
+
+    left, right = n >> LINK_HALF_BITS, n & LINK_HALF_MASK
+    for key in reversed(LINK_ROUND_KEYS):
+        left, right = right ^ _link_round(left, key), left
+    return (left << LINK_HALF_BITS) | right
+
+# Bundle links: "b-" + encoded bundles.id. File links aur custom names mein "-"
+# kabhi nahi hota, isliye dono kabhi takraate nahi
+BUNDLE_PREFIX = 'b-'
+
+def bundle_link(bundle_pk):
+    return BUNDLE_PREFIX + encode_link(bundle_pk)
+
+# Temporary links: "t-" + random token, links table mein. Random isliye ki
+# revoke hua link andaaze se dobara na bana sakein
+TEMP_PREFIX = 't-'
+TEMP_TOKEN_LENGTH = 10
+
+def decode_bundle_link(link):
+    """Bundle link -> bundles.id (None if it is not a bundle link)"""
+    if not link.startswith(BUNDLE_PREFIX):
+        return None
+    return decode_link(link[len(BUNDLE_PREFIX):])
+
+def clean_link_name(custom_name):
+    """Custom link name -> URL-safe link (never one that looks like an encoded link)"""
+    link = ''.join(e for e in custom_name if e.isalnum() or e == '_').lower()
+    # Encoded links ki jagah mat gheriye
+    if decode_link(link) is not None:
+        link += '_'
+    return link
+
+def utc_day(at):
+    """Unix time -> 'YYYY-MM-DD' of its UTC day (SQLite ke date('now') jaisa)"""
+    return datetime.datetime.fromtimestamp(at, datetime.timezone.utc).date().isoformat()
+
+def fts_match(query):
+    """/search query -> FTS5 MATCH expression (None if it has no words)"""
+    # Aakhri word adhoora ho sakta hai: "avengers end" -> "avengers" "end"*
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
 
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect(DATABASE_NAME, check_same_thread=False)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-    
+    def __new__(cls, *args, shards=None, **kwargs):
+        # DB_SHARDS > 1 ho to files kai SQLite files mein (sharding.py) - bahar se
+        # wahi Database interface, isliye main.py ko pata bhi nahi chalta
+        if cls is Database and (DB_SHARDS if shards is None else shards) > 1:
+            from sharding import ShardedDatabase
+            cls = ShardedDatabase
+        return super().__new__(cls)
+
+    def __init__(self, path=DATABASE_NAME, read_pool_size=DB_READ_POOL_SIZE, lazy=False, warm_cache=None,
+                 shards=None):
+        """lazy=True: migrations pehli query (ya start()) par, constructor disk nahi chhoota.
+        warm_cache: close() par hot caches ki snapshot file, start() par wapas load.
+        shards: files kitni SQLite files mein (default DB_SHARDS; 1 = sab isi file mein).
+        """
+        self.path = path
+        self.warm_cache = warm_cache
+        self.shards = []  # sharding.py: files wali shard databases (backups inhe bhi copy karte hain)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self.schema_version = None  # migrations ke baad PRAGMA user_version
+
+        # SQLite ek time par ek hi writer allow karta hai, isliye writer thread sirf ek
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=read_pool_size, thread_name_prefix='db-reader')
+
+        # Write-behind download counters: {files.id: pending increments}
+        self._pending_downloads = {}
+        # Download event log (file_pk, user_id, at) - isi flush ke saath likha jaata hai
+        self._pending_events = []
+        self._flush_task = None
+        self._background = set()
+
+        self.link_cache = LinkCache()
+        self.bundle_cache = LinkCache()  # bundle link -> BundleRecord
+        self.temp_link_cache = LinkCache()  # temporary link -> FileRecord (expiry tak hi)
+
+        # Aane wali link expiries ka min-heap (timestamps). Sirf pehli
+        # LINK_SWEEP_WINDOW heap mein; horizon se aage wali baad mein index se aati hain
+        self._expiries = []
+        self._expiry_horizon = None  # None = saari expiries heap mein hain
+        self._expiry_changed = asyncio.Event()
+        self._sweep_task = None
+        self.links_expired = 0
+        self._link_flight = SingleFlight()
+        self._link_batch = {}  # link -> future: isi loop iteration ke cache misses, ek query mein
+
+        # Inline queries ke liye file names ka in-memory index (start() par load hota hai)
+        self.inline_index = PrefixIndex()
+        self._inline_loaded = False  # poora index bana hai (tabhi snapshot mein jaata hai)
+        self.warm_start = None  # None = snapshot nahi dekha, True/False = use hua ya nahi
+        # "Trending now" - pichle ghante ke downloads (start() par event log se bharta hai)
+        self.trending = TrendingRing()
+        self._top_cache = {}  # period -> (expires_at, rows)
+        # Kitni queries SQLite tak gayi (benchmarks ke liye)
+        self.query_count = 0
+        self._query_timers = {}  # method name -> DB_QUERY_SECONDS child
+
+        # Duplicate uploads (file_unique_id match) - /stats ke liye
+        self.uploads_seen = 0
+        self.duplicate_hits = 0
+
+        if not lazy:
+            self._writer.submit(self.create_tables).result()
+
+    def _connection(self):
+        """Get this thread's own connection (one per executor thread)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, func, args):
+        if not self._schema_ready:
+            self.create_tables()
+        return func(self._connection(), *args)
+
+    async def _read(self, func, *args):
+        """Run func(conn, *args) on the reader pool"""
+        return await self._run(self._readers, func, args)
+
+    async def _write(self, func, *args):
+        """Run func(conn, *args) on the single writer thread"""
+        return await self._run(self._writer, func, args)
+
+    async def _run(self, executor, func, args):
+        self.query_count += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, self._call, func, args)
+        finally:
+            timer = self._query_timers.get(func.__name__)
+            if timer is None:
+                timer = self._query_timers[func.__name__] = DB_QUERY_SECONDS.labels(func.__name__.lstrip('_'))
+            timer.observe(time.perf_counter() - start)
+
     def create_tables(self):
-        """Create necessary tables"""
-        # Files table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_id TEXT UNIQUE,
-                file_name TEXT,
-                file_size INTEGER,
-                mime_type TEXT,
-                caption TEXT,
-                uploaded_by INTEGER,
-                uploaded_at TIMESTAMP,
-                download_count INTEGER DEFAULT 0,
-                file_type TEXT,
-                file_unique_id TEXT,
-                message_id INTEGER,
-                custom_link TEXT UNIQUE
-            )
-        ''')
-        
-        # Users table (tracking)
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                joined_at TIMESTAMP,
-                total_uploads INTEGER DEFAULT 0,
-                total_downloads INTEGER DEFAULT 0
-            )
-        ''')
-        
-        # Links table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS links (
-                link_id TEXT PRIMARY KEY,
-                file_id TEXT,
-                created_at TIMESTAMP,
-                expires_at TIMESTAMP,
-                created_by INTEGER,
-                is_active BOOLEAN DEFAULT 1,
-                FOREIGN KEY (file_id) REFERENCES files(file_id)
-            )
-        ''')
-        
-        self.conn.commit()
-    
-    def add_file(self, file_id, file_name, file_size, mime_type, caption, 
-                 uploaded_by, file_unique_id, message_id, file_type='document'):
+        """Create necessary tables (runs pending schema migrations, once)"""
+        with self._schema_lock:
+            if not self._schema_ready:
+                self.schema_version = migrate(self._connection())
+                self._schema_ready = True
+
+    async def add_file(self, file_id, file_name, file_size, mime_type, caption,
+                       uploaded_by, file_unique_id, message_id, file_type='document'):
         """Add new file to database"""
+        result = (await self.add_files([{
+            'file_id': file_id,
+            'file_name': file_name,
+            'file_size': file_size,
+            'mime_type': mime_type,
+            'caption': caption,
+            'uploaded_by': uploaded_by,
+            'file_unique_id': file_unique_id,
+            'message_id': message_id,
+            'file_type': file_type
+        }]))[0]
+        return result.status == 'added'
+
+    async def add_files(self, entries):
+        """Add many files in one transaction; returns one IngestResult per entry"""
+        if not entries:
+            return []
+        try:
+            results = await self._store_files(entries)
+        except Exception as e:
+            print(f"Database error: {e}")
+            return [IngestResult('error', None)] * len(entries)
+        self.uploads_seen += sum(1 for result in results if result.status != 'error')
+        self.duplicate_hits += sum(1 for result in results if result.status == 'duplicate')
+        for entry, result in zip(entries, results):
+            # Imported files ka Bot API file_id nahi hota, inline mein nahi bhej sakte
+            if result.status == 'added' and not entry.get('source_chat_id'):
+                # Naye files ka link hamesha encode_link(id) hota hai
+                self.inline_index.add(InlineEntry(
+                    decode_link(result.custom_link), entry['file_id'], entry['file_type'],
+                    entry['file_name'], entry['file_size'], result.custom_link
+                ))
+        return results
+
+    async def _store_files(self, entries):
+        return await self._write(self._add_files, entries)
+
+    def _add_files(self, conn, entries):
+        file_ids = [entry['file_id'] for entry in entries]
+        unique_ids = [entry['file_unique_id'] for entry in entries if entry['file_unique_id']]
+
+        # Writer lock pehle le lo taaki id aur link isi transaction mein tay ho jaayein
+        conn.execute('BEGIN IMMEDIATE')
+        with conn:
+            links_by_file_id = {}
+            links_by_unique_id = {}
+            # Khaali "IN ()" wala OR branch index use nahi karta - poori table scan
+            # hoti (imports mein file_unique_id hota hi nahi)
+            where = f"file_id IN ({','.join('?' * len(file_ids))})"
+            if unique_ids:
+                where += f" OR file_unique_id IN ({','.join('?' * len(unique_ids))})"
+            for file_id, file_unique_id, custom_link in conn.execute(f'''
+                SELECT file_id, file_unique_id, custom_link FROM files WHERE {where}
+            ''', file_ids + unique_ids):
+                links_by_file_id[file_id] = custom_link
+                if file_unique_id:
+                    links_by_unique_id.setdefault(file_unique_id, custom_link)
+
+            last_pk = conn.execute(
+                "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'files'), 0)"
+            ).fetchone()[0]
+
+            results = []
+            rows = []
+            now = datetime.datetime.now()
+            for entry in entries:
+                if entry['file_id'] in links_by_file_id:
+                    # File already exists
+                    results.append(IngestResult('exists', links_by_file_id[entry['file_id']]))
+                    continue
+                if entry['file_unique_id'] in links_by_unique_id:
+                    # Same content, naya file_id - purana link hi de do
+                    results.append(IngestResult('duplicate', links_by_unique_id[entry['file_unique_id']]))
+                    continue
+
+                last_pk = self._next_file_pk(last_pk)
+                link = encode_link(last_pk)
+                links_by_file_id[entry['file_id']] = link
+                if entry['file_unique_id']:
+                    links_by_unique_id[entry['file_unique_id']] = link
+                results.append(IngestResult('added', link))
+                rows.append((
+                    last_pk, entry['file_id'], entry['file_name'], entry['file_size'], entry['mime_type'],
+                    entry['caption'], entry['uploaded_by'], entry.get('uploaded_at') or now,
+                    entry['file_unique_id'], entry['message_id'], entry['file_type'], link,
+                    entry.get('source_chat_id')
+                ))
+
+            conn.executemany('''
+                INSERT INTO files
+                (id, file_id, file_name, file_size, mime_type, caption, uploaded_by,
+                 uploaded_at, file_unique_id, message_id, file_type, custom_link, source_chat_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+        return results
+
+    def _next_file_pk(self, last_pk):
+        # sharding.py ke shards yahan sirf apne hisse ke ids lete hain
+        return last_pk + 1
+
+    async def get_import_checkpoint(self, source):
+        """(last_message_id, imported) of an earlier import of source, or None"""
+        return await self._read(self._get_import_checkpoint, source)
+
+    def _get_import_checkpoint(self, conn, source):
+        return conn.execute('''
+            SELECT last_message_id, imported FROM import_checkpoints WHERE source = ?
+        ''', (source,)).fetchone()
+
+    async def save_import_checkpoint(self, source, last_message_id, imported):
+        await self._write(self._save_import_checkpoint, source, last_message_id, imported)
+
+    def _save_import_checkpoint(self, conn, source, last_message_id, imported):
+        with conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO import_checkpoints (source, last_message_id, imported, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (source, last_message_id, imported, datetime.datetime.now()))
+
+    async def find_duplicate(self, file_unique_id):
+        """Link of an already saved file with the same content, or None"""
+        row = await self._read(self._find_duplicate, file_unique_id)
+        if row is None:
+            return None
+        # Ye upload add_files tak nahi jayega, isliye yahin gino
+        self.uploads_seen += 1
+        self.duplicate_hits += 1
+        return row[0]
+
+    def _find_duplicate(self, conn, file_unique_id):
+        return conn.execute('''
+            SELECT custom_link FROM files WHERE file_unique_id = ? LIMIT 1
+        ''', (file_unique_id,)).fetchone()
+
+    async def get_file_by_custom_link(self, custom_link):
+        """Get file record by custom link (served from cache when hot)"""
+        if custom_link.startswith(TEMP_PREFIX):
+            return await self.get_temp_link(custom_link)
+        record = self.link_cache.get(custom_link)
+        if record is None:
+            # Ek hi link par ek saath aaye requests ek hi query share karenge
+            record = await self._link_flight.do(custom_link, lambda: self._load_link(custom_link))
+        return record
+
+    async def _load_link(self, custom_link):
+        record = await self._queue_link(custom_link)
+        if record is not None:
+            self.link_cache.put(custom_link, record)
+        return record
+
+    def _queue_link(self, custom_link):
+        # Burst mein har miss ka alag executor handoff event loop ko rok deta hai
+        # (1 CPU par 1000 handoffs ~50 ms) - ek iteration ke saare misses ek query mein
+        future = self._link_batch.get(custom_link)
+        if future is None:
+            if not self._link_batch:
+                # Task shuru hone se pehle hi cancel ho to bhi waiters latke na rahein
+                batch = self._link_batch
+                self._spawn(self._load_link_batch()).add_done_callback(lambda _: self._cancel_waiters(batch))
+            future = self._link_batch[custom_link] = asyncio.get_running_loop().create_future()
+        return future
+
+    async def _load_link_batch(self):
+        batch, self._link_batch = self._link_batch, {}
+        links = list(batch)
+        try:
+            # SQLite ke bound parameters ki limit ke andar
+            found = await asyncio.gather(*(self._read(self._get_files_by_custom_links, links[start:start + 500])
+                                           for start in range(0, len(links), 500)))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        records = {}
+        for chunk in found:
+            records.update(chunk)
+        for link, future in batch.items():
+            if not future.done():
+                future.set_result(records.get(link))
+
+    def _cancel_waiters(self, batch):
+        # Shuru hone se pehle cancel hua batch abhi bhi current hai - naye misses usme na jaayein
+        if self._link_batch is batch:
+            self._link_batch = {}
+        for future in batch.values():
+            if not future.done():
+                future.cancel()
+
+    def _get_files_by_custom_links(self, conn, links):
+        columns = 'id, file_id, file_type, file_name, download_count, source_chat_id, message_id, custom_link'
+        records = {}
+        encoded = {}  # files.id -> link
+        for link in links:
+            file_pk = decode_link(link)
+            if file_pk is not None:
+                encoded[file_pk] = link
+        if encoded:
+            # Encoded links primary key par; custom_link bhi match karo - link badla ho to purana kaam na kare
+            for row in conn.execute(f'''
+                SELECT {columns} FROM files WHERE id IN ({','.join('?' * len(encoded))})
+            ''', list(encoded)):
+                if encoded[row[0]] == row[-1]:
+                    records[row[-1]] = FileRecord(*row[:-1])
+
+        # Purane random links aur custom names (aur id se na mile encoded links) custom_link index par
+        rest = [link for link in links if link not in records]
+        if rest:
+            for row in conn.execute(f'''
+                SELECT {columns} FROM files WHERE custom_link IN ({','.join('?' * len(rest))})
+            ''', rest):
+                records[row[-1]] = FileRecord(*row[:-1])
+        return records
+
+    def _get_file_by_custom_link(self, conn, custom_link):
+        file_pk = decode_link(custom_link)
+        if file_pk is not None:
+            # custom_link bhi match karo - link badla ho to purana kaam na kare
+            row = conn.execute('''
+                SELECT id, file_id, file_type, file_name, download_count, source_chat_id, message_id
+                FROM files WHERE id = ? AND custom_link = ?
+            ''', (file_pk, custom_link)).fetchone()
+            if row:
+                return FileRecord(*row)
+
+        # Purane random links aur custom names
+        row = conn.execute('''
+            SELECT id, file_id, file_type, file_name, download_count, source_chat_id, message_id
+            FROM files WHERE custom_link = ?
+        ''', (custom_link,)).fetchone()
+        return FileRecord(*row) if row else None
+
+    async def get_temp_link(self, link):
+        """File record behind an active, unexpired temporary link, or None"""
+        record = self.temp_link_cache.get(link)
+        if record is None:
+            record = await self._link_flight.do(link, lambda: self._load_temp_link(link))
+        return record
+
+    async def _load_temp_link(self, link):
+        row = await self._read(self._get_temp_link, link, datetime.datetime.now())
+        if row is None:
+            return None
+        record, expires_at = FileRecord(*row[:-1]), row[-1]
+        ttl = None
+        if expires_at is not None:
+            ttl = (datetime.datetime.fromisoformat(expires_at) - datetime.datetime.now()).total_seconds()
+        self.temp_link_cache.put(link, record, ttl)
+        return record
+
+    def _get_temp_link(self, conn, link, now):
+        # Primary key lookup; expire ho chuka link sweeper se pehle bhi reject hota hai
+        return conn.execute('''
+            SELECT f.id, f.file_id, f.file_type, f.file_name, f.download_count, f.source_chat_id,
+                   f.message_id, l.expires_at
+            FROM links l JOIN files f ON f.file_id = l.file_id
+            WHERE l.link_id = ? AND l.is_active = 1 AND (l.expires_at IS NULL OR l.expires_at > ?)
+        ''', (link, now)).fetchone()
+
+    async def create_temp_link(self, file_link, created_by, ttl=TEMP_LINK_TTL):
+        """Revocable link to the file behind file_link, valid for ttl seconds (0 = no expiry).
+
+        Returns (link, expires_at) or None if file_link is not a file link.
+        """
+        if file_link.startswith(TEMP_PREFIX):
+            return None
+        expires_at = datetime.datetime.now() + datetime.timedelta(seconds=ttl) if ttl else None
+        try:
+            record = await self.get_file_by_custom_link(file_link)
+            if record is None:
+                return None
+            link = await self._write(self._create_temp_link, record, created_by, expires_at)
+        except Exception as e:
+            print(f"Database error: {e}")
+            return None
+        if expires_at is not None:
+            self._schedule_expiry(expires_at.timestamp())
+        return link, expires_at
+
+    def _create_temp_link(self, conn, record, created_by, expires_at):
+        link = TEMP_PREFIX + ''.join(secrets.choice(LINK_ALPHABET) for _ in range(TEMP_TOKEN_LENGTH))
+        with conn:
+            conn.execute('''
+                INSERT INTO links (link_id, file_id, file_pk, created_at, expires_at, created_by, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+            ''', (link, record.file_id, record.id, datetime.datetime.now(), expires_at, created_by))
+        return link
+
+    async def revoke_link(self, link, user_id, admin=False):
+        """Deactivate a temporary link (its creator or an admin); True if revoked"""
+        revoked = await self._write(self._revoke_link, link, user_id, admin)
+        if revoked:
+            self.temp_link_cache.invalidate(link)
+        return revoked
+
+    def _revoke_link(self, conn, link, user_id, admin):
+        with conn:
+            return conn.execute('''
+                UPDATE links SET is_active = 0
+                WHERE link_id = ? AND is_active = 1 AND (created_by = ? OR ?)
+            ''', (link, user_id, admin)).rowcount > 0
+
+    def _schedule_expiry(self, timestamp):
+        if self._expiry_horizon is not None and timestamp > self._expiry_horizon:
+            return  # heap ke window se aage - index se baad mein load hoga
+        heapq.heappush(self._expiries, timestamp)
+        if self._expiries[0] == timestamp:
+            # Sweeper kisi baad wali expiry ke liye so raha hai, jaldi jagao
+            self._expiry_changed.set()
+
+    async def _load_expiries(self):
+        rows = await self._read(self._upcoming_expiries, LINK_SWEEP_WINDOW)
+        timestamps = [datetime.datetime.fromisoformat(row[0]).timestamp() for row in rows]
+        self._expiry_horizon = timestamps[-1] if len(timestamps) == LINK_SWEEP_WINDOW else None
+        # Load ke dauraan bane links bhi rakho (duplicates se bas ek khaali sweep hota hai)
+        self._expiries = timestamps + self._expiries
+        heapq.heapify(self._expiries)
+
+    def _upcoming_expiries(self, conn, limit):
+        return conn.execute('''
+            SELECT expires_at FROM links
+            WHERE is_active = 1 AND expires_at IS NOT NULL
+            ORDER BY expires_at LIMIT ?
+        ''', (limit,)).fetchall()
+
+    async def expire_links(self):
+        """Deactivate links whose expiry has passed; returns how many"""
+        links = await self._write(self._expire_links, datetime.datetime.now())
+        for link in links:
+            self.temp_link_cache.invalidate(link)
+        self.links_expired += len(links)
+        return len(links)
+
+    def _expire_links(self, conn, now):
+        # Partial index par range scan: kaam sirf expire hue links jitna
+        with conn:
+            return [row[0] for row in conn.execute('''
+                UPDATE links SET is_active = 0
+                WHERE is_active = 1 AND expires_at <= ?
+                RETURNING link_id
+            ''', (now,)).fetchall()]
+
+    async def _sweep_loop(self):
+        """Sleep until the next link expiry, then deactivate everything due"""
+        await self._load_expiries()
+        while True:
+            self._expiry_changed.clear()
+            if not self._expiries:
+                if self._expiry_horizon is not None:
+                    await self._load_expiries()
+                else:
+                    await self._expiry_changed.wait()
+                continue
+
+            delay = self._expiries[0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._expiry_changed.wait(), delay)
+                    continue  # naya link jo pehle expire hoga
+                except asyncio.TimeoutError:
+                    pass
+
+            now = time.time()
+            while self._expiries and self._expiries[0] <= now:
+                heapq.heappop(self._expiries)
+            try:
+                await self.expire_links()
+            except Exception as e:
+                print(f"Database error: {e}")
+
+    async def create_bundle(self, links, created_by, title=None):
+        """Create a bundle of the files behind links (in that order); returns its link or None"""
         try:
-            self.cursor.execute('''
-                INSERT INTO files 
-                (file_id, file_name, file_size, mime_type, caption, uploaded_by, 
-                 uploaded_at, file_unique_id, message_id, file_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                file_id, file_name, file_size, mime_type, caption, 
-                uploaded_by, datetime.datetime.now(), file_unique_id, 
-                message_id, file_type
-            ))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            # File already exists
-            return False
+            return await self._write(self._create_bundle, links[:BUNDLE_MAX_FILES], created_by, title)
         except Exception as e:
             print(f"Database error: {e}")
-            return False
-    
-    def get_file_by_custom_link(self, custom_link):
-        """Get file info by custom link"""
-        self.cursor.execute('''
-            SELECT * FROM files WHERE custom_link = ?
-        ''', (custom_link,))
-        return self.cursor.fetchone()
-    
-    def get_file_by_file_id(self, file_id):
+            return None
+
+    def _create_bundle(self, conn, links, created_by, title):
+        pks = dict(conn.execute(f'''
+            SELECT custom_link, id FROM files
+            WHERE custom_link IN ({','.join('?' * len(links))})
+        ''', links).fetchall())
+        # Jo links nahi mile unhe chhod do, ek file do baar nahi
+        file_pks = list(dict.fromkeys(pks[link] for link in links if link in pks))
+        return self._insert_bundle(conn, file_pks, created_by, title)
+
+    def _insert_bundle(self, conn, file_pks, created_by, title):
+        if not file_pks:
+            return None
+        with conn:
+            bundle_pk = conn.execute('''
+                INSERT INTO bundles (title, created_by, created_at) VALUES (?, ?, ?)
+            ''', (title, created_by, datetime.datetime.now())).lastrowid
+            conn.executemany('''
+                INSERT INTO bundle_items (bundle_id, position, file_pk) VALUES (?, ?, ?)
+            ''', [(bundle_pk, position, file_pk) for position, file_pk in enumerate(file_pks)])
+        return bundle_link(bundle_pk)
+
+    async def get_bundle(self, link):
+        """BundleRecord for a bundle link (served from cache when hot), or None"""
+        record = self.bundle_cache.get(link)
+        if record is None:
+            record = await self._link_flight.do(link, lambda: self._load_bundle(link))
+        return record
+
+    async def _load_bundle(self, link):
+        bundle_pk = decode_bundle_link(link)
+        if bundle_pk is None:
+            return None
+        record = await self._read(self._get_bundle, bundle_pk)
+        if record is not None:
+            self.bundle_cache.put(link, record)
+        return record
+
+    def _get_bundle(self, conn, bundle_pk):
+        row = conn.execute('SELECT title FROM bundles WHERE id = ?', (bundle_pk,)).fetchone()
+        if row is None:
+            return None
+        files = conn.execute('''
+            SELECT f.id, f.file_id, f.file_type, f.file_name, f.download_count, f.source_chat_id, f.message_id
+            FROM bundle_items b JOIN files f ON f.id = b.file_pk
+            WHERE b.bundle_id = ? ORDER BY b.position
+        ''', (bundle_pk,)).fetchall()
+        return BundleRecord(bundle_pk, row[0], [FileRecord(*file) for file in files])
+
+    async def get_file_by_file_id(self, file_id):
         """Get file info by telegram file_id"""
-        self.cursor.execute('''
+        return await self._read(self._get_file_by_file_id, file_id)
+
+    def _get_file_by_file_id(self, conn, file_id):
+        return conn.execute('''
             SELECT * FROM files WHERE file_id = ?
-        ''', (file_id,))
-        return self.cursor.fetchone()
-    
-    def get_all_files(self, limit=50, offset=0):
+        ''', (file_id,)).fetchone()
+
+    async def get_all_files(self, limit=50, offset=0):
         """Get all files with pagination"""
-        self.cursor.execute('''
-            SELECT file_id, file_name, file_size, download_count, 
+        return await self._read(self._get_all_files, limit, offset)
+
+    def _get_all_files(self, conn, limit, offset):
+        return conn.execute('''
+            SELECT file_id, file_name, file_size, download_count,
                    uploaded_at, custom_link, file_type
-            FROM files 
-            ORDER BY uploaded_at DESC 
+            FROM files
+            ORDER BY uploaded_at DESC
             LIMIT ? OFFSET ?
-        ''', (limit, offset))
-        return self.cursor.fetchall()
-    
-    def increment_download_count(self, file_id):
-        """Increment download count"""
-        self.cursor.execute('''
-            UPDATE files SET download_count = download_count + 1 
-            WHERE file_id = ?
-        ''', (file_id,))
-        self.conn.commit()
-    
-    def generate_custom_link(self, file_id, custom_name=None):
-        """Generate custom link for file"""
-        import random
-        import string
-        
-        if custom_name:
-            # Clean custom name for URL
-            custom_name = ''.join(e for e in custom_name if e.isalnum() or e == '_')
-            link_id = custom_name.lower()
+        ''', (limit, offset)).fetchall()
+
+    async def get_user_files(self, user_id, limit=10, cursor=None, newer=False):
+        """User's files newest first, keyset-paginated on (uploaded_at, id).
+
+        cursor = (uploaded_at, id) of the row at the page edge; newer=True walks
+        back towards the latest files. Returns up to limit + 1 rows so the caller
+        can tell whether another page exists.
+        """
+        return await self._read(self._get_user_files, user_id, limit, cursor, newer)
+
+    def _get_user_files(self, conn, user_id, limit, cursor, newer):
+        columns = 'id, file_name, file_size, download_count, uploaded_at, custom_link'
+        if cursor is None:
+            return conn.execute(f'''
+                SELECT {columns} FROM files WHERE uploaded_by = ?
+                ORDER BY uploaded_at DESC, id DESC LIMIT ?
+            ''', (user_id, limit + 1)).fetchall()
+        if newer:
+            rows = conn.execute(f'''
+                SELECT {columns} FROM files
+                WHERE uploaded_by = ? AND (uploaded_at, id) > (?, ?)
+                ORDER BY uploaded_at ASC, id ASC LIMIT ?
+            ''', (user_id, cursor[0], cursor[1], limit + 1)).fetchall()
+            return rows[::-1]
+        return conn.execute(f'''
+            SELECT {columns} FROM files
+            WHERE uploaded_by = ? AND (uploaded_at, id) < (?, ?)
+            ORDER BY uploaded_at DESC, id DESC LIMIT ?
+        ''', (user_id, cursor[0], cursor[1], limit + 1)).fetchall()
+
+    def increment_download_count(self, file_pk):
+        """Increment download count (buffered, no disk I/O)"""
+        self._pending_downloads[file_pk] = self._pending_downloads.get(file_pk, 0) + 1
+
+        # Bahut saari files pending hain to timer ka wait mat karo
+        if len(self._pending_downloads) == DOWNLOAD_FLUSH_THRESHOLD:
+            self._spawn(self.flush_download_counts())
+
+    def record_download(self, file_info, user_id=None):
+        """Count a delivered file: download counter, event log and trending (buffered, no disk I/O)"""
+        now = int(time.time())
+        self.increment_download_count(file_info.id)
+        self._pending_events.append((file_info.id, user_id, now))
+        self.trending.add(file_info.id, file_info.file_name, now)
+        if len(self._pending_events) == DOWNLOAD_EVENT_FLUSH_THRESHOLD:
+            self._spawn(self.flush_download_counts())
+
+    def pending_downloads(self, file_pk):
+        """Downloads of a file not yet flushed to disk"""
+        return self._pending_downloads.get(file_pk, 0)
+
+    async def flush_download_counts(self):
+        """Write buffered download counts, events and rollups in one transaction"""
+        if not self._pending_downloads and not self._pending_events:
+            return
+        pending, self._pending_downloads = self._pending_downloads, {}
+        events, self._pending_events = self._pending_events, []
+        try:
+            await self._write(self._flush_download_counts, list(pending.items()), events)
+        except Exception:
+            # Counts wapas buffer mein daal do, agle flush mein try karenge
+            for file_pk, count in pending.items():
+                self._pending_downloads[file_pk] = self._pending_downloads.get(file_pk, 0) + count
+            self._pending_events[:0] = events
+            raise
+        for file_pk, count in pending.items():
+            self.link_cache.add_downloads(file_pk, count)
+
+    def _flush_download_counts(self, conn, items, events=()):
+        # Rollup batch se hi ban jaata hai - event log dobara padhna nahi padta. Din UTC
+        # ka, daily_stats jaisa
+        daily = {}
+        for file_pk, _, at in events:
+            day = (utc_day(at), file_pk)
+            daily[day] = daily.get(day, 0) + 1
+
+        with conn:
+            conn.executemany('''
+                UPDATE files SET download_count = download_count + ?
+                WHERE id = ?
+            ''', [(count, file_pk) for file_pk, count in items])
+            conn.executemany('''
+                INSERT INTO download_events (file_pk, user_id, at) VALUES (?, ?, ?)
+            ''', events)
+            conn.executemany('''
+                INSERT INTO download_daily (day, file_pk, downloads) VALUES (?, ?, ?)
+                ON CONFLICT(day, file_pk) DO UPDATE SET downloads = downloads + excluded.downloads
+            ''', [(day, file_pk, count) for (day, file_pk), count in daily.items()])
+
+    async def top_files(self, period='now'):
+        """Most downloaded files: 'now' (trending, last hour), 'today' or 'week'.
+
+        Returns [(file_name, custom_link, downloads)], cached for TOP_CACHE_TTL seconds.
+        """
+        cached = self._top_cache.get(period)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        if period == 'now':
+            ranked = [(file_pk, count) for file_pk, _, count in self.trending.top(TOP_SIZE)]
         else:
-            # Generate random link
-            link_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
-        
-        # Check if link already exists
-        self.cursor.execute('SELECT file_id FROM files WHERE custom_link = ?', (link_id,))
-        if self.cursor.fetchone():
-            # Link exists, generate new
-            link_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=10))
-        
-        # Update file with custom link
-        self.cursor.execute('''
-            UPDATE files SET custom_link = ? WHERE file_id = ?
-        ''', (link_id, file_id))
-        self.conn.commit()
-        
+            days = 6 if period == 'week' else 0
+            ranked = await self._read(self._top_files, utc_day(time.time() - days * 86400), TOP_SIZE)
+        names = await self.get_file_names([file_pk for file_pk, _ in ranked])
+        rows = [names[file_pk] + (count,) for file_pk, count in ranked if file_pk in names]
+        self._top_cache[period] = (time.monotonic() + TOP_CACHE_TTL, rows)
+        return rows
+
+    async def get_file_names(self, file_pks):
+        """{files.id: (file_name, custom_link)} for the given ids"""
+        file_pks = list(file_pks)
+        names = {}
+        # SQLite ke bound parameters ki limit ke andar
+        for start in range(0, len(file_pks), 500):
+            names.update(await self._read(self._get_file_names, file_pks[start:start + 500]))
+        return names
+
+    def _get_file_names(self, conn, file_pks):
+        return {file_pk: (file_name, custom_link) for file_pk, file_name, custom_link in conn.execute(f'''
+            SELECT id, file_name, custom_link FROM files WHERE id IN ({', '.join('?' * len(file_pks))})
+        ''', file_pks)}
+
+    def _top_files(self, conn, since, limit):
+        # Sirf in dino ke rollup rows (primary key range), event log nahi
+        return conn.execute('''
+            SELECT file_pk, SUM(downloads) AS downloads FROM download_daily
+            WHERE day >= ?
+            GROUP BY file_pk ORDER BY downloads DESC LIMIT ?
+        ''', (since, limit)).fetchall()
+
+    async def load_trending(self):
+        """Refill the trending ring from the event log (after a restart)"""
+        # Start ke baad wale downloads ring mein pehle se hain (aur shayad flush bhi ho chuke)
+        until = int(time.time())
+        rows = await self._read(self._recent_downloads, until - self.trending.window, until)
+        names = await self.get_file_names({file_pk for file_pk, _, _ in rows})
+        for file_pk, at, count in rows:
+            if file_pk in names:
+                self.trending.add(file_pk, names[file_pk][0], at, count)
+
+    def _recent_downloads(self, conn, since, until):
+        return conn.execute('''
+            SELECT file_pk, at, COUNT(*) FROM download_events
+            WHERE at >= ? AND at < ? GROUP BY file_pk, at
+        ''', (since, until)).fetchall()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(DOWNLOAD_FLUSH_INTERVAL)
+            try:
+                await self.flush_download_counts()
+            except Exception as e:
+                print(f"Database error: {e}")
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def start(self):
+        """Start background flushing, link expiry sweeps and cache loading (call from inside the event loop)"""
+        if self._flush_task is None:
+            # Bade DB par load mein der lagti hai; tab tak inline sirf nayi files dikhata hai
+            if self.warm_cache:
+                self._spawn(self.load_warm_cache(await self._warm_cache_header()))
+            else:
+                self._spawn(self.load_inline_index())
+            self._spawn(self.load_trending())
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def load_inline_index(self):
+        """Build the inline index from the files table (on a reader thread)"""
+        index = await self._read(self._load_inline_index)
+        self._set_inline_index(index)
+
+    def _set_inline_index(self, index):
+        # Load ke dauraan add hui files bhi rakho
+        for entry in self.inline_index.entries():
+            index.add(entry)
+        self.inline_index = index
+        self._inline_loaded = True
+
+    async def _warm_cache_header(self):
+        """(WARM_CACHE_VERSION, schema version, file stat) a valid snapshot must match, or None"""
+        # Migrations pehle - unke writes (aur nayi schema) ke baad ka stat hi close() wale se milega.
+        # Stat abhi lo, kisi bhi aur write se pehle - uske baad snapshot match nahi karega
+        version = await self._write(schema_version)
+        file_stat = self._file_stat()
+        return None if file_stat is None else (WARM_CACHE_VERSION, version, file_stat)
+
+    def _file_stat(self):
+        """(mtime, size) of the database file, or None if it has unmerged WAL writes"""
+        try:
+            st = os.stat(self.path)
+            if os.path.exists(self.path + '-wal') and os.path.getsize(self.path + '-wal'):
+                return None
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    async def load_warm_cache(self, header):
+        """Restore the inline index and link caches from the snapshot, if it matches the database"""
+        snapshot = await asyncio.to_thread(self._read_warm_cache, header)
+        self.warm_start = snapshot is not None
+        if snapshot is None:
+            await self.load_inline_index()
+            return
+        self._set_inline_index(snapshot['inline_index'])
+        self.link_cache.load(snapshot['links'])
+        self.bundle_cache.load(snapshot['bundles'])
+
+    def _read_warm_cache(self, header):
+        # Snapshot wahi DB file ke liye hai jo close() ke baad thi; beech mein koi
+        # bhi write (import script, crash se pehle ke writes) ho to stat badal jaata hai.
+        # Upgrade ke baad format/schema version alag - purane objects load hi nahi karte
+        if header is None:
+            return None
+        try:
+            with open(self.warm_cache, 'rb') as f:
+                if pickle.load(f) != header:
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warm cache load failed: {e}")
+            return None
+
+    def _write_warm_cache(self):
+        file_stat = self._file_stat()
+        if file_stat is None or not self._inline_loaded:
+            return
+        header = (WARM_CACHE_VERSION, self.schema_version, file_stat)
+        snapshot = {
+            'inline_index': self.inline_index,
+            'links': self.link_cache.dump(),
+            'bundles': self.bundle_cache.dump()
+        }
+        tmp = self.warm_cache + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.warm_cache)
+
+    def _load_inline_index(self, conn):
+        index = PrefixIndex()
+        for row in conn.execute('''
+            SELECT id, file_id, file_type, file_name, file_size, custom_link
+            FROM files WHERE source_chat_id IS NULL ORDER BY id
+        '''):
+            index.add(InlineEntry(*row))
+        return index
+
+    async def generate_custom_link(self, file_id, custom_name=None):
+        """Generate custom link for file"""
+        link_id, file_pk = await self._write(self._generate_custom_link, file_id, custom_name)
+
+        # Purana link ab kaam nahi karega
+        if file_pk is not None:
+            self.link_cache.invalidate_file(file_pk)
+            self.inline_index.set_link(file_pk, link_id)
+        if link_id is not None:
+            self.link_cache.invalidate(link_id)
         return link_id
-    
-    def search_files(self, query):
-        """Search files by name"""
-        self.cursor.execute('''
-            SELECT file_id, file_name, file_size, file_type 
-            FROM files 
-            WHERE file_name LIKE ? 
-            ORDER BY uploaded_at DESC 
-            LIMIT 20
-        ''', (f'%{query}%',))
-        return self.cursor.fetchall()
-    
-    def get_stats(self):
+
+    def _generate_custom_link(self, conn, file_id, custom_name):
+        link_id = None
+        if custom_name:
+            link_id = clean_link_name(custom_name)
+
+            # Check if link already exists
+            if conn.execute('SELECT file_id FROM files WHERE custom_link = ?', (link_id,)).fetchone():
+                link_id = None
+
+        row = conn.execute('''
+            SELECT id FROM files WHERE file_id = ?
+        ''', (file_id,)).fetchone()
+        if not row:
+            return None, None
+
+        # Custom name nahi mila to default (encoded id) link
+        link_id = link_id or encode_link(row[0])
+        conn.execute('''
+            UPDATE files SET custom_link = ? WHERE id = ?
+        ''', (link_id, row[0]))
+        conn.commit()
+
+        return link_id, row[0]
+
+    async def search_files(self, query, limit=20, offset=0):
+        """Search files by name and caption (ranked, prefix match)"""
+        match = fts_match(query)
+        if not match:
+            return []
+        return await self._read(self._search_files, match, limit, offset)
+
+    def _search_files(self, conn, match, limit, offset):
+        # File name match caption match se zyada important hai
+        return conn.execute('''
+            SELECT f.file_id, f.file_name, f.file_size, f.file_type, f.custom_link
+            FROM files_fts
+            JOIN files f ON f.id = files_fts.rowid
+            WHERE files_fts MATCH ?
+            ORDER BY bm25(files_fts, 10.0, 1.0)
+            LIMIT ? OFFSET ?
+        ''', (match, limit, offset)).fetchall()
+
+    async def get_stats(self):
         """Get bot statistics"""
-        self.cursor.execute('SELECT COUNT(*) FROM files')
-        total_files = self.cursor.fetchone()[0]
-        
-        self.cursor.execute('SELECT SUM(file_size) FROM files')
-        total_size = self.cursor.fetchone()[0] or 0
-        
-        self.cursor.execute('SELECT SUM(download_count) FROM files')
-        total_downloads = self.cursor.fetchone()[0] or 0
-        
-        self.cursor.execute('SELECT COUNT(DISTINCT uploaded_by) FROM files')
-        total_users = self.cursor.fetchone()[0] or 0
-        
+        return await self._read(self._get_stats)
+
+    def _get_stats(self, conn):
+        # Totals triggers se maintain hote hain (migration v4) - O(1)
+        total_files, total_size, total_downloads, total_users = conn.execute('''
+            SELECT total_files, total_size, total_downloads, total_users
+            FROM stats WHERE id = 1
+        ''').fetchone()
+
+        daily = conn.execute('''
+            SELECT day, files, bytes, downloads, new_users
+            FROM daily_stats ORDER BY day DESC LIMIT 7
+        ''').fetchall()
+
         return {
             'total_files': total_files,
             'total_size': total_size,
             'total_downloads': total_downloads,
-            'total_users': total_users
+            'total_users': total_users,
+            'daily': [
+                {'day': day, 'files': files, 'bytes': size, 'downloads': downloads, 'new_users': new_users}
+                for day, files, size, downloads, new_users in daily
+            ],
+            'link_cache': self.link_cache.stats(),
+            'duplicates': {
+                'uploads': self.uploads_seen,
+                'hits': self.duplicate_hits,
+                'hit_rate': self.duplicate_hits / self.uploads_seen if self.uploads_seen else 0.0
+            }
         }
-    
-    def close(self):
+
+    async def close(self):
         """Close database connection"""
-        self.conn.close()
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        await self.flush_download_counts()
+
+        # Pending queries khatam hone do, phir connections band karo
+        await asyncio.to_thread(self._writer.shutdown, wait=True)
+        await asyncio.to_thread(self._readers.shutdown, wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+        # Connections band hone par WAL main file mein aa chuka hai - ab file ka stat final hai
+        if self.warm_cache:
+            try:
+                await asyncio.to_thread(self._write_warm_cache)
+            except Exception as e:
+                print(f"Warm cache save failed: {e}")
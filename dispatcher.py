@@ -0,0 +1,132 @@
+import time
+import heapq
+import asyncio
+import itertools
+from telegram.ext import BaseUpdateProcessor
+from config import UPDATE_CONCURRENCY, UPDATE_MAX_PENDING
+
+# Chhota number = pehle chalega
+PRIORITY_CALLBACK = 0
+PRIORITY_PRIVATE = 1
+PRIORITY_GROUP = 2
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates from different chats concurrently, same-chat updates in order.
+
+    Application har update ke liye task banata hai (arrival order mein). Har task
+    pehle apne chat ka lock leta hai (FIFO, isliye ek chat ke updates order mein
+    rehte hain), phir ek concurrency slot. Slots priority se milte hain: button
+    clicks aur inline queries pehle, phir private chats, group ingest sabse baad mein.
+    """
+
+    def __init__(self, max_concurrent=UPDATE_CONCURRENCY, max_pending=UPDATE_MAX_PENDING):
+        # Base class ka semaphore sirf admission limit hai (kitne updates memory mein ho sakte hain)
+        super().__init__(max_pending)
+        self.max_concurrent = max_concurrent
+        self._chat_locks = {}  # chat_id -> [lock, users]
+        self._running = 0
+        self._waiting = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+        # Backpressure metrics
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.processed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.first_update_at = None  # monotonic time - startup benchmark / metric ke liye
+
+    @staticmethod
+    def _priority(update):
+        # Button clicks aur inline queries par user jawab ka wait kar raha hota hai
+        if getattr(update, 'callback_query', None) or getattr(update, 'inline_query', None):
+            return PRIORITY_CALLBACK
+        chat = getattr(update, 'effective_chat', None)
+        if chat is not None and chat.type == 'private':
+            return PRIORITY_PRIVATE
+        return PRIORITY_GROUP
+
+    async def do_process_update(self, update, coroutine):
+        chat = getattr(update, 'effective_chat', None)
+        chat_id = chat.id if chat is not None else None
+        queued_at = time.monotonic()
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        try:
+            if chat_id is None:
+                await self._run(update, coroutine, queued_at)
+                return
+
+            entry = self._chat_locks.get(chat_id)
+            if entry is None:
+                entry = self._chat_locks[chat_id] = [asyncio.Lock(), 0]
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    await self._run(update, coroutine, queued_at)
+            finally:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._chat_locks[chat_id]
+        finally:
+            self.pending -= 1
+
+    async def _run(self, update, coroutine, queued_at):
+        await self._acquire_slot(self._priority(update))
+        try:
+            wait = time.monotonic() - queued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            await coroutine
+        finally:
+            self.processed += 1
+            if self.first_update_at is None:
+                self.first_update_at = time.monotonic()
+            self._release_slot()
+
+    async def _acquire_slot(self, priority):
+        if self._running < self.max_concurrent and not self._waiting:
+            self._running += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Slot mil chuka tha par hum cancel ho gaye - aage de do
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        # Slot seedha agle waiter ko (running count wahi rehta hai)
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._running -= 1
+
+    async def drain(self, timeout):
+        """Wait (up to timeout seconds) until every accepted update has been handled; True if drained"""
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return not self.pending
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def stats(self):
+        return {
+            'pending': self.pending,
+            'running': self._running,
+            'waiting_for_slot': len(self._waiting),
+            'max_pending': self.max_pending_seen,
+            'processed': self.processed,
+            'avg_wait': self.total_wait / self.processed if self.processed else 0.0,
+            'max_wait': self.max_wait
+        }
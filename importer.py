@@ -0,0 +1,210 @@
+"""
+Import files from a Telegram Desktop channel export (result.json) into the database.
+
+Export ko stream karke padhta hai (poori file memory mein nahi aati), batches mein
+add_files se insert karta hai aur har batch ke baad checkpoint save karta hai -
+beech mein ruk jaaye to dobara chalane par wahin se aage badhta hai.
+
+Export mein Bot API file_id nahi hota, isliye bot in files ko source channel ka
+message copy karke bhejta hai (bot us channel mein admin hona chahiye).
+
+Usage: python importer.py result.json [--chat-id -100123...] [--batch 2000] [--db storage.db]
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+import datetime
+from config import DATABASE_NAME, MAX_FILE_SIZE
+from database import Database
+
+MESSAGES_KEY = re.compile(r'"messages"\s*:\s*\[')
+SEPARATORS = re.compile(r'[\s,]*')
+
+# Export ke media_type -> files.file_type (stickers, GIFs, round videos skip)
+MEDIA_TYPES = {
+    None: 'document',
+    'video_file': 'video',
+    'audio_file': 'audio',
+    'voice_message': 'audio',
+}
+
+def read_export(f, chunk_size=1 << 20):
+    """Return (header, messages iterator) for an open result.json.
+
+    Header (name, type, id) chhota hota hai aur messages se pehle aata hai. Har
+    message json.JSONDecoder.raw_decode se alag parse hota hai; buffer mein
+    ek chunk + adhoora message se zyada kabhi nahi rehta.
+    """
+    buffer = ''
+    while True:
+        match = MESSAGES_KEY.search(buffer)
+        if match:
+            break
+        chunk = f.read(chunk_size)
+        if not chunk:
+            raise ValueError('"messages" array not found - is this a Telegram Desktop export?')
+        buffer += chunk
+    header = json.loads(buffer[:match.start()].rstrip().rstrip(',') + '}')
+    return header, _iter_messages(f, buffer, match.end(), chunk_size)
+
+def _iter_messages(f, buffer, pos, chunk_size):
+    decoder = json.JSONDecoder()
+    while True:
+        pos = SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos == len(buffer):
+                raise ValueError
+            message, pos = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # Message chunk ke beech mein kata hai - aur padho
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError('export ended in the middle of the messages array')
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield message
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+def bot_chat_id(header):
+    """Bot API chat id of the exported chat (channels/supergroups: -100<id>)"""
+    if header.get('type', '').endswith(('channel', 'supergroup')):
+        return int(f"-100{header['id']}")
+    return -int(header['id'])
+
+def message_text(text):
+    if isinstance(text, list):
+        return ''.join(part if isinstance(part, str) else part.get('text', '') for part in text)
+    return text or ''
+
+def file_entry(message, chat_id):
+    """files row (add_files entry) for an export message, or None if it has no file"""
+    if message.get('type') != 'message':
+        return None
+
+    if 'photo' in message:
+        file_type = 'photo'
+        file_name = f"photo_{message['id']}.jpg"
+        file_size = message.get('photo_file_size')
+        mime_type = 'image/jpeg'
+    elif 'file' in message:
+        file_type = MEDIA_TYPES.get(message.get('media_type'))
+        if file_type is None:
+            return None
+        file_name = message.get('file_name')
+        if not file_name and not message['file'].startswith('('):
+            # "(File not included...)" jab export mein file download nahi hui
+            file_name = os.path.basename(message['file'])
+        file_name = file_name or f"{file_type}_{message['id']}"
+        file_size = message.get('file_size')
+        mime_type = message.get('mime_type')
+    else:
+        return None
+
+    if file_size and file_size > MAX_FILE_SIZE * 1024 * 1024:
+        return None
+
+    from_id = message.get('from_id') or ''
+    if 'date_unixtime' in message:
+        uploaded_at = datetime.datetime.fromtimestamp(int(message['date_unixtime']))
+    else:
+        uploaded_at = datetime.datetime.fromisoformat(message['date'])
+
+    return {
+        # Asli file_id nahi hai; ye unique rehta hai isliye dobara import "exists" deta hai
+        'file_id': f"import:{chat_id}:{message['id']}",
+        'file_name': file_name,
+        'file_size': file_size,
+        'mime_type': mime_type,
+        'caption': message_text(message.get('text')),
+        'uploaded_by': int(from_id[4:]) if from_id.startswith('user') else None,
+        'uploaded_at': uploaded_at,
+        'file_unique_id': None,
+        'message_id': message['id'],
+        'file_type': file_type,
+        'source_chat_id': chat_id
+    }
+
+async def import_export(path, db, chat_id=None, batch_size=2000, report_every=5.0):
+    """Stream path into db; returns a dict of counts"""
+    counts = {'messages': 0, 'added': 0, 'exists': 0, 'duplicate': 0, 'skipped': 0, 'error': 0}
+    with open(path, encoding='utf-8') as f:
+        header, messages = read_export(f)
+        chat_id = chat_id or bot_chat_id(header)
+        source = str(chat_id)
+
+        checkpoint = await db.get_import_checkpoint(source)
+        last_message_id, imported = checkpoint or (0, 0)
+        if checkpoint:
+            print(f"Resuming {header.get('name')} after message {last_message_id} ({imported} already imported)")
+
+        start = last_report = time.perf_counter()
+        batch = []
+        pending = None  # pichla batch likha ja raha hai, tab tak agla parse karo
+
+        async def finish(pending):
+            nonlocal imported
+            batch_last_id, results = pending[0], await pending[1]
+            for result in results:
+                counts[result.status] += 1
+            if counts['error']:
+                # Checkpoint aage mat badhao, warna ye rows hamesha ke liye chhoot jaayengi
+                raise RuntimeError(f"batch ending at message {batch_last_id} failed; re-run to resume")
+            imported += sum(1 for result in results if result.status == 'added')
+            # Batch commit ke baad checkpoint; crash hua to ye batch dobara "exists" aayega
+            await db.save_import_checkpoint(source, batch_last_id, imported)
+
+        for message in messages:
+            counts['messages'] += 1
+            if message.get('id', 0) <= last_message_id:
+                continue
+            entry = file_entry(message, chat_id)
+            if entry is None:
+                counts['skipped'] += 1
+                continue
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                if pending:
+                    await finish(pending)
+                pending = (batch[-1]['message_id'], asyncio.ensure_future(db.add_files(batch)))
+                batch = []
+
+                now = time.perf_counter()
+                if now - last_report >= report_every:
+                    last_report = now
+                    print(f"  {counts['messages']} messages, {counts['added']} added "
+                          f"({counts['added'] / (now - start):,.0f} rows/s)")
+
+        if pending:
+            await finish(pending)
+        if batch:
+            await finish((batch[-1]['message_id'], asyncio.ensure_future(db.add_files(batch))))
+
+    elapsed = time.perf_counter() - start
+    counts['elapsed'] = elapsed
+    print(f"Imported {counts['added']} files from {counts['messages']} messages in {elapsed:.1f}s "
+          f"({counts['added'] / elapsed if elapsed else 0:,.0f} rows/s); "
+          f"{counts['exists']} already present, {counts['skipped']} without a supported file")
+    return counts
+
+async def main(args):
+    db = Database(args.db)
+    try:
+        await import_export(args.export, db, args.chat_id, args.batch)
+    finally:
+        await db.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import a Telegram Desktop channel export')
+    parser.add_argument('export', help='path to result.json')
+    parser.add_argument('--chat-id', type=int, help='Bot API id of the source chat (default: from export)')
+    parser.add_argument('--batch', type=int, default=2000, help='rows per transaction')
+    parser.add_argument('--db', default=DATABASE_NAME)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from config import INGEST_WINDOW, INGEST_MAX_BATCH
+
+logger = logging.getLogger(__name__)
+
+class IngestQueue:
+    """Collects group uploads (album / quick burst) and saves them as one batch"""
+
+    def __init__(self, db, on_batch, window=INGEST_WINDOW, max_batch=INGEST_MAX_BATCH):
+        self.db = db
+        self.on_batch = on_batch  # async on_batch(messages, entries, results)
+        self.window = window
+        self.max_batch = max_batch
+        self._batches = {}  # key -> [(message, entry)]
+        self._timers = {}
+        self._tasks = set()
+
+    def add(self, key, message, entry):
+        """Queue one file; key = media_group_id, or the uploader for single files"""
+        batch = self._batches.setdefault(key, [])
+        batch.append((message, entry))
+        if len(batch) >= self.max_batch:
+            self._flush_key(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(self.window, self._flush_key, key)
+
+    def _flush_key(self, key):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self._batches.pop(key, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch):
+        messages = [message for message, _ in batch]
+        entries = [entry for _, entry in batch]
+        results = await self.db.add_files(entries)
+        try:
+            await self.on_batch(messages, entries, results)
+        except Exception as e:
+            logger.error(f"Error replying to upload batch: {e}")
+
+    async def stop(self):
+        """Save everything still waiting in the queue"""
+        for key in list(self._batches):
+            self._flush_key(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,24 +1,144 @@
-from flask import Flask, jsonify
-import threading
+import hmac
+import json
 import time
+import asyncio
+import logging
+from telegram import Update
+from metrics import render
+from config import PORT, WEBHOOK_PATH, WEBHOOK_SECRET
 
-app = Flask(__name__)
+logger = logging.getLogger(__name__)
 
-@app.route('/')
-def home():
-    return jsonify({
-        'status': 'alive',
-        'message': 'Bot is running!',
-        'timestamp': time.time()
-    })
+MAX_BODY_SIZE = 1024 * 1024  # Telegram updates isse kaafi chhote hote hain
 
-@app.route('/health')
-def health():
-    return jsonify({'status': 'healthy'})
+REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large'}
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
+class KeepAliveServer:
+    """Tiny asyncio HTTP server for /, /health and /metrics, plus the webhook endpoint.
 
-def keep_alive():
-    t = threading.Thread(target=run)
-    t.start()
+    Bot ke event loop mein hi chalta hai (alag thread nahi). Agar `application`
+    diya ho to WEBHOOK_PATH par aaye updates seedha application.update_queue
+    mein jaate hain; secret token header match na ho to 403.
+    """
+
+    def __init__(self, application=None, host='0.0.0.0', port=PORT,
+                 path=WEBHOOK_PATH, secret=WEBHOOK_SECRET):
+        self.application = application
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.started = time.time()
+        self._server = None
+
+        self.requests = 0
+        self.updates = 0
+        self.rejected = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # port=0 par OS jo port deta hai wahi use karo
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"HTTP server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            # Ek connection par kai requests aa sakti hain (Telegram keep-alive use karta hai)
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'bad request line'}, close=True)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {'error': 'bad content length'}, close=True)
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {'error': 'body too large'}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                close = (headers.get('connection', '').lower() == 'close'
+                         or version == 'HTTP/1.0')
+                status, payload = await self._route(method, target.split('?', 1)[0], headers, body)
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, headers, body):
+        self.requests += 1
+        if path == '/':
+            return 200, {
+                'status': 'alive',
+                'message': 'Bot is running!',
+                'timestamp': time.time()
+            }
+        if path == '/health':
+            return 200, {'status': 'healthy', 'uptime': round(time.time() - self.started)}
+        if path == '/metrics':
+            return 200, render()
+        if self.application is None or path != self.path:
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        token = headers.get('x-telegram-bot-api-secret-token', '')
+        if not hmac.compare_digest(token.encode(), self.secret.encode()):
+            self.rejected += 1
+            return 403, {'error': 'invalid secret token'}
+
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except Exception as e:
+            logger.warning(f"Bad webhook payload: {e}")
+            return 400, {'error': 'invalid update'}
+        await self.application.update_queue.put(update)
+        self.updates += 1
+        return 200, {'ok': True}
+
+    @staticmethod
+    async def _respond(writer, status, payload, close=False):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), 'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload).encode(), 'application/json'
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'updates': self.updates,
+            'rejected': self.rejected
+        }
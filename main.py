@@ -1,16 +1,39 @@
+import time
+# Startup time (time-to-ready / first update) isi se naapa jaata hai - baaki imports se pehle
+STARTED_AT = time.monotonic()
+
 import os
+import re
 import logging
+import signal
 import asyncio
 from datetime import datetime
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import (
+    Update, InlineKeyboardButton, InlineKeyboardMarkup,
+    InlineQueryResultCachedDocument, InlineQueryResultCachedPhoto,
+    InlineQueryResultCachedVideo, InlineQueryResultCachedAudio,
+    InputMediaDocument, InputMediaPhoto, InputMediaVideo, InputMediaAudio
+)
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, 
-    filters, ContextTypes, CallbackQueryHandler
+    filters, ContextTypes, CallbackQueryHandler, InlineQueryHandler
 )
 from telegram.constants import ParseMode
 
-from config import BOT_TOKEN, GROUP_ID, ADMIN_IDS, GROUP_LINK, MAX_FILE_SIZE
-from database import Database
+from config import (
+    BOT_TOKEN, GROUP_ID, ADMIN_IDS, GROUP_LINK, MAX_FILE_SIZE, SEARCH_PAGE_SIZE, MYFILES_PAGE_SIZE,
+    CHAT_ACTION_WINDOW, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, INLINE_PAGE_SIZE, INLINE_CACHE_TIME,
+    BUNDLE_MAX_FILES, TEMP_LINK_TTL, TEMP_LINK_MAX_TTL, THROTTLE_NOTICE_WINDOW,
+    WARM_CACHE_FILE, SHUTDOWN_DRAIN_TIMEOUT
+)
+from cache import RecentlySeen
+from sender import OutboundScheduler, PRIORITY_FILE
+from ingest import IngestQueue
+from dispatcher import ChatOrderedUpdateProcessor
+from keep_alive import KeepAliveServer
+from throttle import DownloadThrottle
+from metrics import CallbackMetric, HANDLER_SECONDS, timed
+from database import Database, BUNDLE_PREFIX, TEMP_PREFIX
 
 # Logging setup
 logging.basicConfig(
@@ -19,16 +42,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize database
-db = Database()
+# Telegram album limit
+MEDIA_GROUP_SIZE = 10
+# Album mein photo + video mix ho sakte hain; documents aur audio sirf apni type ke saath
+MEDIA_GROUP_KINDS = {'photo': 'visual', 'video': 'visual', 'document': 'document', 'audio': 'audio'}
+INPUT_MEDIA = {'photo': InputMediaPhoto, 'video': InputMediaVideo,
+               'document': InputMediaDocument, 'audio': InputMediaAudio}
+# /tlink durations: 30m, 12h, 7d
+DURATION_UNITS = {'m': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+# /top periods
+TOP_PERIODS = {'now': 'Trending (last hour)', 'today': 'Top Today', 'week': 'Top This Week'}
+# Throttled downloads ka jawab - pehle se bana hua, koi DB query nahi
+THROTTLE_TEXT = {
+    'user': "⏳ Bahut zyada downloads! Thodi der baad try karein.",
+    'link': "⏳ Is link par abhi bahut load hai, thodi der baad try karein."
+}
+
+# Initialize database (lazy: migrations post_init mein, import par disk I/O nahi)
+db = Database(lazy=True, warm_cache=WARM_CACHE_FILE)
 
 class StorageBot:
     def __init__(self):
         self.bot_username = None
         self.group_id = int(GROUP_ID) if GROUP_ID else None
+        # Chats jinhe abhi "upload_document" action bheja gaya
+        self.chat_actions = RecentlySeen(CHAT_ACTION_WINDOW)
+        # Saare outgoing messages rate limits ke andar isi se jaate hain
+        self.sender = OutboundScheduler()
+        # Group uploads batch mein save hote hain
+        self.ingest = IngestQueue(db, self.reply_saved_files)
+        # Alag chats ke updates parallel, ek chat ke order mein
+        self.update_processor = ChatOrderedUpdateProcessor()
+        # / aur /health (aur webhook mode mein updates) isi server par
+        self.web = None
+        # storage.db ke scheduled snapshots (admins /backup se bhi le sakte hain) - post_init mein banta hai
+        self.backups = None
+        self.ready_at = None  # post_init khatam (monotonic)
+        # /start <link> aur Download button ki per-user + per-link rate limit
+        self.throttle = DownloadThrottle()
+        # Throttled users jinhe abhi jawab diya gaya (baar-baar reply bhi API calls hain)
+        self.throttle_notices = RecentlySeen(THROTTLE_NOTICE_WINDOW)
+        self.register_metrics()
+    
+    def register_metrics(self):
+        """Expose existing counters and queue depths on /metrics"""
+        CallbackMetric('bot_link_cache_requests_total', 'Link cache lookups by result',
+                       lambda: {('hit',): db.link_cache.hits, ('miss',): db.link_cache.misses},
+                       kind='counter', labelnames=['result'])
+        CallbackMetric('bot_link_cache_hit_ratio', 'Link cache hit rate since start',
+                       lambda: db.link_cache.stats()['hit_rate'])
+        CallbackMetric('bot_link_cache_size', 'Links currently cached', lambda: db.link_cache.stats()['size'])
+        CallbackMetric('bot_db_queries_total', 'Database calls made', lambda: db.query_count, kind='counter')
+        CallbackMetric('bot_duplicate_uploads_total', 'Uploads matched to an existing file by content',
+                       lambda: db.duplicate_hits, kind='counter')
+        CallbackMetric('bot_update_queue', 'Updates being handled or waiting',
+                       lambda: {(state,): value for state, value in self.update_processor.stats().items()
+                                if state in ('pending', 'running', 'waiting_for_slot')},
+                       labelnames=['state'])
+        CallbackMetric('bot_send_queue', 'Outbound API calls not yet finished',
+                       lambda: {(state,): value for state, value in self.sender.stats().items() if state != 'chats'},
+                       labelnames=['state'])
+        CallbackMetric('bot_links_expired_total', 'Temporary links deactivated by the expiry sweeper',
+                       lambda: db.links_expired, kind='counter')
+        CallbackMetric('bot_downloads_throttled_total', 'Download requests rejected by the throttle',
+                       lambda: {(reason,): count for reason, count in self.throttle.rejected.items()},
+                       kind='counter', labelnames=['reason'])
+        CallbackMetric('bot_startup_seconds', 'Seconds from process start to ready / first handled update',
+                       lambda: {(stage,): at - STARTED_AT for stage, at in
+                                (('ready', self.ready_at), ('first_update', self.update_processor.first_update_at))
+                                if at is not None},
+                       labelnames=['stage'])
+        CallbackMetric('bot_backup_last_success_timestamp', 'Unix time of the last successful backup',
+                       lambda: (self.backups and self.backups.last_at) or 0)
+        CallbackMetric('bot_backup_failures_total', 'Backups that failed',
+                       lambda: self.backups.failures if self.backups else 0, kind='counter')
+    
+    async def reply(self, message, text, **kwargs):
+        """Reply with a text message through the outbound scheduler"""
+        return await self.sender.send(message.chat_id, lambda: message.reply_text(text, **kwargs))
+    
+    async def edit(self, query, text, **kwargs):
+        """Edit a callback query's message through the outbound scheduler"""
+        return await self.sender.send(query.message.chat_id, lambda: query.edit_message_text(text, **kwargs))
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Start command handler"""
+        # /start <link> - file download link se aaya hai
+        if context.args:
+            if not await self.throttled(update, context.args[0]):
+                await self.send_file_by_link(update, context, context.args[0])
+            return
+        
         user = update.effective_user
         
         # Welcome message
@@ -52,6 +156,7 @@ Hello {user.first_name}!
 /myfiles - Apni uploaded files
 /search - Files search karein
 /stats - Bot statistics
+/top - Trending files
 /help - Help menu
 
 🚀 **Start using now!**
@@ -65,12 +170,14 @@ Hello {user.first_name}!
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await update.message.reply_text(
+        await self.reply(
+            update.message,
             welcome_text,
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=reply_markup
         )
     
+    @timed(HANDLER_SECONDS, 'handle_group_message')
     async def handle_group_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle messages in group"""
         # Check if message is in the correct group
@@ -90,11 +197,53 @@ Hello {user.first_name}!
         file_info = await self.process_file(message, user)
         
         if file_info:
-            # Generate custom link
-            custom_link = db.generate_custom_link(file_info['file_id'])
+            # Same content pehle se saved hai? Turant wahi link de do, koi write nahi
+            # (album ki files batch mein hi jaati hain taaki bundle poora bane)
+            if file_info['file_unique_id'] and not message.media_group_id:
+                existing_link = await db.find_duplicate(file_info['file_unique_id'])
+                if existing_link:
+                    await self.reply_duplicate(message, file_info, existing_link)
+                    return
             
-            # Create share button
-            bot_username = context.bot.username
+            # Album ki saari files ek saath save hongi, ek hi reply ke saath
+            key = message.media_group_id or f"user_{user.id}"
+            self.ingest.add(key, message, file_info)
+    
+    async def reply_duplicate(self, message, file_info, custom_link):
+        """Reply with the existing link of a re-uploaded file"""
+        bot_username = message.get_bot().username
+        file_url = f"https://t.me/{bot_username}?start={custom_link}"
+        
+        keyboard = [
+            [
+                InlineKeyboardButton("📋 Copy Link", callback_data=f"copy_{custom_link}"),
+                InlineKeyboardButton("📥 Download", callback_data=f"get_{custom_link}")
+            ]
+        ]
+        await self.reply(
+            message,
+            f"♻️ **File pehle se saved hai!**\n\n📌 `{file_info['file_name']}`\n🔗 `{file_url}`",
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+    
+    async def reply_saved_files(self, messages, entries, results):
+        """Send one reply for a saved upload batch"""
+        bot_username = messages[0].get_bot().username
+        
+        if len(entries) == 1:
+            file_info, result = entries[0], results[0]
+            if result.status == 'exists':
+                await self.reply(messages[0], "⚠️ File already exists in database!")
+                return
+            if result.status == 'duplicate':
+                await self.reply_duplicate(messages[0], file_info, result.custom_link)
+                return
+            if result.status != 'added':
+                await self.reply(messages[0], "❌ Error processing file!")
+                return
+            
+            custom_link = result.custom_link
             file_url = f"https://t.me/{bot_username}?start={custom_link}"
             
             # Success message
@@ -119,14 +268,46 @@ Hello {user.first_name}!
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
-            await message.reply_text(
+            await self.reply(
+                messages[0],
                 success_text,
                 parse_mode=ParseMode.MARKDOWN,
                 reply_markup=reply_markup
             )
+            return
+        
+        # Album / multiple files - sab links ek message mein
+        saved = sum(1 for result in results if result.status == 'added')
+        text = f"✅ **{saved}/{len(entries)} Files Saved!**\n\n"
+        for file_info, result in zip(entries, results):
+            text += f"📌 `{file_info['file_name']}` ({self.format_size(file_info['file_size'])})\n"
+            if result.status == 'added':
+                text += f"🔗 `https://t.me/{bot_username}?start={result.custom_link}`\n\n"
+            elif result.status == 'exists':
+                text += "⚠️ File already exists in database!\n\n"
+            elif result.status == 'duplicate':
+                text += f"♻️ Pehle se saved: `https://t.me/{bot_username}?start={result.custom_link}`\n\n"
+            else:
+                text += "❌ Error processing file!\n\n"
+        
+        # Album = ek bundle link, saari files ek saath milengi
+        links = [result.custom_link for result in results if result.custom_link]
+        if messages[0].media_group_id and len(links) > 1:
+            title = next((file_info['caption'] for file_info in entries if file_info['caption']), None)
+            bundle = await db.create_bundle(links, entries[0]['uploaded_by'], title)
+            if bundle:
+                text += f"📦 **Bundle ({len(links)} files):**\n`https://t.me/{bot_username}?start={bundle}`\n"
+        
+        keyboard = [[InlineKeyboardButton("📁 My Files", callback_data="myfiles")]]
+        await self.reply(
+            messages[0],
+            text,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
     
     async def process_file(self, message, user):
-        """Process and save file to database"""
+        """Read file details from a group message"""
         try:
             # Get file info based on type
             if message.document:
@@ -164,39 +345,27 @@ Hello {user.first_name}!
             
             # Check file size
             if file_size > MAX_FILE_SIZE * 1024 * 1024:
-                await message.reply_text(f"❌ File size limit: {MAX_FILE_SIZE}MB")
+                await self.reply(message, f"❌ File size limit: {MAX_FILE_SIZE}MB")
                 return None
             
             # Get caption
             caption = message.caption or ""
             
-            # Save to database
-            success = db.add_file(
-                file_id=file_id,
-                file_name=file_name,
-                file_size=file_size,
-                mime_type=mime_type,
-                caption=caption,
-                uploaded_by=user.id,
-                file_unique_id=file_unique_id,
-                message_id=message.message_id,
-                file_type=file_type
-            )
-            
-            if success:
-                return {
-                    'file_id': file_id,
-                    'file_name': file_name,
-                    'file_size': file_size,
-                    'file_type': file_type
-                }
-            else:
-                await message.reply_text("⚠️ File already exists in database!")
-                return None
+            return {
+                'file_id': file_id,
+                'file_name': file_name,
+                'file_size': file_size,
+                'mime_type': mime_type,
+                'caption': caption,
+                'uploaded_by': user.id,
+                'file_unique_id': file_unique_id,
+                'message_id': message.message_id,
+                'file_type': file_type
+            }
                 
         except Exception as e:
             logger.error(f"Error processing file: {e}")
-            await message.reply_text("❌ Error processing file!")
+            await self.reply(message, "❌ Error processing file!")
             return None
     
     async def handle_private_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -216,94 +385,264 @@ Hello {user.first_name}!
             if query:
                 await self.search_files(update, context, query)
             else:
-                await message.reply_text("🔍 Search query bhejen:\n`/search filename`", parse_mode=ParseMode.MARKDOWN)
+                await self.reply(message, "🔍 Search query bhejen:\n`/search filename`", parse_mode=ParseMode.MARKDOWN)
+    
+    async def throttled(self, update: Update, link):
+        """True (after a cheap notice) if this user or link is over its download rate"""
+        # Bundle ek link par kai files bhejta hai - har file ek download gino. Pehle se
+        # throttled user ke liye bundle lookup bhi nahi (random b- links par DB read nahi)
+        cost = 1
+        if link.startswith(BUNDLE_PREFIX) and not self.throttle.user_throttled(update.effective_user.id):
+            bundle = await db.get_bundle(link)
+            cost = len(bundle.files) if bundle else 1
+        limit = self.throttle.check(update.effective_user.id, link, cost)
+        if limit is None:
+            return False
+        
+        if update.callback_query:
+            # Button par chhota popup - naya message nahi, chat ka send quota bhi nahi lagta
+            await update.callback_query.answer(THROTTLE_TEXT[limit])
+        elif self.throttle_notices.check(update.effective_user.id):
+            await self.reply(update.message, THROTTLE_TEXT[limit])
+        return True
     
+    @timed(HANDLER_SECONDS, 'send_file_by_link')
     async def send_file_by_link(self, update: Update, context: ContextTypes.DEFAULT_TYPE, custom_link):
         """Send file using custom link"""
+        if custom_link.startswith(BUNDLE_PREFIX):
+            await self.send_bundle(update, context, custom_link)
+            return
+        
+        # Button click par update.message nahi hota
+        message = update.effective_message
+        
         # Get file from database
-        file_info = db.get_file_by_custom_link(custom_link)
+        file_info = await db.get_file_by_custom_link(custom_link)
         
         if not file_info:
-            await update.message.reply_text("❌ File not found or link invalid!")
+            await self.reply(message, "❌ File not found or link invalid!")
             return
         
-        # Increment download count
-        db.increment_download_count(file_info[1])  # file_id
+        # Download count + event log (buffered, flushed in batches)
+        db.record_download(file_info, update.effective_user.id)
+        downloads = file_info.download_count + db.pending_downloads(file_info.id)
+        caption = f"📁 {file_info.file_name}\n📥 Downloads: {downloads}"
         
         # Send file
         try:
-            await context.bot.send_chat_action(
-                chat_id=update.effective_chat.id,
-                action="upload_document"
-            )
+            chat_id = update.effective_chat.id
+            if self.chat_actions.check(chat_id):
+                await self.sender.send(chat_id, lambda: context.bot.send_chat_action(
+                    chat_id=chat_id,
+                    action="upload_document"
+                ), PRIORITY_FILE)
             
-            # Send based on file type
-            file_id = file_info[1]  # file_id column
-            
-            if file_info[10] == 'photo':  # file_type
-                await update.message.reply_photo(
-                    photo=file_id,
-                    caption=f"📁 {file_info[2]}\n📥 Downloads: {file_info[5]}"
-                )
-            elif file_info[10] == 'video':
-                await update.message.reply_video(
-                    video=file_id,
-                    caption=f"📁 {file_info[2]}\n📥 Downloads: {file_info[5]}"
-                )
-            elif file_info[10] == 'audio':
-                await update.message.reply_audio(
-                    audio=file_id,
-                    caption=f"📁 {file_info[2]}\n📥 Downloads: {file_info[5]}"
-                )
-            else:
-                await update.message.reply_document(
-                    document=file_id,
-                    caption=f"📁 {file_info[2]}\n📥 Downloads: {file_info[5]}"
-                )
+            # Files informational messages se pehle jaati hain
+            await self.sender.send(chat_id, self.file_sender(context, message, file_info, caption), PRIORITY_FILE)
                 
         except Exception as e:
             logger.error(f"Error sending file: {e}")
-            await update.message.reply_text("❌ Error sending file!")
+            await self.reply(message, "❌ Error sending file!")
+    
+    def file_sender(self, context, message, file_info, caption):
+        """Return a callable that sends one file in reply to message"""
+        # Send based on file type
+        if file_info.source_chat_id:
+            # Channel export se import hui file - original message copy karo
+            return lambda: context.bot.copy_message(
+                chat_id=message.chat_id,
+                from_chat_id=file_info.source_chat_id,
+                message_id=file_info.message_id,
+                caption=caption
+            )
+        elif file_info.file_type == 'photo':
+            return lambda: message.reply_photo(photo=file_info.file_id, caption=caption)
+        elif file_info.file_type == 'video':
+            return lambda: message.reply_video(video=file_info.file_id, caption=caption)
+        elif file_info.file_type == 'audio':
+            return lambda: message.reply_audio(audio=file_info.file_id, caption=caption)
+        else:
+            return lambda: message.reply_document(document=file_info.file_id, caption=caption)
+    
+    def media_batches(self, files):
+        """Split files (in order) into sendable albums of one media kind, max 10 each"""
+        batches = []
+        kind = None
+        for file_info in files:
+            # Imported files copy_message se hi jaati hain, album mein nahi
+            file_kind = None if file_info.source_chat_id else MEDIA_GROUP_KINDS.get(file_info.file_type, 'document')
+            if file_kind is None or file_kind != kind or len(batches[-1]) == MEDIA_GROUP_SIZE:
+                batches.append([])
+            batches[-1].append(file_info)
+            kind = file_kind
+        return batches
+    
+    @timed(HANDLER_SECONDS, 'send_bundle')
+    async def send_bundle(self, update: Update, context: ContextTypes.DEFAULT_TYPE, link):
+        """Send all files of a bundle link, up to 10 per media group"""
+        message = update.effective_message
+        bundle = await db.get_bundle(link)
+        if not bundle or not bundle.files:
+            await self.reply(message, "❌ Bundle not found or link invalid!")
+            return
+        
+        chat_id = update.effective_chat.id
+        if self.chat_actions.check(chat_id):
+            await self.sender.send(chat_id, lambda: context.bot.send_chat_action(
+                chat_id=chat_id,
+                action="upload_document"
+            ), PRIORITY_FILE)
+        
+        for file_info in bundle.files:
+            db.record_download(file_info, update.effective_user.id)
+        
+        header = f"📦 {bundle.title}\n" if bundle.title else ""
+        failed = 0
+        # Batches ek ke baad ek, taaki files bundle ke order mein pahunchein
+        for batch in self.media_batches(bundle.files):
+            captions = [f"📁 {file_info.file_name}" for file_info in batch]
+            if header:
+                captions[0], header = header + captions[0], ""
+            
+            if len(batch) > 1:
+                media = [
+                    INPUT_MEDIA.get(file_info.file_type, InputMediaDocument)(media=file_info.file_id, caption=caption)
+                    for file_info, caption in zip(batch, captions)
+                ]
+                try:
+                    await self.sender.send(chat_id, lambda media=media: message.reply_media_group(media=media),
+                                           PRIORITY_FILE)
+                    continue
+                except Exception as e:
+                    # Ek kharab file poora album rok deti hai - baaki files alag se bhejo
+                    logger.error(f"Error sending media group: {e}")
+            
+            for file_info, caption in zip(batch, captions):
+                try:
+                    await self.sender.send(chat_id, self.file_sender(context, message, file_info, caption), PRIORITY_FILE)
+                except Exception as e:
+                    logger.error(f"Error sending file: {e}")
+                    failed += 1
+        
+        if failed:
+            await self.reply(message, f"❌ {failed}/{len(bundle.files)} files nahi bhej paaye!")
+    
+    async def create_bundle(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/bundle <link> <link> ... - one link for many files"""
+        # Poora URL bhi chalega: https://t.me/bot?start=abc1234
+        links = [arg.rsplit('start=', 1)[-1] for arg in context.args]
+        links = [link for link in links if not link.startswith(BUNDLE_PREFIX)]
+        if len(links) < 2:
+            await self.reply(
+                update.message,
+                f"📦 Kam se kam 2 file links bhejen (max {BUNDLE_MAX_FILES}):\n`/bundle link1 link2 ...`",
+                parse_mode=ParseMode.MARKDOWN
+            )
+            return
+        
+        bundle = await db.create_bundle(links, update.effective_user.id)
+        if not bundle:
+            await self.reply(update.message, "❌ Koi valid file link nahi mila!")
+            return
+        
+        bundle_record = await db.get_bundle(bundle)
+        await self.reply(
+            update.message,
+            f"📦 **Bundle ready ({len(bundle_record.files)} files)**\n\n"
+            f"🔗 `https://t.me/{context.bot.username}?start={bundle}`",
+            parse_mode=ParseMode.MARKDOWN
+        )
     
-    async def my_files(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def my_files(self, update: Update, context: ContextTypes.DEFAULT_TYPE, cursor=None, newer=False):
         """Show user's uploaded files"""
         user_id = update.effective_user.id
         
-        # Get files from database (customize this query)
-        files = db.get_all_files(limit=10)
+        # Keyset pagination: har page utna hi sasta, chahe kitna bhi peeche jaayein
+        files = await db.get_user_files(user_id, limit=MYFILES_PAGE_SIZE, cursor=cursor, newer=newer)
+        has_more = len(files) > MYFILES_PAGE_SIZE
+        if newer:
+            files = files[-MYFILES_PAGE_SIZE:]
+        else:
+            files = files[:MYFILES_PAGE_SIZE]
         
         if not files:
-            await update.message.reply_text("📁 Aapne abhi tak koi file upload nahi ki!")
+            await self.reply(update.effective_message, "📁 Aapne abhi tak koi file upload nahi ki!")
             return
         
+        bot_username = context.bot.username
         text = "📁 **Aapki Files:**\n\n"
         for file in files:
             text += f"📄 {file[1]}\n"  # file_name
             text += f"📊 Size: {self.format_size(file[2])}\n"
             text += f"📥 Downloads: {file[3]}\n"
-            text += f"🔗 Link: /start_{file[5]}\n\n"
+            text += f"🔗 `https://t.me/{bot_username}?start={file[5]}`\n\n"
+        
+        # Cursor = (uploaded_at, id) of the first/last row on this page
+        has_newer = cursor is not None and (has_more or not newer)
+        has_older = has_more or (cursor is not None and newer)
+        buttons = []
+        if has_newer:
+            buttons.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"mf|p|{files[0][4]}|{files[0][0]}"))
+        if has_older:
+            buttons.append(InlineKeyboardButton("Next ➡️", callback_data=f"mf|n|{files[-1][4]}|{files[-1][0]}"))
+        reply_markup = InlineKeyboardMarkup([buttons]) if buttons else None
         
-        await update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
+        if cursor is not None:
+            await self.edit(update.callback_query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        else:
+            await self.reply(update.effective_message, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
     
-    async def search_files(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query):
+    @timed(HANDLER_SECONDS, 'search_files')
+    async def search_files(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query=None, offset=0):
         """Search files"""
-        results = db.search_files(query)
+        if query is None:
+            query = ' '.join(context.args or [])
+        if not query:
+            await self.reply(update.effective_message, "🔍 Search query bhejen:\n`/search filename`", parse_mode=ParseMode.MARKDOWN)
+            return
+        
+        # Next/Prev buttons ke liye query yaad rakho
+        context.user_data['search_query'] = query
+        
+        # Ek extra row maango taaki pata chale agla page hai ya nahi
+        results = await db.search_files(query, limit=SEARCH_PAGE_SIZE + 1, offset=offset)
+        has_more = len(results) > SEARCH_PAGE_SIZE
+        results = results[:SEARCH_PAGE_SIZE]
         
         if not results:
-            await update.message.reply_text(f"❌ '{query}' se koi file nahi mili!")
+            await self.reply(update.effective_message, f"❌ '{query}' se koi file nahi mili!")
             return
         
-        text = f"🔍 **Search Results for '{query}':**\n\n"
+        bot_username = context.bot.username
+        page = offset // SEARCH_PAGE_SIZE + 1
+        text = f"🔍 **Search Results for '{query}' (Page {page}):**\n\n"
         for file in results:
             text += f"📄 {file[1]}\n"
             text += f"📊 {self.format_size(file[2])}\n"
-            text += f"🔗 /get_{file[0]}\n\n"
+            text += f"🔗 `https://t.me/{bot_username}?start={file[4]}`\n\n"
         
-        await update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
+        buttons = []
+        if offset > 0:
+            buttons.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"search_{max(offset - SEARCH_PAGE_SIZE, 0)}"))
+        if has_more:
+            buttons.append(InlineKeyboardButton("Next ➡️", callback_data=f"search_{offset + SEARCH_PAGE_SIZE}"))
+        reply_markup = InlineKeyboardMarkup([buttons]) if buttons else None
+        
+        if update.callback_query:
+            await self.edit(update.callback_query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        else:
+            await self.reply(update.message, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
     
     async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show bot statistics"""
-        stats = db.get_stats()
+        stats = await db.get_stats()
+        updates = self.update_processor.stats()
+        throttle = self.throttle.stats()
+        
+        # Per-day rollups (pehle se maintain hote hain)
+        trend = ""
+        for day in stats['daily']:
+            trend += f"`{day['day']}` 📁 {day['files']} · 📥 {day['downloads']} · 👥 +{day['new_users']}\n"
         
         text = f"""
 📊 **Bot Statistics**
@@ -312,11 +651,121 @@ Hello {user.first_name}!
 💾 **Total Storage:** {self.format_size(stats['total_size'])}
 📥 **Total Downloads:** {stats['total_downloads']}
 👥 **Active Users:** {stats['total_users']}
+⚡ **Link Cache Hit Rate:** {stats['link_cache']['hit_rate']:.0%}
+♻️ **Duplicate Uploads:** {stats['duplicates']['hits']} ({stats['duplicates']['hit_rate']:.0%})
+🚦 **Throttled Downloads:** {throttle['rejected']} ({throttle['rejected_user']} user, {throttle['rejected_link']} link)
+⏳ **Update Queue:** {updates['pending']} pending (max {updates['max_pending']}, avg wait {updates['avg_wait'] * 1000:.0f} ms)
+
+📈 **Last 7 Days:**
+{trend or 'Abhi koi activity nahi'}
 
 🕐 Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         """
         
-        await update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
+        await self.reply(update.message, text, parse_mode=ParseMode.MARKDOWN)
+    
+    async def top_files(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/top [now|today|week] - most downloaded files"""
+        period = context.args[0].lower() if context.args else 'now'
+        if period not in TOP_PERIODS:
+            await self.reply(update.message, "🔥 Use: `/top now`, `/top today` ya `/top week`",
+                             parse_mode=ParseMode.MARKDOWN)
+            return
+        
+        rows = await db.top_files(period)
+        bot_username = context.bot.username
+        text = f"🔥 **{TOP_PERIODS[period]}**\n\n"
+        for rank, (file_name, custom_link, downloads) in enumerate(rows, 1):
+            text += f"{rank}. 📁 {file_name}\n📥 {downloads}"
+            if custom_link:
+                text += f" · 🔗 `https://t.me/{bot_username}?start={custom_link}`"
+            text += "\n\n"
+        if not rows:
+            text += "Abhi koi download nahi hua"
+        
+        await self.reply(update.message, text, parse_mode=ParseMode.MARKDOWN)
+    
+    async def temp_link(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/tlink <link> [30m|12h|7d] - temporary, revocable link to a file"""
+        ttl = TEMP_LINK_TTL
+        if len(context.args) > 1:
+            ttl = self.parse_duration(context.args[1])
+        if not context.args or ttl is None or ttl > TEMP_LINK_MAX_TTL:
+            await self.reply(
+                update.message,
+                f"⏳ Temporary link banayein:\n`/tlink file_link 12h`\n\n"
+                f"Duration: m/h/d (max {TEMP_LINK_MAX_TTL // DURATION_UNITS['d']}d, default "
+                f"{TEMP_LINK_TTL // DURATION_UNITS['h']}h)",
+                parse_mode=ParseMode.MARKDOWN
+            )
+            return
+        
+        file_link = context.args[0].rsplit('start=', 1)[-1]
+        created = await db.create_temp_link(file_link, update.effective_user.id, ttl)
+        if not created:
+            await self.reply(update.message, "❌ File not found or link invalid!")
+            return
+        
+        link, expires_at = created
+        await self.reply(
+            update.message,
+            f"⏳ **Temporary Link**\n\n"
+            f"🔗 `https://t.me/{context.bot.username}?start={link}`\n"
+            f"🕐 Expires: {expires_at.strftime('%Y-%m-%d %H:%M')}\n\n"
+            f"Band karna ho to: `/revoke {link}`",
+            parse_mode=ParseMode.MARKDOWN
+        )
+    
+    async def revoke_link(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/revoke <temporary link> - disable a link you created"""
+        link = context.args[0].rsplit('start=', 1)[-1] if context.args else ''
+        if not link.startswith(TEMP_PREFIX):
+            await self.reply(update.message, "🔗 Temporary link bhejen:\n`/revoke t-xxxxxxxxxx`",
+                             parse_mode=ParseMode.MARKDOWN)
+            return
+        
+        user_id = update.effective_user.id
+        if await db.revoke_link(link, user_id, admin=user_id in ADMIN_IDS):
+            await self.reply(update.message, "✅ Link band kar diya gaya!")
+        else:
+            await self.reply(update.message, "❌ Link nahi mila, pehle se band hai, ya aapka nahi hai!")
+    
+    def parse_duration(self, text):
+        """'30m' / '12h' / '7d' -> seconds (None if invalid)"""
+        match = re.fullmatch(r'(\d+)([mhd])', text.lower())
+        if not match or int(match.group(1)) == 0:
+            return None
+        return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+    
+    async def backup_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Take a database snapshot now (admins only); /backup export also writes files.jsonl.gz"""
+        if update.effective_user.id not in ADMIN_IDS:
+            await self.reply(update.message, "❌ Ye command sirf admins ke liye hai!")
+            return
+        
+        if self.backups is None:
+            await self.reply(update.message, "⏳ Bot abhi start ho raha hai, thodi der baad try karein.")
+            return
+        
+        await self.reply(update.message, "💾 Backup ban raha hai...")
+        try:
+            result = await self.backups.backup(export='export' in context.args)
+        except Exception as e:
+            logger.error(f"Backup failed: {e}")
+            await self.reply(update.message, f"❌ Backup fail ho gaya: {e}")
+            return
+        
+        text = (
+            f"✅ **Backup ready**\n\n"
+            f"📁 `{result.path}`\n"
+            f"💾 {self.format_size(result.size)} in {result.seconds:.1f}s "
+            f"(slowest step {result.max_step_ms:.0f} ms)"
+        )
+        if result.shard_paths:
+            text += f"\n🗂 + {len(result.shard_paths)} shard files (`{os.path.basename(result.shard_paths[0])}` ...)"
+        if result.export_path:
+            text += f"\n📝 `{result.export_path}` ({result.export_seconds:.1f}s)"
+        await self.reply(update.message, text, parse_mode=ParseMode.MARKDOWN)
     
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Help command"""
@@ -334,12 +783,17 @@ Hello {user.first_name}!
 
 **🔍 Search Files:**
 /search filename
+Ya kisi bhi chat mein: @botusername filename
 
 **📊 Commands:**
 /start - Start bot
 /myfiles - Your files
 /stats - Bot stats
+/top - Sabse zyada downloads (now/today/week)
 /search - Search
+/bundle - Ek link mein kai files
+/tlink - Expire hone wala link
+/revoke - Temporary link band karein
 /help - This menu
 
 **📌 Note:** Sirf supported groups mein upload ho sakta hai!
@@ -352,28 +806,84 @@ Need help? Contact @Admin
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await update.message.reply_text(
+        await self.reply(
+            update.message,
             help_text,
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=reply_markup
         )
     
+    @timed(HANDLER_SECONDS, 'inline_query')
+    async def inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Answer @bot queries from the in-memory file name index"""
+        query = update.inline_query
+        offset = int(query.offset) if query.offset.isdigit() else 0
+        
+        # Har keystroke par aata hai - SQLite nahi, sirf memory
+        entries = db.inline_index.search(query.query, INLINE_PAGE_SIZE, offset)
+        bot_username = context.bot.username
+        results = [self.inline_result(entry, bot_username) for entry in entries]
+        
+        next_offset = str(offset + len(entries)) if len(entries) == INLINE_PAGE_SIZE else ''
+        await query.answer(results, cache_time=INLINE_CACHE_TIME, next_offset=next_offset)
+    
+    def inline_result(self, entry, bot_username):
+        """Cached inline result for a file (Telegram already has it, nothing is uploaded)"""
+        result_id = str(entry.id)
+        # Bina naam ki file (title None) poore answerInlineQuery batch ko reject karwa deti hai
+        title = entry.file_name or entry.file_type
+        caption = f"📁 {title}"
+        reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton(
+            "📥 Get from bot", url=f"https://t.me/{bot_username}?start={entry.custom_link}"
+        )]])
+        
+        if entry.file_type == 'photo':
+            return InlineQueryResultCachedPhoto(
+                result_id, entry.file_id, title=title, caption=caption, reply_markup=reply_markup
+            )
+        if entry.file_type == 'video':
+            return InlineQueryResultCachedVideo(
+                result_id, entry.file_id, title, caption=caption, reply_markup=reply_markup
+            )
+        if entry.file_type == 'audio':
+            return InlineQueryResultCachedAudio(
+                result_id, entry.file_id, caption=caption, reply_markup=reply_markup
+            )
+        return InlineQueryResultCachedDocument(
+            result_id, title, entry.file_id, caption=caption,
+            description=self.format_size(entry.file_size or 0), reply_markup=reply_markup
+        )
+    
+    @timed(HANDLER_SECONDS, 'button_callback')
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle button clicks"""
         query = update.callback_query
-        await query.answer()
-        
         data = query.data
         
+        # Throttled download ka jawab answer() mein hi jaata hai, isliye pehle check
+        if data.startswith("get_") and await self.throttled(update, data.replace("get_", "")):
+            return
+        await query.answer()
+        
         if data == "myfiles":
             await self.my_files(update, context)
+        elif data.startswith("mf|"):
+            _, direction, uploaded_at, file_pk = data.split("|")
+            await self.my_files(update, context, cursor=(uploaded_at, int(file_pk)), newer=(direction == "p"))
         elif data == "search":
-            await query.edit_message_text("🔍 Search query bhejen: /search filename")
+            await self.edit(query, "🔍 Search query bhejen: /search filename")
+        elif data.startswith("search_"):
+            search_query = context.user_data.get('search_query')
+            if not search_query:
+                await self.edit(query, "🔍 Search query bhejen: /search filename")
+                return
+            offset = int(data.replace("search_", ""))
+            await self.search_files(update, context, search_query, offset)
         elif data.startswith("copy_"):
             custom_link = data.replace("copy_", "")
             bot_username = context.bot.username
             file_url = f"https://t.me/{bot_username}?start={custom_link}"
-            await query.edit_message_text(f"🔗 **Copy this link:**\n\n`{file_url}`", parse_mode=ParseMode.MARKDOWN)
+            await self.edit(query, f"🔗 **Copy this link:**\n\n`{file_url}`", parse_mode=ParseMode.MARKDOWN)
         elif data.startswith("get_"):
             custom_link = data.replace("get_", "")
             await self.send_file_by_link(update, context, custom_link)
@@ -389,10 +899,76 @@ Need help? Contact @Admin
         else:
             return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
     
-    def run(self):
-        """Run the bot"""
-        # Create application
-        application = Application.builder().token(BOT_TOKEN).build()
+    async def post_init(self, application):
+        """Start database, sender and HTTP server"""
+        # Pehli DB query (aur migrations) yahin se shuru - warm cache check usse pehle hota hai
+        await db.start()
+        self.sender.start()
+        self.throttle.start()
+        self.web = KeepAliveServer(application if WEBHOOK_URL else None)
+        await self.web.start()
+        if WEBHOOK_URL:
+            await application.bot.set_webhook(
+                url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES
+            )
+        self.ready_at = time.monotonic()
+        logger.info(f"Ready in {(self.ready_at - STARTED_AT) * 1000:.0f} ms")
+        
+        # Backups cold path hain (pehla snapshot BACKUP_INTERVAL baad) - module ready ke baad load
+        from backup import BackupManager
+        self.backups = BackupManager(db.path, shard_paths=[shard.path for shard in db.shards])
+        self.backups.start()
+    
+    async def post_stop(self, application):
+        """Finish accepted updates and send pending replies while the bot can still make API calls"""
+        if self.web:
+            await self.web.stop()
+        if not await self.update_processor.drain(SHUTDOWN_DRAIN_TIMEOUT):
+            logger.warning(f"{self.update_processor.pending} updates still running at shutdown")
+        await self.ingest.stop()
+        await self.sender.stop()
+    
+    async def post_shutdown(self, application):
+        """Flush buffered writes and close database after bot stops"""
+        if self.backups:
+            await self.backups.stop()
+        await self.throttle.stop()
+        await db.close()
+    
+    async def run_webhook(self, application):
+        """Run the application on webhook updates until SIGINT/SIGTERM"""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        
+        await application.initialize()
+        try:
+            await self.post_init(application)
+            await application.start()
+            await stop.wait()
+        finally:
+            if application.running:
+                await application.stop()
+            await self.post_stop(application)
+            await application.shutdown()
+            await self.post_shutdown(application)
+    
+    def build_application(self, builder=None):
+        """Create the Application with all handlers (builder: pre-configured ApplicationBuilder)"""
+        builder = (
+            (builder or Application.builder().token(BOT_TOKEN))
+            .concurrent_updates(self.update_processor)
+            .post_init(self.post_init)
+            .post_stop(self.post_stop)
+            .post_shutdown(self.post_shutdown)
+        )
+        if WEBHOOK_URL:
+            # Updates hamare apne HTTP server se aate hain, Updater ki zaroorat nahi
+            builder = builder.updater(None)
+        application = builder.build()
         
         # Add handlers
         application.add_handler(CommandHandler("start", self.start))
@@ -400,6 +976,11 @@ Need help? Contact @Admin
         application.add_handler(CommandHandler("stats", self.stats))
         application.add_handler(CommandHandler("help", self.help_command))
         application.add_handler(CommandHandler("search", self.search_files))
+        application.add_handler(CommandHandler("bundle", self.create_bundle))
+        application.add_handler(CommandHandler("top", self.top_files))
+        application.add_handler(CommandHandler("tlink", self.temp_link))
+        application.add_handler(CommandHandler("revoke", self.revoke_link))
+        application.add_handler(CommandHandler("backup", self.backup_command))
         
         # Message handlers
         application.add_handler(MessageHandler(
@@ -407,16 +988,27 @@ Need help? Contact @Admin
             self.handle_private_message
         ))
         application.add_handler(MessageHandler(
-            filters.ALL & filters.ChatType.GROUP, 
+            filters.ALL & filters.ChatType.GROUPS, 
             self.handle_group_message
         ))
         
         # Callback handler
         application.add_handler(CallbackQueryHandler(self.button_callback))
         
+        # Inline mode (BotFather mein /setinline on hona chahiye)
+        application.add_handler(InlineQueryHandler(self.inline_query))
+        return application
+    
+    def run(self):
+        """Run the bot"""
+        application = self.build_application()
+        
         # Start bot
         print("🤖 Bot started! Press Ctrl+C to stop.")
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if WEBHOOK_URL:
+            asyncio.run(self.run_webhook(application))
+        else:
+            application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == '__main__':
     bot = StorageBot()
@@ -0,0 +1,140 @@
+import time
+import functools
+from bisect import bisect_left
+
+# Prometheus default buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# name -> metric. Sirf event loop thread se update hote hain, isliye locks nahi chahiye
+REGISTRY = {}
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values tuple -> count
+        REGISTRY[name] = self
+
+    def inc(self, *labelvalues, amount=1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        for labelvalues, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # aakhri = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram:
+    """Bucketed latency histogram, optionally split by labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}  # label values tuple -> _HistogramChild
+        REGISTRY[name] = self
+
+    def labels(self, *labelvalues):
+        """Child histogram for these label values (keep it around on hot paths)"""
+        child = self._children.get(labelvalues)
+        if child is None:
+            child = self._children[labelvalues] = _HistogramChild(self.buckets)
+        return child
+
+    def observe(self, value, *labelvalues):
+        self.labels(*labelvalues).observe(value)
+
+    def samples(self):
+        for labelvalues, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield self.name + '_bucket', _format_labels(self.labelnames, labelvalues, le), cumulative
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield self.name + '_sum', labels, child.sum
+            yield self.name + '_count', labels, child.count
+
+class CallbackMetric:
+    """Value read from func() at scrape time (existing counters, queue depths).
+
+    Same name dobara register karne par purana wala replace ho jaata hai.
+    """
+
+    def __init__(self, name, description, func, kind='gauge', labelnames=()):
+        self.name = name
+        self.description = description
+        self.func = func
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        REGISTRY[name] = self
+
+    def samples(self):
+        value = self.func()
+        if not isinstance(value, dict):
+            value = {(): value}
+        for labelvalues, v in value.items():
+            yield self.name, _format_labels(self.labelnames, labelvalues), v
+
+def timed(histogram, *labelvalues):
+    """Decorator: observe an async function's run time in histogram"""
+    child = histogram.labels(*labelvalues)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def render():
+    """All registered metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f'# HELP {metric.name} {metric.description}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{labels} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+# Hot paths ke metrics
+HANDLER_SECONDS = Histogram('bot_handler_seconds', 'Update handler run time', ['handler'])
+DB_QUERY_SECONDS = Histogram('bot_db_query_seconds', 'Database call time incl. pool wait',
+                             ['method'], buckets=DB_BUCKETS)
+API_CALLS = Counter('bot_api_calls_total', 'Outbound Bot API calls by result', ['result'])
@@ -0,0 +1,326 @@
+# Schema versions. Database version PRAGMA user_version mein rehta hai.
+# Purani migration kabhi edit mat karna - hamesha nayi add karo.
+# Har migration: (version, description, [statements]) - ek transaction mein chalti hai.
+
+MIGRATIONS = [
+    (1, 'base tables', [
+        # Files table
+        '''
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_id TEXT UNIQUE,
+            file_name TEXT,
+            file_size INTEGER,
+            mime_type TEXT,
+            caption TEXT,
+            uploaded_by INTEGER,
+            uploaded_at TIMESTAMP,
+            download_count INTEGER DEFAULT 0,
+            file_type TEXT,
+            file_unique_id TEXT,
+            message_id INTEGER,
+            custom_link TEXT UNIQUE
+        )
+        ''',
+        # Users table (tracking)
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            joined_at TIMESTAMP,
+            total_uploads INTEGER DEFAULT 0,
+            total_downloads INTEGER DEFAULT 0
+        )
+        ''',
+        # Links table
+        '''
+        CREATE TABLE IF NOT EXISTS links (
+            link_id TEXT PRIMARY KEY,
+            file_id TEXT,
+            created_at TIMESTAMP,
+            expires_at TIMESTAMP,
+            created_by INTEGER,
+            is_active BOOLEAN DEFAULT 1,
+            FOREIGN KEY (file_id) REFERENCES files(file_id)
+        )
+        ''',
+    ]),
+
+    (2, 'full-text search index on file name + caption', [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+            file_name, caption, content='files', content_rowid='id'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON files BEGIN
+            INSERT INTO files_fts(rowid, file_name, caption)
+            VALUES (new.id, new.file_name, new.caption);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files BEGIN
+            INSERT INTO files_fts(files_fts, rowid, file_name, caption)
+            VALUES ('delete', old.id, old.file_name, old.caption);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS files_fts_update AFTER UPDATE OF file_name, caption ON files BEGIN
+            INSERT INTO files_fts(files_fts, rowid, file_name, caption)
+            VALUES ('delete', old.id, old.file_name, old.caption);
+            INSERT INTO files_fts(rowid, file_name, caption)
+            VALUES (new.id, new.file_name, new.caption);
+        END
+        ''',
+        # Pehle se maujood files ko index mein daalo
+        "INSERT INTO files_fts(files_fts) VALUES ('rebuild')",
+    ]),
+
+    (3, 'secondary indexes on files', [
+        'CREATE INDEX IF NOT EXISTS idx_files_uploaded_at ON files(uploaded_at)',
+        'CREATE INDEX IF NOT EXISTS idx_files_uploaded_by ON files(uploaded_by, uploaded_at)',
+        'CREATE INDEX IF NOT EXISTS idx_files_file_unique_id ON files(file_unique_id)',
+    ]),
+
+    (4, 'maintained stats totals + per-day rollups', [
+        # Ek hi row - /stats ko poori table scan nahi karni padti
+        '''
+        CREATE TABLE IF NOT EXISTS stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_files INTEGER NOT NULL DEFAULT 0,
+            total_size INTEGER NOT NULL DEFAULT 0,
+            total_downloads INTEGER NOT NULL DEFAULT 0,
+            total_users INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT PRIMARY KEY,
+            files INTEGER NOT NULL DEFAULT 0,
+            bytes INTEGER NOT NULL DEFAULT 0,
+            downloads INTEGER NOT NULL DEFAULT 0,
+            new_users INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        # Backfill from existing data (triggers abhi bane nahi, isliye double count nahi hoga)
+        '''
+        INSERT OR IGNORE INTO users (user_id, joined_at, total_uploads)
+        SELECT uploaded_by, MIN(uploaded_at), COUNT(*) FROM files
+        WHERE uploaded_by IS NOT NULL GROUP BY uploaded_by
+        ''',
+        '''
+        INSERT OR REPLACE INTO stats (id, total_files, total_size, total_downloads, total_users)
+        SELECT 1, COUNT(*), COALESCE(SUM(file_size), 0), COALESCE(SUM(download_count), 0),
+               (SELECT COUNT(*) FROM users)
+        FROM files
+        ''',
+        '''
+        INSERT OR REPLACE INTO daily_stats (day, files, bytes)
+        SELECT date(uploaded_at), COUNT(*), COALESCE(SUM(file_size), 0) FROM files
+        WHERE uploaded_at IS NOT NULL GROUP BY date(uploaded_at)
+        ''',
+        # Uploader pehli baar aaya to users mein add (users trigger total_users badhata hai)
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_file_insert AFTER INSERT ON files BEGIN
+            INSERT OR IGNORE INTO users (user_id, joined_at)
+            SELECT new.uploaded_by, new.uploaded_at WHERE new.uploaded_by IS NOT NULL;
+            UPDATE users SET total_uploads = total_uploads + 1 WHERE user_id = new.uploaded_by;
+            UPDATE stats SET total_files = total_files + 1,
+                             total_size = total_size + COALESCE(new.file_size, 0)
+            WHERE id = 1;
+            INSERT INTO daily_stats (day, files, bytes)
+            VALUES (date(COALESCE(new.uploaded_at, 'now')), 1, COALESCE(new.file_size, 0))
+            ON CONFLICT(day) DO UPDATE SET files = files + 1, bytes = bytes + excluded.bytes;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_file_delete AFTER DELETE ON files BEGIN
+            UPDATE stats SET total_files = total_files - 1,
+                             total_size = total_size - COALESCE(old.file_size, 0),
+                             total_downloads = total_downloads - old.download_count
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_downloads AFTER UPDATE OF download_count ON files BEGIN
+            UPDATE stats SET total_downloads = total_downloads + new.download_count - old.download_count
+            WHERE id = 1;
+            INSERT INTO daily_stats (day, downloads)
+            VALUES (date('now', 'localtime'), new.download_count - old.download_count)
+            ON CONFLICT(day) DO UPDATE SET downloads = downloads + excluded.downloads;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_user_insert AFTER INSERT ON users BEGIN
+            UPDATE stats SET total_users = total_users + 1 WHERE id = 1;
+            INSERT INTO daily_stats (day, new_users)
+            VALUES (date(COALESCE(new.joined_at, 'now')), 1)
+            ON CONFLICT(day) DO UPDATE SET new_users = new_users + 1;
+        END
+        ''',
+    ]),
+
+    (5, 'imported files from channel exports + import checkpoints', [
+        # Export mein Bot API file_id nahi hota - bot source message copy karta hai
+        'ALTER TABLE files ADD COLUMN source_chat_id INTEGER',
+        '''
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY,
+            last_message_id INTEGER NOT NULL,
+            imported INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP
+        )
+        ''',
+    ]),
+
+    (6, 'bundle links (one link -> ordered set of files)', [
+        '''
+        CREATE TABLE IF NOT EXISTS bundles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            created_by INTEGER,
+            created_at TIMESTAMP
+        )
+        ''',
+        # file_pk = files.id (file_id naam pehle se Telegram file_id ke liye hai)
+        '''
+        CREATE TABLE IF NOT EXISTS bundle_items (
+            bundle_id INTEGER NOT NULL REFERENCES bundles(id),
+            position INTEGER NOT NULL,
+            file_pk INTEGER NOT NULL REFERENCES files(id),
+            PRIMARY KEY (bundle_id, position)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+
+    (7, 'expiring / revocable links in the links table', [
+        # Sirf active + expiring links index mein - sweeper ka kaam expire hone
+        # wale links jitna hi, chahe table mein kitne bhi purane links hon
+        '''
+        CREATE INDEX IF NOT EXISTS idx_links_expiry ON links(expires_at)
+        WHERE is_active = 1 AND expires_at IS NOT NULL
+        ''',
+    ]),
+
+    (8, 'download event log + hourly/daily download rollups', [
+        # Append-only: har delivery ek row, kabhi update nahi hoti. at = unix seconds
+        '''
+        CREATE TABLE IF NOT EXISTS download_events (
+            id INTEGER PRIMARY KEY,
+            file_pk INTEGER NOT NULL,
+            user_id INTEGER,
+            at INTEGER NOT NULL
+        )
+        ''',
+        # Restart par trending ring pichle ghante ke events se bharta hai
+        'CREATE INDEX IF NOT EXISTS idx_download_events_at ON download_events(at)',
+        # Rollups event batches ke saath hi update hote hain (same transaction)
+        '''
+        CREATE TABLE IF NOT EXISTS download_hourly (
+            hour INTEGER NOT NULL,
+            file_pk INTEGER NOT NULL,
+            downloads INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, file_pk)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS download_daily (
+            day TEXT NOT NULL,
+            file_pk INTEGER NOT NULL,
+            downloads INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, file_pk)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+
+    (9, 'file_pk on temporary links + link routes for sharded storage', [
+        # Sharded storage mein links (home DB) aur files (shards) alag files mein hain -
+        # join nahi ho sakta, isliye files.id seedha rakho
+        'ALTER TABLE links ADD COLUMN file_pk INTEGER',
+        # Sharded storage: custom names (vanity links) -> files.id. Encoded links ko
+        # iski zaroorat nahi, unka shard link se hi pata chal jaata hai
+        '''
+        CREATE TABLE IF NOT EXISTS link_routes (
+            link TEXT PRIMARY KEY,
+            file_pk INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_link_routes_file ON link_routes(file_pk)',
+    ]),
+
+    (10, 'daily stats triggers bucket by UTC day', [
+        # v4 ke triggers mein uploads/new users local time (uploaded_at, joined_at
+        # naive local hain) aur downloads 'localtime' se - sab UTC day par laao,
+        # warna non-UTC host par ek hi din ke uploads/downloads alag rows mein
+        'DROP TRIGGER IF EXISTS stats_file_insert',
+        '''
+        CREATE TRIGGER stats_file_insert AFTER INSERT ON files BEGIN
+            INSERT OR IGNORE INTO users (user_id, joined_at)
+            SELECT new.uploaded_by, new.uploaded_at WHERE new.uploaded_by IS NOT NULL;
+            UPDATE users SET total_uploads = total_uploads + 1 WHERE user_id = new.uploaded_by;
+            UPDATE stats SET total_files = total_files + 1,
+                             total_size = total_size + COALESCE(new.file_size, 0)
+            WHERE id = 1;
+            INSERT INTO daily_stats (day, files, bytes)
+            VALUES (COALESCE(date(new.uploaded_at, 'utc'), date('now')), 1, COALESCE(new.file_size, 0))
+            ON CONFLICT(day) DO UPDATE SET files = files + 1, bytes = bytes + excluded.bytes;
+        END
+        ''',
+        'DROP TRIGGER IF EXISTS stats_downloads',
+        '''
+        CREATE TRIGGER stats_downloads AFTER UPDATE OF download_count ON files BEGIN
+            UPDATE stats SET total_downloads = total_downloads + new.download_count - old.download_count
+            WHERE id = 1;
+            INSERT INTO daily_stats (day, downloads)
+            VALUES (date('now'), new.download_count - old.download_count)
+            ON CONFLICT(day) DO UPDATE SET downloads = downloads + excluded.downloads;
+        END
+        ''',
+        'DROP TRIGGER IF EXISTS stats_user_insert',
+        '''
+        CREATE TRIGGER stats_user_insert AFTER INSERT ON users BEGIN
+            UPDATE stats SET total_users = total_users + 1 WHERE id = 1;
+            INSERT INTO daily_stats (day, new_users)
+            VALUES (COALESCE(date(new.joined_at, 'utc'), date('now')), 1)
+            ON CONFLICT(day) DO UPDATE SET new_users = new_users + 1;
+        END
+        ''',
+    ]),
+
+    (11, 'download_daily by UTC day, drop unused download_hourly', [
+        # Hourly rollup koi padhta nahi tha (trending ring per-minute events se bharta hai)
+        'DROP TABLE IF EXISTS download_hourly',
+        # v8 ke daily rows local day par the - event log (kabhi delete nahi hota) se
+        # UTC day par dobara banao, daily_stats jaisa
+        'DELETE FROM download_daily',
+        '''
+        INSERT INTO download_daily (day, file_pk, downloads)
+        SELECT date(at, 'unixepoch'), file_pk, COUNT(*) FROM download_events
+        GROUP BY date(at, 'unixepoch'), file_pk
+        ''',
+    ]),
+]
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn):
+    """Apply all pending migrations; safe to run on every startup"""
+    current = schema_version(conn)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {version}')
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        print(f"Database migrated to v{version}: {description}")
+        current = version
+    return current
@@ -0,0 +1,127 @@
+import re
+import sys
+import heapq
+from bisect import bisect_left, insort
+from collections import namedtuple
+from itertools import islice
+
+# Inline result banane ke liye bas itna chahiye
+InlineEntry = namedtuple('InlineEntry', 'id file_id file_type file_name file_size custom_link')
+
+def tokenize(text):
+    """Lowercase words of a file name / query ("_" bhi separator, FTS5 ki tarah)"""
+    return re.findall(r'[^\W_]+', text.lower())
+
+def _dedupe(pks):
+    last = None
+    for pk in pks:
+        if pk != last:
+            yield pk
+            last = pk
+
+class PrefixIndex:
+    """In-memory word-prefix index over file names, newest files first.
+
+    Har word ki posting list (files.id ascending) aur saare words ki sorted list
+    rakhte hain. Query ke aakhri word ko prefix maana jaata hai ("lecture no" ->
+    "lecture" + "no*"), baaki words poore match hone chahiye - bilkul /search ki
+    tarah, par SQLite ke bina.
+    """
+
+    # Prefix itne zyada words se match kare to posting lists merge karne ki
+    # jagah seedha naye files scan karo (common prefix = jaldi matches milenge)
+    MAX_MERGE_WORDS = 256
+    MAX_SCAN = 50000
+
+    def __init__(self):
+        self._entries = {}  # files.id -> InlineEntry
+        self._words = {}  # files.id -> tuple of words in the name
+        self._postings = {}  # word -> [files.id, ...] ascending
+        self._vocab = []  # distinct words (sorted jab _vocab_sorted ho)
+        self._vocab_sorted = True
+        self._order = []  # saare files.id ascending
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, file_pk):
+        return file_pk in self._entries
+
+    def entries(self):
+        return self._entries.values()
+
+    def add(self, entry):
+        """Index a file (ignored if its id is already indexed)"""
+        if entry.id in self._entries:
+            return
+        words = tuple(sorted({sys.intern(word) for word in tokenize(entry.file_name or '')}))
+        self._entries[entry.id] = entry
+        self._words[entry.id] = words
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                self._postings[word] = [entry.id]
+                # Naye words aakhir mein; agli search par ek baar sort (timsort, almost sorted)
+                self._vocab.append(word)
+                self._vocab_sorted = False
+            elif postings[-1] < entry.id:
+                postings.append(entry.id)
+            else:
+                insort(postings, entry.id)
+        if not self._order or self._order[-1] < entry.id:
+            self._order.append(entry.id)
+        else:
+            insort(self._order, entry.id)
+
+    def set_link(self, file_pk, custom_link):
+        entry = self._entries.get(file_pk)
+        if entry is not None:
+            self._entries[file_pk] = entry._replace(custom_link=custom_link)
+
+    def _prefix_words(self, prefix):
+        if not self._vocab_sorted:
+            self._vocab.sort()
+            self._vocab_sorted = True
+        lo = bisect_left(self._vocab, prefix)
+        hi = bisect_left(self._vocab, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo)
+        return self._vocab[lo:hi]
+
+    def search(self, query, limit=20, offset=0):
+        """Newest files whose name matches query; list of InlineEntry"""
+        words = tokenize(query)
+        if not words:
+            pks = reversed(self._order)
+            return [self._entries[pk] for pk in islice(pks, offset, offset + limit)]
+
+        *exact, prefix = words
+        for word in exact:
+            if word not in self._postings:
+                return []
+        prefix_words = self._prefix_words(prefix)
+        if not prefix_words:
+            return []
+
+        # Sabse kam candidates wali list chalao, baaki words har candidate par check
+        shortest = min((self._postings[word] for word in exact), key=len) if exact else None
+        prefix_size = None
+        if len(prefix_words) <= self.MAX_MERGE_WORDS:
+            prefix_size = sum(len(self._postings[word]) for word in prefix_words)
+
+        if prefix_size is not None and (shortest is None or prefix_size < len(shortest)):
+            candidates = _dedupe(heapq.merge(
+                *(reversed(self._postings[word]) for word in prefix_words), reverse=True
+            ))
+        elif shortest is not None:
+            candidates = reversed(shortest)
+        else:
+            candidates = islice(reversed(self._order), self.MAX_SCAN)
+
+        found = []
+        needed = offset + limit
+        for pk in candidates:
+            names = self._words[pk]
+            if all(word in names for word in exact) and any(name.startswith(prefix) for name in names):
+                found.append(pk)
+                if len(found) == needed:
+                    break
+        return [self._entries[pk] for pk in found[offset:]]
@@ -0,0 +1,184 @@
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from datetime import timedelta
+from telegram.error import RetryAfter
+from metrics import API_CALLS
+from config import (
+    GLOBAL_SEND_RATE, PRIVATE_CHAT_SEND_RATE, PRIVATE_CHAT_BURST,
+    GROUP_CHAT_SEND_RATE, GROUP_CHAT_BURST, SEND_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+# Chhota number = pehle bheja jayega
+PRIORITY_FILE = 0
+PRIORITY_INFO = 1
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/sec, at most `capacity` saved up"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now=None):
+        """Seconds until one token is available (0 if available now)"""
+        now = now or time.monotonic()
+        if now < self.updated:
+            # RetryAfter pause abhi chal raha hai
+            return self.updated - now + max(0.0, 1 - self.tokens) / self.rate
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        self._refill(now or time.monotonic())
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        """Give out no tokens for `seconds` (Telegram RetryAfter)"""
+        self.tokens = min(1, self.capacity)
+        self.updated = max(self.updated, time.monotonic() + seconds)
+
+    def is_idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+class OutboundScheduler:
+    """Central queue for Bot API calls with global + per-chat rate limits"""
+
+    def __init__(self, workers=SEND_WORKERS):
+        self.workers = workers
+        self.global_bucket = TokenBucket(GLOBAL_SEND_RATE, GLOBAL_SEND_RATE)
+        self._chat_buckets = {}
+        self._queue = []  # heap of (priority, seq, chat_id, call, future)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self._delayed = 0  # jobs waiting for their chat bucket / RetryAfter
+        self._in_flight = 0
+
+    def _bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                now = time.monotonic()
+                self._chat_buckets = {
+                    cid: b for cid, b in self._chat_buckets.items() if not b.is_idle(now)
+                }
+            # Private chats ki id positive, groups/channels ki negative
+            if chat_id > 0:
+                bucket = TokenBucket(PRIVATE_CHAT_SEND_RATE, PRIVATE_CHAT_BURST)
+            else:
+                bucket = TokenBucket(GROUP_CHAT_SEND_RATE, GROUP_CHAT_BURST)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def send(self, chat_id, call, priority=PRIORITY_INFO):
+        """Queue call() (returns an awaitable API request) and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        self._push((priority, next(self._seq), chat_id, call, future))
+        return await future
+
+    def _push(self, job):
+        heapq.heappush(self._queue, job)
+        self._wakeup.set()
+
+    def _push_later(self, delay, job):
+        self._delayed += 1
+
+        def push():
+            self._delayed -= 1
+            self._push(job)
+
+        asyncio.get_running_loop().call_later(delay, push)
+
+    async def _worker(self):
+        while True:
+            while not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            wait = self.global_bucket.delay()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+
+            job = heapq.heappop(self._queue)
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                # Worker kabhi nahi marna chahiye - warna har aisi galti ek worker kam kar deti hai
+                logger.exception(f"Outbound worker error: {e}")
+
+    async def _run_job(self, job):
+        priority, seq, chat_id, call, future = job
+        if future.done():
+            return
+
+        # Is chat ka bucket khaali hai - baaki chats ko mat roko
+        bucket = self._bucket(chat_id)
+        wait = bucket.delay()
+        if wait:
+            self._push_later(wait, job)
+            return
+
+        self.global_bucket.take()
+        bucket.take()
+        self._in_flight += 1
+        try:
+            result = await call()
+        except RetryAfter as e:
+            API_CALLS.inc('retry_after')
+            # PTB versions differ: int seconds ya timedelta
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            logger.warning(f"Flood limit hit for chat {chat_id}, retrying in {retry_after}s")
+            bucket.pause(retry_after)
+            self._push_later(retry_after, job)
+        except Exception as e:
+            API_CALLS.inc('error')
+            # Caller call ke dauraan cancel ho gaya ho to future pehle se done hai
+            if not future.done():
+                future.set_exception(e)
+        else:
+            API_CALLS.inc('ok')
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._in_flight -= 1
+
+    def start(self):
+        """Start worker tasks (call from inside the event loop)"""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout=10):
+        """Send whatever is still queued, then stop the workers"""
+        deadline = time.monotonic() + timeout
+        while (self._queue or self._delayed or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self):
+        return {
+            'queued': len(self._queue),
+            'delayed': self._delayed,
+            'in_flight': self._in_flight,
+            'chats': len(self._chat_buckets)
+        }
@@ -0,0 +1,417 @@
+"""
+Sharded storage: files table kai SQLite files mein.
+
+Home DB (storage.db) mein links, bundles, download events/rollups, users aur
+import checkpoints rehte hain; files ki rows storage-shard{i}.db mein. Har shard
+apne aap mein ek Database hai (apna writer thread), isliye alag shards par writes
+ek saath chalte hain - ek file ka single-writer lock poora ingest nahi rokta, aur
+koi ek file bina hadd ke nahi badhti.
+
+Routing: link = encode_link(files.id), aur file us shard mein hai jahan
+crc32(link) % N - link se lookup hamesha ek hi shard par. Naya file kis shard mein
+jaaye ye file_unique_id (imports mein file_id) ka hash tay karta hai, aur wo shard
+sirf wahi ids deta hai jinka link usi shard par aata hai. Isliye ek file ke saare
+duplicates ek hi shard mein milte hain - dedup aur id allocation shard ke apne write
+transaction mein, shards ke beech koi lock nahi. Custom names (vanity links) ka
+files.id home DB ki link_routes table batati hai. Search, stats aur /myfiles saare
+shards par parallel chalte hain aur results merge hote hain.
+"""
+import os
+import zlib
+import heapq
+import asyncio
+import datetime
+from itertools import chain
+from cache import FileRecord, BundleRecord
+from prefix_index import PrefixIndex, InlineEntry
+from database import (
+    Database, IngestResult, encode_link, decode_link, decode_bundle_link,
+    clean_link_name, fts_match, BUNDLE_PREFIX, TEMP_PREFIX
+)
+from migrations import schema_version
+from config import DATABASE_NAME, DB_READ_POOL_SIZE, DB_SHARDS, DB_SHARD_READ_POOL_SIZE, BUNDLE_MAX_FILES
+
+RECORD_COLUMNS = 'id, file_id, file_type, file_name, download_count, source_chat_id, message_id'
+
+def shard_path(path, index):
+    """File of shard `index` next to the home database at path (storage.db -> storage-shard0.db)"""
+    base, ext = os.path.splitext(path)
+    return f'{base}-shard{index}{ext}'
+
+def shard_index(key, shard_count):
+    """Shard number of a file link or file_unique_id (stable across restarts, unlike hash())"""
+    return zlib.crc32(key.encode()) % shard_count
+
+# Shard connections par chalne wali queries
+
+def _records_by_pks(conn, file_pks):
+    return [FileRecord(*row) for row in conn.execute(f'''
+        SELECT {RECORD_COLUMNS} FROM files WHERE id IN ({','.join('?' * len(file_pks))})
+    ''', file_pks)]
+
+def _file_pk_by_file_id(conn, file_id):
+    row = conn.execute('SELECT id FROM files WHERE file_id = ?', (file_id,)).fetchone()
+    return row[0] if row else None
+
+def _set_custom_link(conn, file_pk, link):
+    with conn:
+        conn.execute('UPDATE files SET custom_link = ? WHERE id = ?', (link, file_pk))
+
+def _add_downloads(conn, items):
+    with conn:
+        conn.executemany('''
+            UPDATE files SET download_count = download_count + ?
+            WHERE id = ?
+        ''', [(count, file_pk) for file_pk, count in items])
+
+def _search_scored(conn, match, limit):
+    return conn.execute('''
+        SELECT bm25(files_fts, 10.0, 1.0), f.file_id, f.file_name, f.file_size, f.file_type, f.custom_link
+        FROM files_fts
+        JOIN files f ON f.id = files_fts.rowid
+        WHERE files_fts MATCH ?
+        ORDER BY bm25(files_fts, 10.0, 1.0)
+        LIMIT ?
+    ''', (match, limit)).fetchall()
+
+def _all_files(conn, limit):
+    return conn.execute('''
+        SELECT file_id, file_name, file_size, download_count,
+               uploaded_at, custom_link, file_type
+        FROM files
+        ORDER BY uploaded_at DESC
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+def _inline_rows(conn):
+    return conn.execute('''
+        SELECT id, file_id, file_type, file_name, file_size, custom_link
+        FROM files WHERE source_chat_id IS NULL ORDER BY id
+    ''').fetchall()
+
+# Home connection par
+
+def _link_route(conn, link):
+    row = conn.execute('SELECT file_pk FROM link_routes WHERE link = ?', (link,)).fetchone()
+    return row[0] if row else None
+
+def _set_link_route(conn, file_pk, link):
+    """Point link (None = only the encoded link) at file_pk; False if another file has it"""
+    with conn:
+        if link is not None:
+            owner = _link_route(conn, link)
+            if owner is not None and owner != file_pk:
+                return False
+        conn.execute('DELETE FROM link_routes WHERE file_pk = ?', (file_pk,))
+        if link is not None:
+            conn.execute('INSERT INTO link_routes (link, file_pk) VALUES (?, ?)', (link, file_pk))
+    return True
+
+def _add_uploaders(conn, uploaders):
+    # Users home DB mein - ek user kai shards mein upload kare to bhi ek hi baar gina jaaye
+    with conn:
+        conn.executemany('''
+            INSERT OR IGNORE INTO users (user_id, joined_at) VALUES (?, ?)
+        ''', uploaders)
+
+def _temp_link_target(conn, link, now):
+    return conn.execute('''
+        SELECT file_pk, expires_at FROM links
+        WHERE link_id = ? AND is_active = 1 AND (expires_at IS NULL OR expires_at > ?)
+    ''', (link, now)).fetchone()
+
+def _bundle_items(conn, bundle_pk):
+    row = conn.execute('SELECT title FROM bundles WHERE id = ?', (bundle_pk,)).fetchone()
+    if row is None:
+        return None
+    return row[0], [file_pk for file_pk, in conn.execute('''
+        SELECT file_pk FROM bundle_items WHERE bundle_id = ? ORDER BY position
+    ''', (bundle_pk,))]
+
+
+class Shard(Database):
+    """One shard's database; hands out only the file ids whose links route to it"""
+
+    def __init__(self, path, index, count, read_pool_size=DB_SHARD_READ_POOL_SIZE, lazy=False):
+        super().__init__(path, read_pool_size, lazy, shards=1)
+        self.index = index
+        self.count = count
+
+    def _next_file_pk(self, last_pk):
+        # Har N mein ~1 id is shard ki - encode_link sasta hai, loop chhota
+        file_pk = last_pk + 1
+        while shard_index(encode_link(file_pk), self.count) != self.index:
+            file_pk += 1
+        return file_pk
+
+
+class ShardedDatabase(Database):
+    """Database whose files table is spread over several SQLite files (see module docstring)"""
+
+    def __init__(self, path=DATABASE_NAME, read_pool_size=DB_READ_POOL_SIZE, lazy=False, warm_cache=None,
+                 shards=None):
+        super().__init__(path, read_pool_size, lazy, warm_cache, shards=1)
+        shard_count = DB_SHARDS if shards is None else shards
+        self.shards = [Shard(shard_path(path, i), i, shard_count, lazy=lazy) for i in range(shard_count)]
+        # Jin uploaders ko home users table mein daal chuke (har add par home write na ho)
+        self._known_uploaders = set()
+
+    def shard_for_content(self, file_unique_id):
+        return self.shards[shard_index(file_unique_id, len(self.shards))]
+
+    def shard_for_pk(self, file_pk):
+        return self.shards[shard_index(encode_link(file_pk), len(self.shards))]
+
+    async def _fan_out(self, func, *args):
+        """Run func(conn, *args) on every shard in parallel; one result per shard"""
+        return await asyncio.gather(*(shard._read(func, *args) for shard in self.shards))
+
+    async def _records(self, file_pks):
+        """{files.id: FileRecord}, one query per shard involved"""
+        by_shard = {}
+        for file_pk in file_pks:
+            by_shard.setdefault(self.shard_for_pk(file_pk), []).append(file_pk)
+        found = await asyncio.gather(*(shard._read(_records_by_pks, pks) for shard, pks in by_shard.items()))
+        return {record.id: record for record in chain.from_iterable(found)}
+
+    async def _store_files(self, entries):
+        batches = {}
+        for position, entry in enumerate(entries):
+            shard = self.shard_for_content(entry['file_unique_id'] or entry['file_id'])
+            batches.setdefault(shard, []).append(position)
+
+        # Har shard apna hissa apne writer thread par - shards ek saath likhte hain.
+        # Ek shard fail ho to sirf uski files 'error' - baaki shards commit ho chuke hain
+        batches = list(batches.items())
+        found = await asyncio.gather(
+            *(shard._write(shard._add_files, [entries[i] for i in positions]) for shard, positions in batches),
+            return_exceptions=True
+        )
+        results = [None] * len(entries)
+        for (_, positions), shard_results in zip(batches, found):
+            if isinstance(shard_results, Exception):
+                print(f"Database error: {shard_results}")
+                shard_results = [IngestResult('error', None)] * len(positions)
+            for position, result in zip(positions, shard_results):
+                results[position] = result
+
+        # Naye uploaders home users table mein bhi (total_users / new users wahin se)
+        uploaders = {}
+        for entry, result in zip(entries, results):
+            uploader = entry['uploaded_by']
+            if result.status == 'added' and uploader is not None and uploader not in self._known_uploaders:
+                uploaders.setdefault(uploader, entry.get('uploaded_at') or datetime.datetime.now())
+        if uploaders:
+            await self._write(_add_uploaders, list(uploaders.items()))
+            self._known_uploaders.update(uploaders)
+        return results
+
+    async def find_duplicate(self, file_unique_id):
+        """Link of an already saved file with the same content, or None"""
+        shard = self.shard_for_content(file_unique_id)
+        row = await shard._read(shard._find_duplicate, file_unique_id)
+        if row is None:
+            return None
+        self.uploads_seen += 1
+        self.duplicate_hits += 1
+        return row[0]
+
+    async def _load_link(self, custom_link):
+        if decode_link(custom_link) is not None:
+            shard = self.shards[shard_index(custom_link, len(self.shards))]
+        else:
+            # Custom name - kis file ka hai, home DB batata hai
+            file_pk = await self._read(_link_route, custom_link)
+            if file_pk is None:
+                return None
+            shard = self.shard_for_pk(file_pk)
+        record = await shard._read(shard._get_file_by_custom_link, custom_link)
+        if record is not None:
+            self.link_cache.put(custom_link, record)
+        return record
+
+    async def _load_temp_link(self, link):
+        row = await self._read(_temp_link_target, link, datetime.datetime.now())
+        if row is None or row[0] is None:
+            return None
+        file_pk, expires_at = row
+        record = (await self._records([file_pk])).get(file_pk)
+        if record is None:
+            return None
+        ttl = None
+        if expires_at is not None:
+            ttl = (datetime.datetime.fromisoformat(expires_at) - datetime.datetime.now()).total_seconds()
+        self.temp_link_cache.put(link, record, ttl)
+        return record
+
+    async def create_bundle(self, links, created_by, title=None):
+        """Create a bundle of the files behind links (in that order); returns its link or None"""
+        links = [link for link in links[:BUNDLE_MAX_FILES] if not link.startswith((BUNDLE_PREFIX, TEMP_PREFIX))]
+        try:
+            records = await asyncio.gather(*(self.get_file_by_custom_link(link) for link in links))
+            file_pks = list(dict.fromkeys(record.id for record in records if record is not None))
+            return await self._write(self._insert_bundle, file_pks, created_by, title)
+        except Exception as e:
+            print(f"Database error: {e}")
+            return None
+
+    async def _load_bundle(self, link):
+        bundle_pk = decode_bundle_link(link)
+        if bundle_pk is None:
+            return None
+        row = await self._read(_bundle_items, bundle_pk)
+        if row is None:
+            return None
+        title, file_pks = row
+        records = await self._records(file_pks)
+        record = BundleRecord(bundle_pk, title, [records[pk] for pk in file_pks if pk in records])
+        self.bundle_cache.put(link, record)
+        return record
+
+    async def get_file_by_file_id(self, file_id):
+        """Get file info by telegram file_id"""
+        for row in await asyncio.gather(*(shard._read(shard._get_file_by_file_id, file_id)
+                                          for shard in self.shards)):
+            if row is not None:
+                return row
+        return None
+
+    async def get_all_files(self, limit=50, offset=0):
+        """Get all files with pagination"""
+        rows = chain.from_iterable(await self._fan_out(_all_files, limit + offset))
+        return sorted(rows, key=lambda row: row[4], reverse=True)[offset:offset + limit]
+
+    async def get_user_files(self, user_id, limit=10, cursor=None, newer=False):
+        """User's files newest first, keyset-paginated on (uploaded_at, id) across shards"""
+        rows = chain.from_iterable(await asyncio.gather(*(
+            shard._read(shard._get_user_files, user_id, limit, cursor, newer) for shard in self.shards
+        )))
+        rows = sorted(rows, key=lambda row: (row[4], row[0]), reverse=True)
+        # newer: cursor ke sabse paas wali (yaani sabse purani) limit + 1 rows
+        return rows[-(limit + 1):] if newer else rows[:limit + 1]
+
+    async def get_file_names(self, file_pks):
+        """{files.id: (file_name, custom_link)} for the given ids"""
+        by_shard = {}
+        for file_pk in file_pks:
+            by_shard.setdefault(self.shard_for_pk(file_pk), []).append(file_pk)
+        names = {}
+        for found in await asyncio.gather(*(shard.get_file_names(pks) for shard, pks in by_shard.items())):
+            names.update(found)
+        return names
+
+    async def flush_download_counts(self):
+        """Write buffered download counts (to their shards) and events (home) in parallel"""
+        if not self._pending_downloads and not self._pending_events:
+            return
+        pending, self._pending_downloads = self._pending_downloads, {}
+        events, self._pending_events = self._pending_events, []
+        by_shard = {}
+        for file_pk, count in pending.items():
+            by_shard.setdefault(self.shard_for_pk(file_pk), []).append((file_pk, count))
+
+        parts = list(by_shard.items())
+        results = await asyncio.gather(
+            self._write(self._flush_download_counts, [], events),
+            *(shard._write(_add_downloads, items) for shard, items in parts),
+            return_exceptions=True
+        )
+        # Jo hissa fail hua sirf wahi wapas buffer mein (baaki commit ho chuke hain)
+        if isinstance(results[0], Exception):
+            self._pending_events[:0] = events
+        for (shard, items), result in zip(parts, results[1:]):
+            for file_pk, count in items:
+                if isinstance(result, Exception):
+                    self._pending_downloads[file_pk] = self._pending_downloads.get(file_pk, 0) + count
+                else:
+                    self.link_cache.add_downloads(file_pk, count)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    async def generate_custom_link(self, file_id, custom_name=None):
+        """Generate custom link for file"""
+        file_pks = [pk for pk in await self._fan_out(_file_pk_by_file_id, file_id) if pk is not None]
+        if not file_pks:
+            return None
+        file_pk = file_pks[0]
+
+        link_id = clean_link_name(custom_name) if custom_name else None
+        if not await self._write(_set_link_route, file_pk, link_id):
+            # Naam kisi aur file ka hai - default (encoded id) link
+            link_id = None
+            await self._write(_set_link_route, file_pk, None)
+        link_id = link_id or encode_link(file_pk)
+        shard = self.shard_for_pk(file_pk)
+        await shard._write(_set_custom_link, file_pk, link_id)
+
+        # Purana link ab kaam nahi karega
+        self.link_cache.invalidate_file(file_pk)
+        self.inline_index.set_link(file_pk, link_id)
+        self.link_cache.invalidate(link_id)
+        return link_id
+
+    async def search_files(self, query, limit=20, offset=0):
+        """Search files by name and caption (ranked, prefix match) across all shards"""
+        match = fts_match(query)
+        if not match:
+            return []
+        # Har shard se utne results jitne merged page tak chahiye; bm25 chhota = behtar
+        ranked = heapq.merge(*await self._fan_out(_search_scored, match, limit + offset))
+        return [row[1:] for row in ranked][offset:offset + limit]
+
+    async def get_stats(self):
+        """Get bot statistics (file totals summed over shards, users from the home database)"""
+        home, *shards = await asyncio.gather(self._read(self._get_stats),
+                                             *(shard._read(shard._get_stats) for shard in self.shards))
+        days = {}
+        for stats in [home] + shards:
+            for day in stats['daily']:
+                merged = days.setdefault(day['day'], dict(day, files=0, bytes=0, downloads=0, new_users=0))
+                merged['files'] += day['files']
+                merged['bytes'] += day['bytes']
+                merged['downloads'] += day['downloads']
+                if stats is home:
+                    merged['new_users'] += day['new_users']
+        return dict(
+            home,
+            total_files=sum(stats['total_files'] for stats in shards),
+            total_size=sum(stats['total_size'] for stats in shards),
+            total_downloads=sum(stats['total_downloads'] for stats in shards),
+            daily=sorted(days.values(), key=lambda day: day['day'], reverse=True)[:7]
+        )
+
+    async def load_inline_index(self):
+        """Build the inline index from every shard's files (merged in files.id order)"""
+        rows = await self._fan_out(_inline_rows)
+        index = await asyncio.to_thread(self._build_inline_index, rows)
+        self._set_inline_index(index)
+
+    @staticmethod
+    def _build_inline_index(shard_rows):
+        index = PrefixIndex()
+        for row in heapq.merge(*shard_rows):
+            index.add(InlineEntry(*row))
+        return index
+
+    async def _warm_cache_header(self):
+        # Shards ki migrations bhi pehle (lazy=True par wo bhi pehli query tak ruki hain)
+        await asyncio.gather(*(shard._write(schema_version) for shard in self.shards))
+        return await super()._warm_cache_header()
+
+    def _file_stat(self):
+        stats = [Database._file_stat(db) for db in [self] + self.shards]
+        return None if None in stats else tuple(stats)
+
+    async def close(self):
+        """Flush, close the home database and every shard, then write the warm-cache snapshot"""
+        warm_cache, self.warm_cache = self.warm_cache, None
+        await super().close()
+        await asyncio.gather(*(shard.close() for shard in self.shards))
+        # Snapshot sab files band hone ke baad - tabhi unke stat final hain
+        self.warm_cache = warm_cache
+        if warm_cache:
+            try:
+                await asyncio.to_thread(self._write_warm_cache)
+            except Exception as e:
+                print(f"Warm cache save failed: {e}")
@@ -0,0 +1,161 @@
+"""
+Per-user and per-link download throttling.
+
+Har user aur har link ka apna token bucket, lekin ek object per bucket nahi:
+ek store mein saare buckets ka rate/capacity same hai, isliye har key ke liye
+sirf (tokens, updated) tuple rakhte hain. Jo key store mein nahi hai uska bucket
+bhara hua hai - bhare buckets (idle users) hata diye jaate hain, isliye memory
+sirf haal hi mein active users/links jitni lagti hai.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from config import (
+    DOWNLOAD_USER_RATE, DOWNLOAD_USER_BURST, DOWNLOAD_LINK_RATE, DOWNLOAD_LINK_BURST,
+    THROTTLE_MAX_KEYS, THROTTLE_STATE_FILE, THROTTLE_SAVE_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+class TokenBucketStore:
+    """Token buckets for many keys sharing one rate/capacity, stored as key -> (tokens, updated)"""
+
+    def __init__(self, rate, capacity, max_size=THROTTLE_MAX_KEYS):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_size = max_size
+        # Sabse purana update pehle; bhare buckets aage se hi milte hain
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def tokens(self, key, now):
+        entry = self._buckets.get(key)
+        if entry is None:
+            return self.capacity
+        tokens, updated = entry
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def take(self, key, now, count=1):
+        self._buckets[key] = (self.tokens(key, now) - count, now)
+        self._buckets.move_to_end(key)
+        self.evict_idle(now)
+
+    def evict_idle(self, now):
+        """Drop buckets that have refilled (and the oldest ones past max_size)"""
+        full_after = self.capacity / self.rate
+        while self._buckets:
+            key, (tokens, updated) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_size:
+                if now - updated < full_after:
+                    break
+                if tokens + (now - updated) * self.rate < self.capacity:
+                    # Udhaar wala (bada bundle) bucket abhi bhara nahi - ab tak ka refill jod kar
+                    # peeche bhejo, taaki uske peeche ke bhare buckets nikal sakein
+                    self._buckets[key] = (self.tokens(key, now), now)
+                    self._buckets.move_to_end(key)
+                    continue
+            self._buckets.popitem(last=False)
+
+    def dump(self, now, wall_now):
+        """Non-full buckets as [key, tokens, wall clock time] (monotonic time restart ke baad bekaar hai)"""
+        self.evict_idle(now)
+        return [[key, tokens, wall_now - (now - updated)] for key, (tokens, updated) in self._buckets.items()]
+
+    def restore(self, entries, now, wall_now):
+        for key, tokens, wall_updated in entries:
+            self._buckets[key] = (tokens, now - (wall_now - wall_updated))
+        self.evict_idle(now)
+
+
+class DownloadThrottle:
+    """Limits how fast one user, and all users together, can pull files through one link"""
+
+    def __init__(self, state_file=THROTTLE_STATE_FILE, save_interval=THROTTLE_SAVE_INTERVAL):
+        self.users = TokenBucketStore(DOWNLOAD_USER_RATE, DOWNLOAD_USER_BURST)
+        self.links = TokenBucketStore(DOWNLOAD_LINK_RATE, DOWNLOAD_LINK_BURST)
+        self.state_file = state_file
+        self.save_interval = save_interval
+        self._task = None
+        self.allowed = 0
+        self.rejected = {'user': 0, 'link': 0}
+
+    def check(self, user_id, link, cost=1):
+        """Take cost tokens from the user's and the link's bucket; returns None or the limit hit"""
+        now = time.monotonic()
+        # Dono mein jagah ho tabhi dono se lo - reject hua request kisi ka quota na khaaye.
+        # Bundle capacity se bada ho sakta hai: tab bhara bucket kaafi hai aur poora
+        # cost udhaar kat jaata hai, yaani agle downloads utni der ruke rehte hain
+        if self.users.tokens(user_id, now) < min(cost, self.users.capacity):
+            self.rejected['user'] += 1
+            return 'user'
+        if self.links.tokens(link, now) < min(cost, self.links.capacity):
+            self.rejected['link'] += 1
+            return 'link'
+        self.users.take(user_id, now, cost)
+        self.links.take(link, now, cost)
+        self.allowed += 1
+        return None
+
+    def user_throttled(self, user_id):
+        """True if the user could not take even one download right now (no side effects)"""
+        return self.users.tokens(user_id, time.monotonic()) < 1
+
+    def stats(self):
+        return {
+            'allowed': self.allowed,
+            'rejected': sum(self.rejected.values()),
+            'rejected_user': self.rejected['user'],
+            'rejected_link': self.rejected['link'],
+            'tracked_users': len(self.users),
+            'tracked_links': len(self.links)
+        }
+
+    def start(self):
+        """Restore saved buckets and start periodic saving (if a state file is configured)"""
+        if not self.state_file or self._task is not None:
+            return
+        self.load()
+        if self.save_interval:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.state_file:
+            self.save()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f"Throttle state save failed: {e}")
+
+    def save(self):
+        """Write non-full buckets to the state file (restart se throttle reset na ho)"""
+        now, wall_now = time.monotonic(), time.time()
+        state = {'users': self.users.dump(now, wall_now), 'links': self.links.dump(now, wall_now)}
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp, self.state_file)
+
+    def load(self):
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Throttle state load failed: {e}")
+            return
+        now, wall_now = time.monotonic(), time.time()
+        self.users.restore(state.get('users', []), now, wall_now)
+        self.links.restore(state.get('links', []), now, wall_now)
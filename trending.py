@@ -0,0 +1,67 @@
+import time
+import heapq
+from collections import Counter
+from operator import itemgetter
+from config import TRENDING_SLOTS, TRENDING_SLOT_SECONDS
+
+class TrendingRing:
+    """Downloads per file over the last slots * slot_seconds, kept as a ring of per-slot counters.
+
+    Har slot (default 1 minute) ka apna Counter. Naya slot shuru hote hi sabse
+    purana slot totals se ghata kar khaali kar dete hain - koi scan nahi, memory
+    sirf pichle window mein download hui files jitni.
+    """
+
+    def __init__(self, slots=TRENDING_SLOTS, slot_seconds=TRENDING_SLOT_SECONDS):
+        self.slot_seconds = slot_seconds
+        self._slots = [Counter() for _ in range(slots)]
+        self._current = int(time.time() // slot_seconds)
+        self._totals = Counter()  # files.id -> downloads in window
+        self._names = {}  # files.id -> file_name (sirf window wali files)
+
+    @property
+    def window(self):
+        return len(self._slots) * self.slot_seconds
+
+    def _advance(self, now):
+        slot = int(now // self.slot_seconds)
+        if slot - self._current >= len(self._slots):
+            # Poora window beet gaya - sab purana
+            for counter in self._slots:
+                counter.clear()
+            self._totals.clear()
+            self._names.clear()
+        else:
+            for current in range(self._current + 1, slot + 1):
+                old = self._slots[current % len(self._slots)]
+                for file_pk, count in old.items():
+                    remaining = self._totals[file_pk] - count
+                    if remaining > 0:
+                        self._totals[file_pk] = remaining
+                    else:
+                        del self._totals[file_pk]
+                        self._names.pop(file_pk, None)
+                old.clear()
+        self._current = max(self._current, slot)
+
+    def add(self, file_pk, file_name, at=None, count=1):
+        """Count a download of file_pk at unix time `at` (default now)"""
+        now = time.time()
+        at = now if at is None else at
+        self._advance(now)
+        slot = min(int(at // self.slot_seconds), self._current)
+        if slot <= self._current - len(self._slots):
+            return
+        # Purane (load kiye) events apne slot mein jaate hain, taaki sahi waqt par nikal jayein
+        self._slots[slot % len(self._slots)][file_pk] += count
+        self._totals[file_pk] += count
+        self._names[file_pk] = file_name
+
+    def top(self, limit):
+        """[(file_pk, file_name, downloads)] most downloaded in the window"""
+        self._advance(time.time())
+        return [(file_pk, self._names[file_pk], count)
+                for file_pk, count in heapq.nlargest(limit, self._totals.items(), key=itemgetter(1))]
+
+    def __len__(self):
+        return len(self._totals)